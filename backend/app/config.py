@@ -22,6 +22,13 @@ class Settings(BaseSettings):
     PINECONE_API_KEY: str = Field(..., description="Pinecone API Key")
     GITHUB_API_KEY: Optional[str] = Field(default=None, description="Optional GitHub API Key")
     
+    # Vector Store Configuration
+    VECTOR_BACKEND: str = Field(default="pinecone", description="Vector store backend: 'pinecone', 'local' (in-memory, persisted to a snapshot) or 'memory' (in-memory, not persisted)")
+    LOCAL_INDEX_PATH: str = Field(default="data/vector_index", description="Path of the local index snapshot, without the .npy/.json extension")
+    LOCAL_INDEX_TYPE: str = Field(default="exact", description="Local index search: 'exact' (brute force) or 'ivf' (approximate IVF-flat)")
+    LOCAL_INDEX_NLIST: int = Field(default=0, ge=0, description="Number of IVF cells (0 picks about sqrt of the corpus size)")
+    LOCAL_INDEX_NPROBE: int = Field(default=8, ge=1, description="Number of IVF cells scanned per query; higher is slower with better recall")
+
     # Pinecone Configuration
     PINECONE_API_REGION: str = Field(default="us-east-1", description="Pinecone region")
     PINECONE_API_INDEX: str = Field(default="document-index", description="Pinecone index name")
@@ -29,6 +36,10 @@ class Settings(BaseSettings):
     # Model Configuration
     # 🔄 Changed to model that is actually available on Hugging Face's inference API
     EMBEDDING_MODEL: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", description="Embedding model used for feature extraction")
+    EMBEDDING_BACKEND: str = Field(default="auto", description="How queries are embedded: hf_api (Hugging Face Inference API), local (sentence-transformers in process), onnx (quantized ONNX export in process), or auto (hf_api in production, local otherwise)")
+    ONNX_EMBEDDING_FILE: str = Field(default="onnx/model_quint8_avx2.onnx", description="Int8 ONNX graph used by the onnx embedding backend: a file in the EMBEDDING_MODEL repo, or a local path")
+    ONNX_EMBEDDING_MAX_TOKENS: int = Field(default=256, gt=0, description="Inputs to the onnx embedding backend are truncated to this many tokens, the model's maximum sequence length")
+    ONNX_EMBEDDING_THREADS: int = Field(default=1, ge=0, description="Intra-op threads per onnx embedding call; concurrent queries already run in parallel worker threads (0 lets onnxruntime use every core)")
     GEMINI_MODEL: str = Field(default="gemini-2.0-flash", description="Gemini model to use")
     GEMINI_TEMPERATURE: float = Field(default=0.7, ge=0.0, le=1.0, description="Temperature for Gemini model")
     
@@ -1983,8 +1994,149 @@ class Settings(BaseSettings):
     CHUNK_SIZE: int = Field(default=400, description="Size of text chunks for splitting documents")
     CHUNK_OVERLAP: int = Field(default=50, description="Overlap between text chunks")
     EMBEDDING_DIMENSION: int = Field(default=384, description="Dimension of embeddings (for all-MiniLM-L6-v2)")
+    EMBEDDING_CACHE_SIZE: int = Field(default=4096, ge=0, description="Maximum number of cached query embeddings (0 disables the cache)")
+    EMBEDDING_CACHE_TTL: float = Field(default=3600.0, gt=0.0, description="Seconds a cached query embedding stays valid")
+    EMBEDDING_BATCHING_ENABLED: bool = Field(default=True, description="Embed concurrent queries together in one API request or forward pass")
+    EMBEDDING_BATCH_WINDOW_MS: float = Field(default=5.0, ge=0.0, description="Longest time a query waits for others to share its embedding batch")
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(default=32, ge=1, description="Largest number of queries embedded in one batch; a full batch is sent at once")
 
     TOP_K: int = Field(default=4, description="Default number of top results to return in Pinecone queries")
+    INDEX_VERSION: str = Field(default="1", description="Version tag of the ingested vector index; bump after re-ingestion to invalidate cached answers")
+
+    # Hybrid Retrieval Configuration
+    HYBRID_RETRIEVAL_ENABLED: bool = Field(default=True, description="Fuse BM25 lexical matches with dense matches in retrieval")
+    LEXICAL_INDEX_PATH: str = Field(default="data/lexical_index.json", description="Path of the BM25 inverted index built at ingestion time (empty for a non-persistent index)")
+    HYBRID_CANDIDATES: int = Field(default=10, ge=1, description="Number of candidates taken from each retriever before fusion")
+    RRF_K: int = Field(default=60, ge=1, description="Rank offset of reciprocal rank fusion; higher values flatten the contribution of top ranks")
+
+    # Reranking Configuration
+    RERANK_ENABLED: bool = Field(default=False, description="Rerank retrieval candidates with a CPU cross-encoder before generation")
+    RERANK_MODEL: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2", description="Cross-encoder model used for reranking")
+    RERANK_CANDIDATES: int = Field(default=20, ge=1, description="Number of candidates retrieved for reranking")
+    RERANK_TOP_N: int = Field(default=3, ge=1, description="Number of reranked chunks kept as context when CONTEXT_PACKING_ENABLED is off (with packing, CONTEXT_CANDIDATES are kept)")
+    RETRIEVAL_BUDGET_MS: float = Field(default=300.0, gt=0.0, description="Per-request latency budget in milliseconds for everything before generation; reranking is skipped when it would exceed it")
+
+    # Context Packing Configuration
+    CONTEXT_PACKING_ENABLED: bool = Field(default=True, description="Deduplicate retrieved chunks, order them by MMR and cap them at a token budget")
+    CONTEXT_TOKEN_BUDGET: int = Field(default=800, ge=1, description="Maximum number of context tokens passed to the LLM")
+    CONTEXT_MMR_LAMBDA: float = Field(default=0.7, ge=0.0, le=1.0, description="MMR trade-off between relevance (1.0) and diversity (0.0)")
+    CONTEXT_DUPLICATE_THRESHOLD: float = Field(default=0.8, ge=0.0, le=1.0, description="Shingle Jaccard similarity above which a chunk is dropped as a near-duplicate")
+    CONTEXT_CANDIDATES: int = Field(default=12, ge=1, description="Number of chunks retrieved (or kept after reranking) for the context packer to choose from up to the token budget")
+    TOKENIZER_MODEL: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", description="Hugging Face tokenizer used to measure prompt sizes locally")
+
+    # History Windowing Configuration
+    HISTORY_WINDOW_ENABLED: bool = Field(default=True, description="Replace older turns of long conversations with a cached rolling summary")
+    HISTORY_WINDOW_MESSAGES: int = Field(default=6, ge=1, description="Number of most recent messages always sent verbatim")
+    HISTORY_TOKEN_BUDGET: int = Field(default=1500, ge=1, description="History size in tokens above which older turns are summarized")
+    HISTORY_SUMMARY_BLOCK: int = Field(default=4, ge=1, description="Number of messages added to the rolling summary at a time")
+    HISTORY_SUMMARY_CACHE_SIZE: int = Field(default=1024, ge=1, description="Maximum number of cached history summaries")
+    HISTORY_SUMMARY_TTL: float = Field(default=3600.0, gt=0.0, description="Seconds a cached history summary stays valid")
+
+    # Prompt Cache Configuration
+    PROMPT_CACHE_ENABLED: bool = Field(default=False, description="Serve SYSTEM_PROMPT from a Gemini cached content resource instead of sending it with every request (GEMINI_MODEL must be an explicit version, e.g. gemini-2.0-flash-001)")
+    PROMPT_CACHE_TTL: float = Field(default=3600.0, ge=60.0, description="Seconds the cached system prompt lives before it must be refreshed")
+    PROMPT_CACHE_REFRESH_MARGIN: float = Field(default=300.0, ge=0.0, description="Seconds before expiry at which the cached system prompt's TTL is extended")
+
+    # Bio Sectioning Configuration
+    BIO_SECTIONING_ENABLED: bool = Field(default=False, description="Send only the core bio and the bio sections most similar to the question instead of the whole BIO_SYSTEM_PROMPT (bypasses the prompt cache)")
+    BIO_CORE_SECTIONS: int = Field(default=2, ge=0, description="Number of leading bio sections (name, contact details and summary) always included")
+    BIO_SECTION_TOP_K: int = Field(default=4, ge=0, description="Number of additional bio sections selected per question")
+
+    # Request Coalescing Configuration
+    SINGLEFLIGHT_ENABLED: bool = Field(default=True, description="Share one pipeline run and token stream between concurrent /chat requests with the same normalized history")
+
+    # Gemini Admission Control Configuration
+    GEMINI_MAX_CONCURRENCY: int = Field(default=64, ge=1, description="Maximum number of concurrent Gemini calls per process (64 streams of about 2 s are roughly 2,000 requests per minute, within Gemini Flash's paid-tier rate limit)")
+    GEMINI_MAX_QUEUE: int = Field(default=512, ge=0, description="Maximum number of Gemini calls waiting for a slot; lower-priority waiters are evicted first when it is full")
+    GEMINI_QUEUE_TIMEOUT: float = Field(default=10.0, ge=0.0, description="Seconds a Gemini call may wait for a slot before it is rejected")
+    GEMINI_RETRY_AFTER: int = Field(default=5, ge=0, description="Seconds sent in the Retry-After header of a /chat request rejected by admission control (HTTP 503)")
+    GEMINI_MAX_RETRIES: int = Field(default=3, ge=0, description="Maximum retries of a rate-limited Gemini call")
+    GEMINI_RETRY_BASE_DELAY: float = Field(default=0.5, gt=0.0, description="Seconds of backoff before the first retry, doubled on each further retry and fully jittered")
+    GEMINI_RETRY_MAX_DELAY: float = Field(default=8.0, gt=0.0, description="Maximum seconds of backoff before a retry")
+    GEMINI_RETRY_BUDGET_RATIO: float = Field(default=0.2, ge=0.0, description="Retries earned per Gemini call, bounding retries to this fraction of traffic")
+    GEMINI_RETRY_BUDGET_CAPACITY: float = Field(default=10.0, ge=1.0, description="Maximum number of retries that can be saved up in the retry budget")
+
+    # Retrieval Gate Configuration
+    RETRIEVAL_GATE_ENABLED: bool = Field(default=True, description="Skip retrieval for chit-chat and for questions the bio in the system prompt answers completely")
+    RETRIEVAL_GATE_THRESHOLD: float = Field(default=0.8, ge=0.0, le=1.0, description="Minimum cosine similarity to a bio-answerable example for skipping retrieval")
+    RETRIEVAL_GATE_SKIP_EXAMPLES: List[str] = Field(
+        default=[
+            "Who are you?",
+            "Tell me about yourself",
+            "What is your email?",
+            "How can I contact you?",
+            "What is your phone number?",
+            "Where did you go to university?",
+            "What is your GPA?",
+            "Where do you work?",
+            "What is your current job?",
+            "What are your technical skills?",
+        ],
+        description="Questions the bio answers completely, so retrieval is skipped for questions closest to them"
+    )
+    RETRIEVAL_GATE_RETRIEVE_EXAMPLES: List[str] = Field(
+        default=[
+            "How does the Knowledge Base Builder work?",
+            "Explain the architecture of GONEXT",
+            "What model does Deep Gestures use?",
+            "How is Recursive QA evaluated?",
+            "What courses did you take in machine learning?",
+            "What grade did you get in linear algebra?",
+            "How is the emf in the ellipse derived?",
+            "How do I run this chatbot locally?",
+        ],
+        description="Questions that need the indexed documents, so similar questions are not mistaken for bio-answerable ones"
+    )
+
+    # Speculative Prefetch Configuration
+    PREFETCH_ENABLED: bool = Field(default=True, description="Embed and retrieve context for suggested follow-ups before the user clicks them")
+    PREFETCH_TTL: float = Field(default=120.0, gt=0.0, description="Seconds prefetched matches for a suggestion stay valid")
+    PREFETCH_CACHE_SIZE: int = Field(default=512, ge=1, description="Maximum number of suggestions with prefetched matches")
+    PREFETCH_MAX_IN_FLIGHT: int = Field(default=4, ge=1, description="Maximum number of concurrent speculative retrievals")
+
+    # Session Configuration
+    SESSIONS_ENABLED: bool = Field(default=True, description="Keep conversations server-side so clients can send a session ID and only the new message")
+    SESSION_BACKEND: str = Field(default="memory", description="Session store backend: 'memory' (in-process, LRU/TTL eviction)")
+    SESSION_TTL: float = Field(default=3600.0, gt=0.0, description="Seconds a session lives after its last message")
+    SESSION_MAX_SESSIONS: int = Field(default=10000, ge=1, description="Maximum number of sessions before the least recently used are evicted")
+    SESSION_MAX_MESSAGES: int = Field(default=200, ge=2, description="Maximum number of messages kept per session; older ones are dropped")
+
+    # Response Streaming Configuration
+    STREAM_FLUSH_INTERVAL_MS: float = Field(default=25.0, ge=0.0, description="Longest time answer text is buffered before being written to the stream; 0 writes every chunk as it arrives")
+    STREAM_FLUSH_BYTES: int = Field(default=512, ge=1, description="Buffered answer text, in bytes, that is written to the stream without waiting for the flush interval")
+
+    # Disconnect Handling Configuration
+    CANCEL_ON_DISCONNECT: bool = Field(default=True, description="Cancel the pipeline run behind a /chat stream, including pending embedding, Pinecone and Gemini calls, when its client disconnects")
+
+    # Semantic Cache Configuration
+    SEMANTIC_CACHE_ENABLED: bool = Field(default=True, description="Serve previous answers to semantically similar questions")
+    SEMANTIC_CACHE_THRESHOLD: float = Field(default=0.92, ge=0.0, le=1.0, description="Minimum cosine similarity between query embeddings for a cache hit")
+    SEMANTIC_CACHE_TTL: float = Field(default=3600.0, gt=0.0, description="Seconds a cached answer stays valid")
+    SEMANTIC_CACHE_MAX_ENTRIES: int = Field(default=1000, ge=1, description="Maximum number of cached answers before LRU eviction")
+
+    # Follow-up Suggestions Configuration
+    FOLLOWUP_MAX_CONCURRENCY: int = Field(default=4, ge=1, description="Maximum number of concurrent follow-up suggestion LLM calls")
+    FOLLOWUP_QUEUE_TIMEOUT: float = Field(default=2.0, ge=0.0, description="Seconds a follow-up request may wait for a free slot before returning no suggestions")
+    COMBINED_SUGGESTIONS_ENABLED: bool = Field(default=True, description="Let /chat requests with include_suggestions generate the follow-ups in the same Gemini call as the answer")
+
+    # Warm Answers Configuration
+    WARM_ANSWERS_ENABLED: bool = Field(default=True, description="Precompute answers for the canonical default prompts at startup")
+    WARM_PROMPTS: List[str] = Field(
+        default=[
+            # Keep in sync with defaultPrompts in frontend/src/config/config.ts
+            "Current project?",
+            "What's Recursive QA?",
+            "Formal ML coursework?",
+            "Explain Deep Gestures",
+        ],
+        description="Canonical prompts whose answers, context and follow-ups are precomputed"
+    )
+    WARM_ANSWERS_REFRESH_INTERVAL: float = Field(default=300.0, gt=0.0, description="Seconds between background checks for stale warm answers")
+    WARM_ANSWERS_MAX_AGE: float = Field(default=86400.0, gt=0.0, description="Seconds after which a warm answer is regenerated even if nothing changed")
+    ADMIN_API_KEY: Optional[str] = Field(default=None, description="Key required in the X-Admin-Key header of admin endpoints; admin endpoints are disabled when unset")
+
+    # Metrics Configuration
+    METRICS_WINDOW: int = Field(default=1000, ge=1, description="Number of recent observations kept per latency distribution")
 
     class Config:
         env_file = ".env"
@@ -1,27 +1,15 @@
 # build_vector_db.py
-import os
 import time
-from pinecone import Pinecone, ServerlessSpec
 
-# Import the main functions from your three ingestion scripts.
-# Each script should be refactored to accept an 'index' parameter.
-from .load_github import main as load_github_main
-from .load_pdfs import main as load_pdfs_main
-from .load_website import main as load_website_main
 from ..config import settings
 
-def main():
-    # === Initialize Pinecone ===
-    pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+def create_pinecone_index():
+    """Create the serverless Pinecone index if it does not exist and wait until it is ready."""
+    from pinecone import Pinecone, ServerlessSpec
 
-    # === Delete the existing index if it exists ===
+    pc = Pinecone(api_key=settings.PINECONE_API_KEY)
     if settings.PINECONE_API_INDEX in pc.list_indexes().names():
-        print(f"Deleting existing index: {settings.PINECONE_API_INDEX}")
-        pc.delete_index(settings.PINECONE_API_INDEX)
-        # Allow some time for deletion to propagate.
-        time.sleep(3)
-
-    # === Create a new index here ===
+        return
     print(f"Creating new index: {settings.PINECONE_API_INDEX}")
     pc.create_index(
         name=settings.PINECONE_API_INDEX,
@@ -29,14 +17,32 @@ def main():
         metric="cosine",
         spec=ServerlessSpec(cloud="aws", region=settings.PINECONE_API_REGION)
     )
-    # Optionally wait until the index is ready.
     while not pc.describe_index(settings.PINECONE_API_INDEX).status.get("ready", False):
         print("Waiting for index to be ready...")
         time.sleep(1)
-    index = pc.Index(settings.PINECONE_API_INDEX)
-    print("Index is ready.")
 
-    # === Call the ingestion scripts using the new index ===
+def main():
+    # === Create the Pinecone index before the vector store connects to it ===
+    if settings.VECTOR_BACKEND == "pinecone":
+        create_pinecone_index()
+
+    # Import the main functions from your three ingestion scripts.
+    # Each script writes through the shared vector store selected by VECTOR_BACKEND.
+    from .load_github import main as load_github_main
+    from .load_pdfs import main as load_pdfs_main
+    from .load_website import main as load_website_main
+    from ..services.lexical_index import lexical_index
+    from ..services.vector_store import vector_store
+
+    # === Clear the existing documents ===
+    print(f"Clearing namespace 'docs' (current counts: {vector_store.namespace_stats()})")
+    vector_store.delete(delete_all=True, namespace="docs")
+    vector_store.flush()
+    lexical_index.delete(delete_all=True)
+    lexical_index.save()
+    print("Vector store is ready.")
+
+    # === Call the ingestion scripts ===
     print("\n--- Running GitHub Loader ---")
     load_github_main()
 
@@ -46,7 +52,8 @@ def main():
     print("\n--- Running Website Loader ---")
     load_website_main()
 
-    print("\nAll data has been ingested into the new Pinecone index!")
+    print(f"\nAll data has been ingested into the vector store! {vector_store.namespace_stats()}")
+    print(f"Lexical index: {len(lexical_index)} documents")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,46 @@
+# export_snapshot.py
+from pinecone import Pinecone
+
+from app.config import settings
+from app.services.lexical_index import LexicalIndex
+from app.services.local_index import InMemoryVectorStore
+
+NAMESPACES = ["docs"]
+FETCH_BATCH_SIZE = 100
+
+def main():
+    # === Initialize Pinecone ===
+    pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+    index = pc.Index(settings.PINECONE_API_INDEX)
+
+    ids, vectors, metadata, namespaces = [], [], [], []
+    for namespace in NAMESPACES:
+        print(f"Exporting namespace '{namespace}'...")
+        # list() yields pages of vector ids
+        for id_page in index.list(namespace=namespace):
+            for i in range(0, len(id_page), FETCH_BATCH_SIZE):
+                batch = id_page[i:i + FETCH_BATCH_SIZE]
+                fetched = index.fetch(ids=batch, namespace=namespace)
+                for vector_id, vector in fetched.vectors.items():
+                    ids.append(vector_id)
+                    vectors.append(vector.values)
+                    metadata.append(vector.metadata or {})
+                    namespaces.append(namespace)
+        print(f"Fetched {len(ids)} vectors so far.")
+
+    InMemoryVectorStore.save_snapshot(settings.LOCAL_INDEX_PATH, ids, vectors, metadata, namespaces)
+    print(f"✅ Wrote {len(ids)} vectors to {settings.LOCAL_INDEX_PATH}.npy/.json")
+
+    # === Rebuild the BM25 index from the same documents ===
+    lexical = LexicalIndex(settings.LEXICAL_INDEX_PATH)
+    lexical.delete(delete_all=True)
+    lexical.upsert([
+        {"id": vector_id, "metadata": meta}
+        for vector_id, meta, namespace in zip(ids, metadata, namespaces)
+        if namespace == "docs"
+    ])
+    lexical.save()
+    print(f"✅ Wrote {len(lexical)} documents to {settings.LEXICAL_INDEX_PATH}")
+
+if __name__ == "__main__":
+    main()
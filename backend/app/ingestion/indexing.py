@@ -0,0 +1,21 @@
+"""
+Shared write path of the ingestion loaders.
+"""
+from app.services.lexical_index import lexical_index
+from app.services.vector_store import vector_store
+
+def index_vectors(vectors, namespace="docs"):
+    """
+    Write chunk vectors to the vector store and the BM25 index together.
+
+    Hybrid retrieval fuses both, so every loader goes through here to keep
+    them indexing the same chunks.
+
+    Args:
+        vectors: Vectors with id, values and metadata (including the chunk text).
+        namespace: The vector store namespace to write to.
+    """
+    vector_store.upsert(vectors, namespace=namespace)
+    vector_store.flush()
+    lexical_index.upsert(vectors)
+    lexical_index.save()
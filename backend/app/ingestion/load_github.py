@@ -5,12 +5,9 @@ import tempfile
 import hashlib
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from pinecone import Pinecone, ServerlessSpec
 from langchain_huggingface import HuggingFaceEmbeddings
 from app.config import settings
-
-# Initialize Pinecone
-pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+from app.ingestion.indexing import index_vectors
 
 # Initialize HuggingFace Embeddings
 embeddings = HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
@@ -72,7 +69,7 @@ def extract_documents_from_markdown(md_path, source_url):
 
     return splitter.split_documents([doc])
 
-def embed_and_upload_to_pinecone(chunks):
+def embed_and_upload(chunks):
     if not chunks:
         print("⚠️ No chunks to embed.")
         return
@@ -110,9 +107,8 @@ def embed_and_upload_to_pinecone(chunks):
         })
 
     print(
-        f"\n📤 Upserting {len(vectors)} vectors into Pinecone (namespace='docs')...")
-    index = pc.Index(settings.PINECONE_API_INDEX)
-    index.upsert(vectors=vectors, namespace="docs")
+        f"\n📤 Upserting {len(vectors)} vectors into the vector store (namespace='docs')...")
+    index_vectors(vectors, namespace="docs")
     print("✅ Upload complete!")
 
 def main():
@@ -133,7 +129,7 @@ def main():
             print(f"❌ Error processing {url}: {e}")
 
     print(f"\n🧩 Total Chunks Created: {len(all_chunks)}")
-    embed_and_upload_to_pinecone(all_chunks)
+    embed_and_upload(all_chunks)
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,12 @@
 import os
-import time
 import requests
 import tempfile
 import urllib.parse
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from pinecone import Pinecone, ServerlessSpec
 from langchain_huggingface import HuggingFaceEmbeddings
 from app.config import settings
-
-# Initialize Pinecone
-pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+from app.ingestion.indexing import index_vectors
 
 # Initialize HuggingFace Embeddings using an open source model
 embeddings = HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
@@ -55,24 +51,7 @@ def extract_documents_from_pdf(pdf_path, source_url):
     )
     return splitter.split_documents(documents)
 
-def embed_and_upload_to_pinecone(chunks):
-    # Check if the index exists; if not, create it.
-    if settings.PINECONE_API_INDEX not in pc.list_indexes().names():
-        print(f"Creating index: {settings.PINECONE_API_INDEX}")
-        pc.create_index(
-            name=settings.PINECONE_API_INDEX,
-            dimension=settings.EMBEDDING_DIMENSION,
-            metric="cosine",
-            spec=ServerlessSpec(cloud="aws", region=settings.PINECONE_API_REGION)
-        )
-        # Wait until index is ready
-        while not pc.describe_index(settings.PINECONE_API_INDEX).status['ready']:
-            time.sleep(1)
-    else:
-        print(f"Index {settings.PINECONE_API_INDEX} already exists.")
-
-    index = pc.Index(settings.PINECONE_API_INDEX)
-
+def embed_and_upload(chunks):
     # Get text chunks
     texts = [chunk.page_content for chunk in chunks]
 
@@ -98,8 +77,8 @@ def embed_and_upload_to_pinecone(chunks):
     ]
 
     print(
-        f"Upserting {len(vectors)} vectors into Pinecone (namespace='docs')...")
-    index.upsert(vectors=vectors, namespace="docs")
+        f"Upserting {len(vectors)} vectors into the vector store (namespace='docs')...")
+    index_vectors(vectors, namespace="docs")
     print("Upload complete!")
 
 def main():
@@ -114,7 +93,7 @@ def main():
             print(f"Error processing {url}: {e}")
 
     if all_chunks:
-        embed_and_upload_to_pinecone(all_chunks)
+        embed_and_upload(all_chunks)
     else:
         print("No chunks to upload.")
 
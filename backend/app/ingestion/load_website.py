@@ -1,15 +1,11 @@
 import os
-import time
 import requests
 from bs4 import BeautifulSoup
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from pinecone import Pinecone, ServerlessSpec
 from langchain_huggingface import HuggingFaceEmbeddings
 from app.config import settings
-
-# Initialize Pinecone
-pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+from app.ingestion.indexing import index_vectors
 
 # Initialize HuggingFace Embeddings using an open source model
 embeddings = HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
@@ -40,24 +36,7 @@ def split_into_chunks(text, source_url):
     )
     return splitter.split_documents([document])
 
-def embed_and_upload_to_pinecone(chunks):
-    # Check if the index exists; if not, create it.
-    if settings.PINECONE_API_INDEX not in pc.list_indexes().names():
-        print(f"Creating index: {settings.PINECONE_API_INDEX}")
-        pc.create_index(
-            name=settings.PINECONE_API_INDEX,
-            dimension=settings.EMBEDDING_DIMENSION,
-            metric="cosine",
-            spec=ServerlessSpec(cloud="aws", region=settings.PINECONE_API_REGION)
-        )
-        # Wait until index is ready
-        while not pc.describe_index(settings.PINECONE_API_INDEX).status['ready']:
-            time.sleep(1)
-    else:
-        print(f"Index {settings.PINECONE_API_INDEX} already exists.")
-
-    index = pc.Index(settings.PINECONE_API_INDEX)
-
+def embed_and_upload(chunks):
     texts = [chunk.page_content for chunk in chunks]
     print("Embedding HTML text chunks using HuggingFace Embeddings...")
 
@@ -80,8 +59,8 @@ def embed_and_upload_to_pinecone(chunks):
         for i, (text, embedding) in enumerate(zip(texts, document_embeddings))
     ]
 
-    print(f"Upserting {len(vectors)} vectors into Pinecone...")
-    index.upsert(vectors=vectors, namespace="docs")
+    print(f"Upserting {len(vectors)} vectors into the vector store...")
+    index_vectors(vectors, namespace="docs")
     print("✅ Upload complete!")
 
 def main():
@@ -100,7 +79,7 @@ def main():
                 print(f"❌ Error for {url}: {e}")
 
         print(f"\n✅ Total Chunks Prepared: {len(all_chunks)}")
-        embed_and_upload_to_pinecone(all_chunks)
+        embed_and_upload(all_chunks)
 
     except Exception as e:
         print(f"Error: {e}")
@@ -1,18 +1,72 @@
 """
 Main FastAPI application module.
 """
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from app.routers import chat
+from app.routers import admin, chat, metrics
 from app.config import settings
+from app.services.bio_sections import bio_sections
+from app.services.embeddings import embeddings_service
+from app.services.prompt_cache import prompt_cache
+from app.services.reranker import reranker_service
+from app.services.retrieval_gate import retrieval_gate
+from app.services.tokenizer import tokenizer_service
+from app.services.vector_store import vector_store
+from app.services.warm_answers import warm_answer_store
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan hook.
+    
+    Starts caching the system prompt, precomputing warm answers, embedding
+    the bio sections and retrieval gate examples and loading the tokenizer,
+    the reranker and the ONNX embedding engine on startup, and closes the
+    async client sessions opened by the services on shutdown.
+    """
+    if settings.PROMPT_CACHE_ENABLED:
+        prompt_cache.start()
+    reranker_warmup = None
+    if settings.RERANK_ENABLED:
+        # Reranking is skipped until the cross-encoder has loaded
+        reranker_warmup = asyncio.create_task(asyncio.to_thread(reranker_service.warmup))
+    background_loads = []
+    # Token counts are estimated from the length until the tokenizer is loaded
+    background_loads.append(asyncio.create_task(asyncio.to_thread(tokenizer_service.load)))
+    if embeddings_service.backend == "onnx":
+        # The first query would otherwise load the tokenizer and ONNX session
+        background_loads.append(asyncio.create_task(asyncio.to_thread(embeddings_service.warmup)))
+    if settings.BIO_SECTIONING_ENABLED:
+        # The full bio is sent until the sections are embedded
+        background_loads.append(asyncio.create_task(bio_sections.load()))
+    if settings.RETRIEVAL_GATE_ENABLED:
+        # Every question is retrieved for until the examples are embedded
+        background_loads.append(asyncio.create_task(retrieval_gate.load()))
+    if settings.WARM_ANSWERS_ENABLED:
+        warm_answer_store.start(chat.produce_warm_answer)
+    yield
+    for task in background_loads:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await warm_answer_store.stop()
+    await prompt_cache.stop()
+    if reranker_warmup is not None:
+        await reranker_warmup
+    await vector_store.aclose()
 
 # Initialize FastAPI application
 app = FastAPI(
     title="LangChain Chatbot with Gemini 2.0 Flash",
     description="A chatbot API for Kostadin's personal website using LangChain and Gemini 2.0 Flash",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -22,6 +76,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser clients read the session ID of a /chat response
+    expose_headers=["X-Session-Id"],
 )
 
 # Health check endpoint
@@ -37,3 +93,5 @@ async def ping():
 
 # Include routers - keeping original path structure to match frontend
 app.include_router(chat.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
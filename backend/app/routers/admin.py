@@ -0,0 +1,39 @@
+"""
+Admin router for operational endpoints.
+"""
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+
+from app.config import settings
+from app.services.warm_answers import warm_answer_store
+
+router = APIRouter(prefix="/admin")
+
+def verify_admin_key(key: Optional[str]) -> None:
+    """
+    Check the admin key sent with a request.
+    
+    Args:
+        key: Value of the X-Admin-Key header.
+        
+    Raises:
+        HTTPException: If admin endpoints are disabled or the key is wrong.
+    """
+    if not settings.ADMIN_API_KEY or not key or not secrets.compare_digest(key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@router.post("/warm-answers/refresh", status_code=202)
+async def refresh_warm_answers(x_admin_key: Optional[str] = Header(default=None)):
+    """
+    Regenerate all precomputed answers for the canonical prompts in the background.
+    
+    Args:
+        x_admin_key: The admin key.
+        
+    Returns:
+        Dictionary confirming the refresh was scheduled.
+    """
+    verify_admin_key(x_admin_key)
+    warm_answer_store.trigger_refresh(force=True)
+    return {"status": "scheduled"}
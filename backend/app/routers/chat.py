@@ -1,17 +1,38 @@
 """
 Chat router for handling chat-related endpoints.
 """
-from typing import List
-from fastapi import APIRouter, HTTPException
+import asyncio
+import hashlib
+import json
+import time
+from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
+from langgraph.config import get_stream_writer
 from langgraph.graph import START, StateGraph
 from typing_extensions import TypedDict
-from langchain.schema import HumanMessage
+from langchain.schema import HumanMessage, SystemMessage
 
+from app.config import settings
+from app.services.admission import AdmissionRejected, Priority, Reservation, gemini_admission
+from app.services.context_packer import context_packer
+from app.services.disconnects import ClientDisconnected, disconnect_monitor
 from app.services.embeddings import embeddings_service
-from app.services.pinecone import pinecone_service
 from app.services.gemini import gemini_service
+from app.services.lexical_index import lexical_index, reciprocal_rank_fusion
+from app.services.metrics import metrics_service
+from app.services.prefetch import retrieval_prefetcher
+from app.services.reranker import reranker_service
+from app.services.retrieval_gate import retrieval_gate
+from app.services.semantic_cache import CacheEntry, semantic_cache
+from app.services.sessions import session_store
+from app.services.singleflight import single_flight
+from app.services.streaming import STREAM_MEDIA_TYPES, coalesce, encode, stream_event
+from app.services.suggestions import SUGGESTIONS_INSTRUCTION, SuggestionTrailer, parse_suggestions
+from app.services.vector_store import vector_store
+from app.services.warm_answers import WarmAnswer, WarmAnswerStore, warm_answer_store
 
 # Define models for conversation history
 class ChatMessage(BaseModel):
@@ -20,93 +41,619 @@ class ChatMessage(BaseModel):
     content: str
 
 class QueryHistory(BaseModel):
-    """Model for chat history."""
-    history: List[ChatMessage]
+    """
+    Model for chat history.
+    
+    Clients either send the whole ``history``, or use a session: send the
+    new user ``message`` with the ``session_id`` returned in the
+    ``X-Session-Id`` header of an earlier response. A ``message`` without a
+    ``session_id`` starts a session, seeded with ``history`` if given; with
+    sessions disabled, it is just the user turn following ``history``.
+    """
+    history: List[ChatMessage] = []
+    session_id: Optional[str] = None
+    message: Optional[str] = None
+    # /chat only: end the stream with a suggestions event instead of needing /suggest-followups
+    include_suggestions: bool = False
+    # /chat only: "sse" and "ndjson" frame the answer as typed events
+    stream_format: Literal["text", "sse", "ndjson"] = "text"
 
 # LangGraph state
 class State(TypedDict):
     """State for the LangGraph workflow."""
     history: List[dict]
+    bypass_cache: bool
+    priority: Priority
+    include_suggestions: bool
+    admission: Optional[Reservation]
+    deadline: float
+    question: str
+    query_embedding: List[float]
+    cache_namespace: str
+    cached_entry: Optional[CacheEntry]
+    matches: List[dict]
+    sources: Optional[List[str]]
     context: List[str]
     answer: str
+    suggestions: Optional[List[str]]
 
-def retrieve(state: State) -> dict:
+def current_user_message(history: List[dict]) -> Tuple[str, int]:
     """
-    Retrieve relevant context from Pinecone based on the current question.
+    Find the question the conversation is waiting on.
     
     Args:
-        state: Current state of the conversation.
+        history: The conversation history.
         
     Returns:
-        Dictionary containing the retrieved context.
+        The content of the last user message (or of the last message, if
+        that is empty) and the index of the last user message.
     """
-    # Get the current question from the history
-    current_question = None
-    for msg in reversed(state["history"]):
+    question = None
+    question_index = len(history) - 1
+    for index in range(len(history) - 1, -1, -1):
+        msg = history[index]
         if msg.get("role") == "user":
-            current_question = msg.get("content")
+            question = msg.get("content")
+            question_index = index
             break
-    if not current_question:
-        current_question = state["history"][-1].get("content", "")
+    if not question:
+        question = history[-1].get("content", "")
+    return question, question_index
+
+def route_at_start(state: State) -> str:
+    """Answer chit-chat directly, without embedding or retrieval."""
+    question, _ = current_user_message(state["history"])
+    return "generate" if retrieval_gate.is_chit_chat(question) else "embed"
+
+async def embed(state: State) -> dict:
+    """
+    Embed the current question and look it up in the semantic cache.
+    
+    Args:
+        state: Current state of the conversation.
+        
+    Returns:
+        Dictionary containing the retrieval deadline, the question, its
+        embedding, the cache namespace and the cache entry, if any.
+    """
+    deadline = time.monotonic() + settings.RETRIEVAL_BUDGET_MS / 1000
+    current_question, question_index = current_user_message(state["history"])
+    
+    start = time.perf_counter()
+    query_embedding = await embeddings_service.aembed_query(current_question)
+    retrieval_gate.record_stage("embed", (time.perf_counter() - start) * 1000)
+    cache_namespace = semantic_cache.namespace(state["history"][:question_index])
+    cached_entry = None
+    if settings.SEMANTIC_CACHE_ENABLED and not state.get("bypass_cache"):
+        cached_entry = semantic_cache.lookup(cache_namespace, query_embedding)
+    return {
+        "deadline": deadline,
+        "question": current_question,
+        "query_embedding": query_embedding,
+        "cache_namespace": cache_namespace,
+        "cached_entry": cached_entry
+    }
+
+def route_after_embed(state: State) -> str:
+    """
+    Skip retrieval and generation when the semantic cache has an answer, and
+    skip retrieval when the bio in the system prompt answers the question.
+    """
+    if state.get("cached_entry"):
+        return "respond_cached"
+    return "retrieve" if retrieval_gate.needs_retrieval(state["query_embedding"]) else "generate"
+
+async def respond_cached(state: State) -> dict:
+    """
+    Stream a cached answer through the same path as generated tokens.
+    
+    The sources event and, when the request asks for suggestions, the
+    suggestions event are written as ``rerank`` and ``generate`` wrote them
+    for the cached answer, if they did.
+    
+    Args:
+        state: Current state of the conversation.
+        
+    Returns:
+        Dictionary containing the cached answer and suggestions, if any.
+    """
+    writer = get_stream_writer()
+    entry = state["cached_entry"]
+    if state.get("admission") is not None:
+        # No Gemini call follows
+        state["admission"].cancel()
+    if entry.sources is not None:
+        writer(stream_event("sources", sources=entry.sources))
+    for line in entry.answer.splitlines(keepends=True):
+        writer(line)
+    suggestions = None
+    if state.get("include_suggestions") and entry.suggestions is not None:
+        suggestions = entry.suggestions
+        writer(stream_event("suggestions", suggestions=suggestions))
+        schedule_prefetch(suggestions)
+    return {"answer": entry.answer, "suggestions": suggestions}
+
+def context_pool_size() -> int:
+    """Number of matches handed to context building: the packer picks from ``CONTEXT_CANDIDATES``."""
+    return settings.CONTEXT_CANDIDATES if settings.CONTEXT_PACKING_ENABLED else settings.TOP_K
+
+async def retrieve_matches(question: str, query_embedding: List[float]) -> List[dict]:
+    """
+    Retrieve candidate chunks from the vector store for a question.
+    
+    With hybrid retrieval, BM25 matches from the lexical index are fused with
+    the dense matches by reciprocal rank fusion. Both lookups run
+    concurrently, so the lexical side adds no wall-clock time. More
+    candidates than ``TOP_K`` are fetched when reranking or context packing
+    is enabled, for them to choose from.
+    
+    Args:
+        question: The question text.
+        query_embedding: Embedding of the question.
+        
+    Returns:
+        The candidate matches, best first.
+    """
+    candidates = context_pool_size()
+    if reranker_service.enabled:
+        candidates = max(settings.RERANK_CANDIDATES, candidates)
+    # Context packing uses the vectors for MMR
+    include_values = settings.CONTEXT_PACKING_ENABLED
+    if settings.HYBRID_RETRIEVAL_ENABLED and len(lexical_index):
+        per_retriever = max(candidates, settings.HYBRID_CANDIDATES)
+        dense_result, lexical_result = await asyncio.gather(
+            vector_store.aquery(vector=query_embedding, top_k=per_retriever, include_values=include_values),
+            asyncio.to_thread(lexical_index.search, question, per_retriever)
+        )
+        query_result = reciprocal_rank_fusion([dense_result, lexical_result], top_k=candidates)
+    else:
+        query_result = await vector_store.aquery(
+            vector=query_embedding,
+            top_k=candidates,
+            include_values=include_values
+        )
+    return list(query_result.get("matches", []))
 
-    # Generate embeddings and query Pinecone
-    query_embedding = embeddings_service.embed_query(current_question)
-    query_result = pinecone_service.query(vector=query_embedding)
-    context = pinecone_service.get_context(query_result)
-    return {"context": [context]}
+async def prefetch_matches(question: str) -> List[dict]:
+    """
+    Embed a likely next question and retrieve its candidate chunks.
+    
+    Args:
+        question: A suggested follow-up question.
+        
+    Returns:
+        The candidate matches, best first.
+    """
+    query_embedding = await embeddings_service.aembed_query(question)
+    return await retrieve_matches(question, query_embedding)
 
-def generate(state: State) -> dict:
+def schedule_prefetch(suggestions: List[str]) -> None:
+    """
+    Retrieve for follow-up suggestions in the background.
+    
+    Users often click a suggestion next, so its matches are ready by then.
+    
+    Args:
+        suggestions: The suggested follow-up questions.
+    """
+    retrieval_prefetcher.schedule(suggestions, prefetch_matches)
+
+async def retrieve(state: State) -> dict:
+    """
+    Retrieve candidate chunks based on the current question.
+    
+    Matches prefetched for a clicked follow-up suggestion are used as they are.
+    
+    Args:
+        state: Current state of the conversation.
+        
+    Returns:
+        Dictionary containing the candidate matches.
+    """
+    matches = retrieval_prefetcher.get(state["question"])
+    if matches is None:
+        start = time.perf_counter()
+        matches = await retrieve_matches(state["question"], state["query_embedding"])
+        retrieval_gate.record_stage("retrieve", (time.perf_counter() - start) * 1000)
+    return {"matches": matches}
+
+async def rerank(state: State) -> dict:
+    """
+    Keep the best candidates and pack the context from them.
+    
+    Candidates are reranked by the cross-encoder when it is enabled and fits
+    in what is left of the retrieval budget; otherwise they are kept in
+    retrieval order. With context packing, up to ``CONTEXT_CANDIDATES``
+    matches are kept and the packer fills the token budget from them, so
+    chunks it drops as duplicates are replaced; otherwise ``TOP_K`` (or
+    ``RERANK_TOP_N`` reranked) matches are kept. The sources of the matches
+    that made it into the context are written to the graph's custom stream
+    as a sources event.
+    
+    Args:
+        state: Current state of the conversation.
+        
+    Returns:
+        Dictionary containing the kept matches, their sources and the context
+        built from them.
+    """
+    start = time.perf_counter()
+    matches = state["matches"]
+    if reranker_service.enabled:
+        top_n = settings.CONTEXT_CANDIDATES if settings.CONTEXT_PACKING_ENABLED else settings.RERANK_TOP_N
+        matches = await reranker_service.arerank(state["question"], matches, deadline=state["deadline"], top_n=top_n)
+    else:
+        matches = matches[:context_pool_size()]
+    if settings.CONTEXT_PACKING_ENABLED:
+        passages = context_packer.select(matches, state.get("query_embedding"))
+        context = "\n\n".join(passage.text for passage in passages)
+        cited = [passage.match for passage in passages]
+    else:
+        context = vector_store.get_context({"matches": matches})
+        cited = matches
+    retrieval_gate.record_stage("rerank", (time.perf_counter() - start) * 1000)
+    sources = []
+    for match in cited:
+        source = (match.get("metadata") or {}).get("source")
+        if source and source not in sources:
+            sources.append(source)
+    get_stream_writer()(stream_event("sources", sources=sources))
+    return {"matches": matches, "sources": sources, "context": [context]}
+
+async def generate(state: State) -> dict:
     """
     Generate a response using the Gemini model.
     
+    Tokens are forwarded to the graph's custom stream as Gemini produces them,
+    and the completed answer is added to the semantic cache with its sources
+    and suggestions. When the request asks for suggestions, the same call
+    writes follow-up questions after the answer; they are cut from the token
+    stream and written as a final suggestions event.
+    
     Args:
         state: Current state of the conversation.
         
     Returns:
-        Dictionary containing the generated answer.
+        Dictionary containing the generated answer and suggestions, if any.
     """
-    context = state["context"][0] if state["context"] else ""
-    messages = gemini_service.create_messages(state["history"], context)
-    answer = gemini_service.generate_response(messages)
-    return {"answer": answer}
+    writer = get_stream_writer()
+    context = state["context"][0] if state.get("context") else ""
+    messages = gemini_service.create_messages(state["history"], context, state.get("query_embedding"))
+    trailer = None
+    if state.get("include_suggestions"):
+        messages.append(SystemMessage(content=SUGGESTIONS_INSTRUCTION))
+        trailer = SuggestionTrailer()
+    tokens = []
+    token_stream = gemini_service.stream_response(
+        messages,
+        state.get("priority", Priority.CHAT),
+        reservation=state.get("admission")
+    )
+    async for token in token_stream:
+        if trailer is not None:
+            token = trailer.feed(token)
+            if not token:
+                continue
+        writer(token)
+        tokens.append(token)
+    suggestions = None
+    if trailer is not None:
+        rest, suggestions_text = trailer.finish()
+        if rest:
+            writer(rest)
+            tokens.append(rest)
+        if suggestions_text is not None:
+            suggestions = parse_suggestions(suggestions_text, state["history"])
+            writer(stream_event("suggestions", suggestions=suggestions))
+            schedule_prefetch(suggestions)
+    answer = "".join(tokens)
+    if trailer is not None:
+        answer = answer.rstrip()
+    # Chit-chat skips embedding and is not cached
+    if settings.SEMANTIC_CACHE_ENABLED and state.get("query_embedding") is not None:
+        semantic_cache.store(
+            state["cache_namespace"],
+            state["query_embedding"],
+            answer,
+            sources=state.get("sources"),
+            suggestions=suggestions
+        )
+    return {"answer": answer, "suggestions": suggestions}
 
 # Set up the LangGraph workflow
-graph_builder = StateGraph(State).add_sequence([retrieve, generate])
-graph_builder.add_edge(START, "retrieve")
+graph_builder = StateGraph(State)
+graph_builder.add_node("embed", embed)
+graph_builder.add_node("respond_cached", respond_cached)
+graph_builder.add_node("retrieve", retrieve)
+graph_builder.add_node("rerank", rerank)
+graph_builder.add_node("generate", generate)
+graph_builder.add_conditional_edges(START, route_at_start, ["embed", "generate"])
+graph_builder.add_conditional_edges("embed", route_after_embed, ["respond_cached", "retrieve", "generate"])
+graph_builder.add_edge("retrieve", "rerank")
+graph_builder.add_edge("rerank", "generate")
 graph = graph_builder.compile()
 
 router = APIRouter()
 
+def resolve_history(query: QueryHistory, create_session: bool = False) -> Tuple[List[dict], Optional[str]]:
+    """
+    Get the conversation a request refers to.
+    
+    With ``create_session``, a ``message`` without a ``session_id`` starts a
+    new session seeded with ``history``; the new message is not recorded,
+    so that it is only added to the session together with its answer.
+    Otherwise such a message is just the turn following ``history``.
+    
+    Args:
+        query: The request body.
+        create_session: Whether the request may start a session (only /chat).
+        
+    Returns:
+        The conversation including the new message, and the session ID, if
+        the request uses a session.
+        
+    Raises:
+        HTTPException: If the request has neither history nor message, a
+            session is given while sessions are disabled or the session is
+            unknown or has expired.
+    """
+    new_messages = [{"role": "user", "content": query.message}] if query.message is not None else []
+    if query.session_id is None and (query.message is None or not create_session or not settings.SESSIONS_ENABLED):
+        history = [msg.dict() for msg in query.history] + new_messages
+        if not history:
+            raise HTTPException(status_code=422, detail="Either history or message is required")
+        return history, None
+    if not settings.SESSIONS_ENABLED:
+        raise HTTPException(status_code=400, detail="Sessions are disabled")
+    if query.session_id is None:
+        history = [msg.dict() for msg in query.history]
+        return history + new_messages, session_store.create(history)
+    history = session_store.get(query.session_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return history + new_messages, query.session_id
+
+def history_key(history: List[dict], include_suggestions: bool = False) -> str:
+    """
+    Hash a conversation for coalescing identical in-flight requests.
+    
+    Message contents are normalized like warm-answer prompts, so requests
+    that differ only in case, whitespace or trailing punctuation share a key.
+    
+    Args:
+        history: The conversation history.
+        include_suggestions: Whether the response ends with a suggestions event.
+        
+    Returns:
+        Hex digest identifying the conversation.
+    """
+    normalized = [[msg.get("role"), WarmAnswerStore.normalize(msg.get("content") or "")] for msg in history]
+    return hashlib.sha256(json.dumps([include_suggestions, normalized]).encode()).hexdigest()
+
+# Follow-up suggestions get their own concurrency limit so a burst of them
+# can never crowd out the streaming chats served by the same process.
+followup_semaphore = asyncio.Semaphore(settings.FOLLOWUP_MAX_CONCURRENCY)
+
 @router.post("/chat")
-async def chat(query: QueryHistory):
+async def chat(query: QueryHistory, request: Request):
     """
     Handle chat requests and stream responses.
     
+    The ``stream_format`` of the request selects the framing:
+    
+    - ``text`` (default): the answer as plain text. With
+      ``include_suggestions``, it is followed by a record separator
+      (``\\x1e``) and a JSON object with the follow-up suggestions, when the
+      answer was generated or precomputed with them.
+    - ``sse`` (server-sent events) and ``ndjson`` (one JSON object per line,
+      with the event type in ``event``): ``token`` events with the answer
+      ``text``, a ``sources`` event when context was retrieved, a
+      ``suggestions`` event, a ``timing`` event and a final ``done`` event.
+      A failure mid-stream ends it with an ``error`` event instead of
+      ``done``, so a truncated answer is never mistaken for a complete one.
+      
+    Answer text is coalesced into writes of up to ``STREAM_FLUSH_BYTES``
+    bytes, held back at most ``STREAM_FLUSH_INTERVAL_MS``.
+    
+    Requests that will run the pipeline reserve a Gemini admission slot
+    before the response starts, so an overloaded process answers 503 with
+    ``Retry-After`` instead of cutting a stream short. The generation call
+    uses the reserved slot; requests that end without one free it.
+    
+    In session mode, the message and its answer are added to the session
+    once the answer has been streamed completely, so a failed or abandoned
+    request leaves the session as it was. The session ID is returned in
+    ``X-Session-Id``.
+    
+    With ``CANCEL_ON_DISCONNECT``, a client that disconnects cancels the
+    pipeline run, unless coalesced requests are still streaming it.
+    
     Args:
         query: The chat history and current query.
+        request: The HTTP request, watched for the client disconnecting.
         
     Returns:
         StreamingResponse with the generated response.
     """
     try:
+        history, session_id = resolve_history(query, create_session=True)
+        headers = {"X-Session-Id": session_id} if session_id else {}
+        stream_format = query.stream_format
+        if stream_format == "sse":
+            # Keeps proxies from buffering the events
+            headers.update({"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        include_suggestions = query.include_suggestions and settings.COMBINED_SUGGESTIONS_ENABLED
+        warm_answer = warm_answer_store.get(history)
+        key = history_key(history, include_suggestions)
+        reservation = None
+        if warm_answer is None and not (settings.SINGLEFLIGHT_ENABLED and single_flight.in_flight(key)):
+            try:
+                reservation = await gemini_admission.reserve(Priority.CHAT)
+            except AdmissionRejected:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many concurrent chats, retry later",
+                    headers={"Retry-After": str(settings.GEMINI_RETRY_AFTER)}
+                )
+        
+        async def warm_items():
+            for line in warm_answer.answer.splitlines(keepends=True):
+                yield line
+            if include_suggestions:
+                yield stream_event("suggestions", suggestions=warm_answer.suggestions)
+        
+        async def upstream():
+            state_input = {"history": history, "include_suggestions": include_suggestions, "admission": reservation}
+            produced = []
+            try:
+                async for item in graph.astream(state_input, stream_mode="custom"):
+                    if isinstance(item, str):
+                        produced.append(item)
+                    yield item
+            except (asyncio.CancelledError, GeneratorExit):
+                disconnect_monitor.record_cancelled("".join(produced))
+                raise
+            disconnect_monitor.record_completed("".join(produced))
+        
         async def token_generator():
-            state_input = {"history": [msg.dict() for msg in query.history]}
+            if warm_answer is not None:
+                items = warm_items()
+            elif settings.SINGLEFLIGHT_ENABLED:
+                # Identical concurrent requests share one pipeline run
+                if reservation is not None and single_flight.in_flight(key):
+                    # The run being joined holds its own slot
+                    reservation.cancel()
+                items = single_flight.stream(key, upstream)
+            else:
+                items = upstream()
+            items = coalesce(items, settings.STREAM_FLUSH_INTERVAL_MS / 1000, settings.STREAM_FLUSH_BYTES)
+            if settings.CANCEL_ON_DISCONNECT:
+                items = disconnect_monitor.guard(items, request.receive)
+            start = time.perf_counter()
+            first_token_ms = None
+            answer = []
             try:
-                async for chunk in graph.astream(state_input, stream_mode="messages"):
-                    yield chunk[0].content
-            except Exception as stream_exc:
+                async for item in items:
+                    if isinstance(item, str):
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - start) * 1000
+                            metrics_service.observe("chat.time_to_first_token_ms", first_token_ms)
+                        answer.append(item)
+                    chunk = encode(item, stream_format)
+                    if chunk:
+                        yield chunk
+            except (ClientDisconnected, asyncio.CancelledError) as e:
+                # Nobody is left to read the rest, or to append it to the session
+                metrics_service.increment("disconnects.requests")
+                if isinstance(e, ClientDisconnected):
+                    return
                 raise
-        response = StreamingResponse(token_generator(), media_type="text/plain")
+            except Exception as e:
+                if stream_format == "text":
+                    raise
+                metrics_service.increment("chat.stream_errors")
+                yield encode(stream_event("error", message=str(e)), stream_format)
+                return
+            finally:
+                if reservation is not None:
+                    reservation.cancel()
+            if session_id:
+                turn = [{"role": "user", "content": query.message}] if query.message is not None else []
+                session_store.append(session_id, turn + [{"role": "assistant", "content": "".join(answer)}])
+            if stream_format != "text":
+                total_ms = (time.perf_counter() - start) * 1000
+                yield encode(
+                    stream_event("timing", time_to_first_token_ms=first_token_ms, total_ms=total_ms),
+                    stream_format
+                )
+                yield encode(stream_event("done"), stream_format)
+        response = StreamingResponse(
+            token_generator(),
+            media_type=STREAM_MEDIA_TYPES[stream_format],
+            headers=headers,
+            # Frees the slot even if the stream never started
+            background=BackgroundTask(reservation.cancel) if reservation is not None else None
+        )
         return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/suggest-followups")
-async def suggest_followups(query: QueryHistory):
+async def generate_followups(history: List[dict], priority: Priority = Priority.FOLLOWUP) -> List[str]:
     """
     Generate follow-up question suggestions focused on technical terms, unique terminology, 
     and unique aspects about Kostadin, avoiding previously asked questions.
     
+    Args:
+        history: The chat history.
+        priority: Priority class of the Gemini call.
+        
+    Returns:
+        Suggested follow-up questions, or empty list if no good follow-ups.
+    """
+    messages = gemini_service.create_messages(history)
+    messages.append(HumanMessage(
+        content="Based on the conversation, suggest 1-2 NEW follow-up questions on the previous answerthat either: "
+        "1) Ask for clarification about technical terms, key concepts, or unique terminology mentioned, or "
+        "2) Explore unique aspects about Kostadin's background, experience, or preferences. "
+        "Look for domain-specific terms, acronyms, or specialized vocabulary that might need explanation. "
+        "IMPORTANT: Do not suggest questions that have already been asked in the conversation. "
+        "Keep questions under 5 words each. If there are no new technical terms, unique terminology, or "
+        "unique aspects to explore, respond with 'NO_FOLLOWUP'. Answer in a simple string. "
+        "Be specific and avoid generic questions."
+    ))
+    # Suggestions are optional, so give up rather than queue behind a burst.
+    # Unlike wait_for, a timeout scope cancels the acquire in place, so a
+    # permit granted as the timeout fires is handed back, never leaked.
+    try:
+        async with asyncio.timeout(settings.FOLLOWUP_QUEUE_TIMEOUT):
+            await followup_semaphore.acquire()
+    except TimeoutError:
+        return []
+    try:
+        response = await gemini_service.agenerate_response(
+            messages,
+            priority=priority,
+            queue_timeout=settings.FOLLOWUP_QUEUE_TIMEOUT
+        )
+    except AdmissionRejected:
+        return []
+    finally:
+        followup_semaphore.release()
+    
+    return parse_suggestions(response, history)
+
+async def produce_warm_answer(prompt: str) -> WarmAnswer:
+    """
+    Run the full pipeline for a canonical prompt.
+    
+    Args:
+        prompt: The canonical prompt.
+        
+    Returns:
+        The answer, retrieved context and follow-up suggestions for the prompt.
+    """
+    history = [{"role": "user", "content": prompt}]
+    result = await graph.ainvoke({"history": history, "bypass_cache": True, "priority": Priority.BACKGROUND})
+    suggestions = await generate_followups(
+        history + [{"role": "assistant", "content": result["answer"]}],
+        priority=Priority.BACKGROUND
+    )
+    return WarmAnswer(
+        prompt=prompt,
+        answer=result["answer"],
+        context=result.get("context", []),
+        suggestions=suggestions
+    )
+
+@router.post("/suggest-followups")
+async def suggest_followups(query: QueryHistory):
+    """
+    Generate follow-up question suggestions for the conversation.
+    
+    In session mode, the suggestions are for the session's conversation.
+    
     Args:
         query: The chat history.
         
@@ -114,45 +661,18 @@ async def suggest_followups(query: QueryHistory):
         Dictionary containing suggested follow-up questions, or empty list if no good follow-ups.
     """
     try:
-        # Extract previous questions to avoid repetition
-        previous_questions = [
-            msg.content.lower().strip() 
-            for msg in query.history 
-            if msg.role == "user"
-        ]
-        
-        messages = gemini_service.create_messages(
-            [msg.dict() for msg in query.history]
-        )
-        messages.append(HumanMessage(
-            content="Based on the conversation, suggest 1-2 NEW follow-up questions on the previous answerthat either: "
-            "1) Ask for clarification about technical terms, key concepts, or unique terminology mentioned, or "
-            "2) Explore unique aspects about Kostadin's background, experience, or preferences. "
-            "Look for domain-specific terms, acronyms, or specialized vocabulary that might need explanation. "
-            "IMPORTANT: Do not suggest questions that have already been asked in the conversation. "
-            "Keep questions under 5 words each. If there are no new technical terms, unique terminology, or "
-            "unique aspects to explore, respond with 'NO_FOLLOWUP'. Answer in a simple string. "
-            "Be specific and avoid generic questions."
-        ))
-        response = gemini_service.generate_response(messages)
-        
-        if "NO_FOLLOWUP" in response.upper():
-            return {"suggestions": []}
-            
-        suggestions = [s.strip() for s in response.strip().split("\n") if s.strip()][:2]
-        cleaned = [s.lstrip("1234567890.-) ").strip() for s in suggestions if s.strip()]
-        
-        # Filter out suggestions that are too similar to previous questions
-        filtered_suggestions = []
-        for suggestion in cleaned:
-            suggestion_lower = suggestion.lower()
-            # Check if this suggestion is too similar to any previous question
-            if not any(
-                suggestion_lower in prev_q or prev_q in suggestion_lower 
-                for prev_q in previous_questions
-            ):
-                filtered_suggestions.append(suggestion)
-        
-        return {"suggestions": filtered_suggestions}
+        history, _ = resolve_history(query)
+        # The first answer to a canonical prompt has precomputed suggestions
+        warm_answer = None
+        if len(history) == 2 and history[1].get("role") == "assistant":
+            warm_answer = warm_answer_store.get(history[:1])
+        if warm_answer is not None:
+            suggestions = warm_answer.suggestions
+        else:
+            suggestions = await generate_followups(history)
+        schedule_prefetch(suggestions)
+        return {"suggestions": suggestions}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
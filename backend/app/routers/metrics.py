@@ -0,0 +1,18 @@
+"""
+Metrics router exposing in-process application metrics.
+"""
+from fastapi import APIRouter
+
+from app.services.metrics import metrics_service
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Return a snapshot of the application metrics.
+    
+    Returns:
+        Dictionary with counters, gauges and latency distributions.
+    """
+    return metrics_service.snapshot()
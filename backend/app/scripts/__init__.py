@@ -0,0 +1,3 @@
+"""
+This file makes the scripts directory a Python package.
+"""
@@ -0,0 +1,79 @@
+"""
+Approximate nearest-neighbour benchmark for the local vector backend.
+
+Builds IVF-flat indexes over synthetic clustered unit vectors of increasing
+size and sweeps ``nprobe``, reporting build time, p50/p99 query latency and
+recall@k against exact brute-force search. Runs entirely offline.
+
+Usage (from the backend directory):
+    python -m app.scripts.benchmark_ann --sizes 10000 100000 1000000 --nprobe 1 4 8 16 32
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.services.ann import IVFFlatIndex
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=settings.TOP_K)
+    parser.add_argument("--dimension", type=int, default=settings.EMBEDDING_DIMENSION)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+def synthetic_corpus(size: int, dimension: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors drawn around random topic centres, like chunk embeddings."""
+    topics = normalize(rng.standard_normal((max(1, size // 200), dimension), dtype=np.float32))
+    vectors = np.empty((size, dimension), dtype=np.float32)
+    for start in range(0, size, 100_000):
+        end = min(size, start + 100_000)
+        members = topics[rng.integers(len(topics), size=end - start)]
+        vectors[start:end] = normalize(members + 1.0 * rng.standard_normal((end - start, dimension), dtype=np.float32) / np.sqrt(dimension))
+    return vectors
+
+def percentiles(latencies) -> str:
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return f"{p50:>9.3f} {p99:>9.3f}"
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    print(f"{'size':>9} {'method':>12} {'p50 (ms)':>9} {'p99 (ms)':>9} {'recall@' + str(args.top_k):>9}")
+    for size in args.sizes:
+        corpus = synthetic_corpus(size, args.dimension, rng)
+        rows = rng.choice(size, size=args.queries, replace=False)
+        queries = normalize(corpus[rows] + 0.05 * rng.standard_normal((args.queries, args.dimension), dtype=np.float32))
+
+        exact_ids, exact_ms = [], []
+        for query in queries:
+            start = time.perf_counter()
+            scores = corpus @ query
+            top = np.argpartition(-scores, args.top_k - 1)[:args.top_k]
+            exact_ms.append((time.perf_counter() - start) * 1000)
+            exact_ids.append(set(top.tolist()))
+        print(f"{size:>9} {'exact':>12} {percentiles(exact_ms)} {1.0:>9.3f}")
+
+        start = time.perf_counter()
+        index = IVFFlatIndex.train(corpus, seed=args.seed)
+        index.add(corpus, np.arange(size))
+        print(f"{size:>9} {'ivf build':>12} {'':>9} {'':>9} {'':>9}  {time.perf_counter() - start:.1f}s, {index.n_lists} lists")
+
+        for nprobe in args.nprobe:
+            latencies, recalls = [], []
+            for query, truth in zip(queries, exact_ids):
+                start = time.perf_counter()
+                ids, _ = index.search(query, args.top_k, nprobe=nprobe)
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len(truth & set(ids.tolist())) / args.top_k)
+            print(f"{size:>9} {'ivf np=' + str(nprobe):>12} {percentiles(latencies)} {np.mean(recalls):>9.3f}")
+
+if __name__ == "__main__":
+    main()
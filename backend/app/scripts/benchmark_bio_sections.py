@@ -0,0 +1,89 @@
+"""
+Offline benchmark of sending only the relevant bio sections with each request.
+
+Runs the chat graph against the stand-in Gemini model twice: once with the
+full ``SYSTEM_PROMPT`` and once with ``BIO_SECTIONING_ENABLED``, where the
+system prompt carries the core bio plus the ``BIO_SECTION_TOP_K`` sections
+closest to the question. Reports input tokens per request and the simulated
+end-to-end latency, where every input token pays prefill. The stand-in
+embeddings are not semantic, so which sections are picked is arbitrary here;
+their number and size are what the benchmark measures.
+
+Usage (from the backend directory):
+    python -m app.scripts.benchmark_bio_sections --requests 50 --prefill-ms-per-1k 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from app.scripts import standins
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=20.0,
+                        help="Simulated prefill latency per 1k input tokens")
+    parser.add_argument("--top-k", type=int, default=None,
+                        help="Bio sections selected per question (default: BIO_SECTION_TOP_K)")
+    return parser.parse_args()
+
+async def run_phase(requests: int) -> dict:
+    from app.routers import chat
+
+    start_usage = (standins.usage.requests, standins.usage.input_tokens)
+    latencies = []
+    for i in range(requests):
+        history = [{"role": "user", "content": f"Tell me about project number {i}"}]
+        start = time.perf_counter()
+        async for _ in chat.graph.astream({"history": history, "bypass_cache": True}, stream_mode="custom"):
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+    calls = standins.usage.requests - start_usage[0]
+    return {
+        "calls": calls,
+        "input_tokens_per_call": (standins.usage.input_tokens - start_usage[1]) / calls,
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99))
+    }
+
+async def main():
+    args = parse_args()
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+    os.environ["WARM_ANSWERS_ENABLED"] = "false"
+    os.environ["PROMPT_CACHE_ENABLED"] = "false"
+    standins.install(embed_ms=1, query_ms=1, first_token_ms=50, token_ms=2, tokens=20,
+                     prefill_ms_per_1k_tokens=args.prefill_ms_per_1k)
+
+    from app.config import settings
+    from app.services.bio_sections import bio_sections
+    from app.services.metrics import metrics_service
+
+    if args.top_k is not None:
+        settings.BIO_SECTION_TOP_K = args.top_k
+
+    settings.BIO_SECTIONING_ENABLED = False
+    full = await run_phase(args.requests)
+
+    settings.BIO_SECTIONING_ENABLED = True
+    await bio_sections.load()
+    sectioned = await run_phase(args.requests)
+
+    prompt_tokens = metrics_service.snapshot()["distributions"].get("bio.prompt_tokens", {})
+    print(
+        f"bio: {len(bio_sections.sections)} sections, {settings.BIO_CORE_SECTIONS} core "
+        f"+ {settings.BIO_SECTION_TOP_K} selected per question"
+    )
+    print(f"{'mode':<14}{'calls':>7}{'input tok/call':>16}{'e2e p50 ms':>12}{'e2e p99 ms':>12}")
+    for name, phase in (("full bio", full), ("bio sections", sectioned)):
+        print(
+            f"{name:<14}{phase['calls']:>7}{phase['input_tokens_per_call']:>16,.0f}"
+            f"{phase['p50']:>12.1f}{phase['p99']:>12.1f}"
+        )
+    reduction = 1 - sectioned["input_tokens_per_call"] / full["input_tokens_per_call"]
+    print(f"input token reduction: {reduction:.1%} (system prompt p50 ~{prompt_tokens.get('p50', 0):,.0f} tokens)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
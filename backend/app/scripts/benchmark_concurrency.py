@@ -0,0 +1,91 @@
+"""
+Concurrency benchmark for the /chat endpoint.
+
+Runs the real FastAPI app, router and LangGraph pipeline in-process against
+the local backend stand-ins from ``app.scripts.standins`` and fires batches of
+simultaneous chats at it, reporting per-request latency and throughput.
+
+Chats beyond ``GEMINI_MAX_CONCURRENCY`` running and ``GEMINI_MAX_QUEUE``
+waiting (64 and 512 by default), or waiting longer than
+``GEMINI_QUEUE_TIMEOUT``, are answered 503 by the admission controller. They
+are counted in the ``rejected`` column and left out of latency and
+throughput. Pass ``--gemini-max-concurrency`` (at least the highest
+concurrency) to admit every chat and measure the pipeline itself.
+
+Usage (from the backend directory):
+    python -m app.scripts.benchmark_concurrency --concurrency 1 10 100 500
+    python -m app.scripts.benchmark_concurrency --concurrency 500 --gemini-max-concurrency 500
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+from app.scripts import standins
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--embed-ms", type=float, default=40.0)
+    parser.add_argument("--query-ms", type=float, default=60.0)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--token-ms", type=float, default=15.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--gemini-max-concurrency", type=int, help="Override GEMINI_MAX_CONCURRENCY")
+    parser.add_argument("--gemini-max-queue", type=int, help="Override GEMINI_MAX_QUEUE")
+    return parser.parse_args()
+
+async def one_chat(client, question: str) -> Optional[float]:
+    """Run one chat, returning its latency, or None if admission control rejected it."""
+    start = time.perf_counter()
+    async with client.stream("POST", "/chat", json={"history": [{"role": "user", "content": question}]}) as response:
+        if response.status_code == 503:
+            return None
+        response.raise_for_status()
+        async for _ in response.aiter_bytes():
+            pass
+    return time.perf_counter() - start
+
+async def run(args: argparse.Namespace) -> None:
+    import httpx
+    from app.main import app
+
+    ideal = (args.embed_ms + args.query_ms + args.first_token_ms + args.token_ms * args.tokens) / 1000
+    print(f"Single-request lower bound: {ideal * 1000:.0f} ms")
+    print(f"{'concurrency':>11} {'wall (s)':>9} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'rejected':>9}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(
+                one_chat(client, f"Question number {i}?") for i in range(concurrency)
+            ))
+            wall = time.perf_counter() - start
+            completed = [latency for latency in latencies if latency is not None]
+            rejected = (concurrency - len(completed)) / concurrency
+            p50, p99 = np.percentile(completed, [50, 99]) * 1000 if completed else (float("nan"),) * 2
+            print(
+                f"{concurrency:>11} {wall:>9.2f} {len(completed) / wall:>8.1f} {p50:>9.0f} {p99:>9.0f} {rejected:>9.1%}"
+            )
+
+def main():
+    args = parse_args()
+    if args.gemini_max_concurrency is not None:
+        os.environ["GEMINI_MAX_CONCURRENCY"] = str(args.gemini_max_concurrency)
+    if args.gemini_max_queue is not None:
+        os.environ["GEMINI_MAX_QUEUE"] = str(args.gemini_max_queue)
+    standins.install(
+        embed_ms=args.embed_ms,
+        query_ms=args.query_ms,
+        first_token_ms=args.first_token_ms,
+        token_ms=args.token_ms,
+        tokens=args.tokens
+    )
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
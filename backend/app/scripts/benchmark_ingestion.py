@@ -0,0 +1,86 @@
+"""
+Offline ingestion benchmark against the in-memory vector store.
+
+Splits synthetic documents with the website loader's splitter, embeds them
+with the local stand-in embeddings and upserts them through the shared
+``VectorStore`` interface (``VECTOR_BACKEND=memory``) and the BM25 index,
+then measures dense and lexical query latency. No network access or API
+keys are needed.
+
+Usage (from the backend directory):
+    python -m app.scripts.benchmark_ingestion --documents 500 --paragraphs 20
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.scripts import standins
+
+WORDS = (
+    "kostadin gonext recursive qa emf ellipse deep gestures language model retrieval "
+    "embedding vector pinecone gemini interface speech vision league legends analytics "
+    "transformer attention dataset training evaluation latency streaming frontend backend"
+).split()
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+def synthetic_document(rng: np.random.Generator, paragraphs: int) -> str:
+    return "\n\n".join(
+        " ".join(rng.choice(WORDS, size=int(rng.integers(30, 90)))) + "."
+        for _ in range(paragraphs)
+    )
+
+def main():
+    args = parse_args()
+    os.environ["VECTOR_BACKEND"] = "memory"
+    os.environ["LEXICAL_INDEX_PATH"] = ""
+    standins.install()
+    
+    from app.ingestion import load_website
+    from app.services.embeddings import embeddings_service
+    from app.services.lexical_index import lexical_index
+    from app.services.vector_store import vector_store
+    
+    rng = np.random.default_rng(args.seed)
+    documents = [synthetic_document(rng, args.paragraphs) for _ in range(args.documents)]
+    
+    start = time.perf_counter()
+    chunks = []
+    for i, text in enumerate(documents):
+        chunks.extend(load_website.split_into_chunks(text, source_url=f"https://example.com/{i}"))
+    split_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    load_website.embed_and_upload(chunks)
+    upload_s = time.perf_counter() - start
+    
+    standins.latency.embed_ms = 0
+    latencies, lexical_latencies = [], []
+    for i in range(args.queries):
+        question = " ".join(rng.choice(WORDS, size=4))
+        vector = embeddings_service.embed_query(question)
+        query_start = time.perf_counter()
+        vector_store.query(vector)
+        latencies.append((time.perf_counter() - query_start) * 1000)
+        query_start = time.perf_counter()
+        lexical_index.search(question)
+        lexical_latencies.append((time.perf_counter() - query_start) * 1000)
+    
+    p50, p99 = np.percentile(latencies, [50, 99])
+    lexical_p50, lexical_p99 = np.percentile(lexical_latencies, [50, 99])
+    print(f"documents: {len(documents)}, chunks: {len(chunks)}, store: {vector_store.namespace_stats()}")
+    print(f"split:          {split_s:.2f}s ({len(chunks) / split_s:,.0f} chunks/s)")
+    print(f"embed + upsert: {upload_s:.2f}s ({len(chunks) / upload_s:,.0f} chunks/s, including the BM25 index)")
+    print(f"dense query:    p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+    print(f"BM25 query:     p50 {lexical_p50:.3f} ms, p99 {lexical_p99:.3f} ms")
+
+if __name__ == "__main__":
+    main()
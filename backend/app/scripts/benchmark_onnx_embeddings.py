@@ -0,0 +1,126 @@
+"""
+Latency, throughput and fidelity of the query-embedding backends.
+
+Embeds sample questions and bio paragraphs with the fp32 sentence-transformers
+model (the ``local`` backend, used as the reference), the int8 ONNX engine
+(the ``onnx`` backend, ``ONNX_EMBEDDING_FILE``) and, with ``--onnx-fp32``,
+the unquantized ONNX export, to separate the runtime's effect from
+quantization's. ``--hf-api`` adds the Hugging Face Inference API, which
+needs ``HF_API_TOKEN``.
+
+Reports single-query latency, batch throughput and the cosine similarity
+of each backend's embeddings to the reference.
+
+``--export PATH`` instead quantizes the fp32 ONNX export of
+``EMBEDDING_MODEL`` to int8 with onnxruntime's dynamic quantization, for
+CPUs the shipped int8 files do not suit. Point ``ONNX_EMBEDDING_FILE`` at
+the written file.
+
+Usage (from the backend directory):
+    python -m app.scripts.benchmark_onnx_embeddings --repeat 20 --batch-size 32
+    python -m app.scripts.benchmark_onnx_embeddings --export models/minilm-int8/model.onnx
+"""
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.services.onnx_embeddings import OnnxEmbeddings
+
+QUESTIONS = [
+    "Where does Kostadin work?",
+    "What is GONEXT?",
+    "Explain Recursive QA",
+    "What is emf-ellipse?",
+    "Which machine learning courses did he take?",
+    "What is Deep Gestures?",
+    "How was this chatbot built?",
+    "What programming languages does he know?",
+]
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs of each single query")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--onnx-fp32", action="store_true", help="Also benchmark the unquantized ONNX export")
+    parser.add_argument("--hf-api", action="store_true", help="Also benchmark the Hugging Face Inference API")
+    parser.add_argument("--export", metavar="PATH", help="Write an int8 ONNX graph to PATH and exit")
+    return parser.parse_args()
+
+def export(path: str) -> None:
+    from huggingface_hub import hf_hub_download
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = hf_hub_download(settings.EMBEDDING_MODEL, "onnx/model.onnx")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    quantize_dynamic(source, path, weight_type=QuantType.QInt8, per_channel=True)
+    # Loaded from next to the graph, so the engine needs no network access
+    tokenizer = hf_hub_download(settings.EMBEDDING_MODEL, "tokenizer.json")
+    shutil.copy(tokenizer, os.path.join(os.path.dirname(path) or ".", "tokenizer.json"))
+    print(f"Wrote {path} ({os.path.getsize(path) / 2**20:.1f} MiB); set ONNX_EMBEDDING_FILE={path}")
+
+def load_backends(args: argparse.Namespace) -> dict:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    backends = {
+        "local fp32": HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL),
+        "onnx int8": OnnxEmbeddings(),
+    }
+    if args.onnx_fp32:
+        backends["onnx fp32"] = OnnxEmbeddings(model_file="onnx/model.onnx")
+    if args.hf_api:
+        from huggingface_hub import InferenceClient
+
+        client = InferenceClient(token=settings.HF_API_TOKEN)
+
+        class HfApiEmbeddings:
+            def embed_query(self, text):
+                return np.asarray(client.feature_extraction(text, model=settings.EMBEDDING_MODEL)).tolist()
+
+            def embed_documents(self, texts):
+                return [self.embed_query(text) for text in texts]
+
+        backends["hf api"] = HfApiEmbeddings()
+    return backends
+
+def main():
+    args = parse_args()
+    if args.export:
+        export(args.export)
+        return
+    backends = load_backends(args)
+    paragraphs = [paragraph.strip() for paragraph in settings.BIO_SYSTEM_PROMPT.split("\n\n") if paragraph.strip()]
+    texts = QUESTIONS + paragraphs
+    # Warm up every backend, so loading is not timed
+    for backend in backends.values():
+        backend.embed_query(QUESTIONS[0])
+
+    results = {}
+    for name, backend in backends.items():
+        latencies = []
+        for _ in range(args.repeat):
+            for question in QUESTIONS:
+                start = time.perf_counter()
+                backend.embed_query(question)
+                latencies.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        vectors = []
+        for i in range(0, len(texts), args.batch_size):
+            vectors.extend(backend.embed_documents(texts[i:i + args.batch_size]))
+        elapsed = time.perf_counter() - start
+        vectors = np.asarray(vectors, dtype=np.float32)
+        results[name] = (latencies, len(texts) / elapsed, vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+
+    reference = results["local fp32"][2]
+    print(f"{len(QUESTIONS)} questions x {args.repeat} single queries; {len(texts)} texts in batches of {args.batch_size}")
+    print(f"{'backend':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'texts/s':>9} {'mean cos':>9} {'min cos':>9}")
+    for name, (latencies, throughput, vectors) in results.items():
+        p50, p99 = np.percentile(latencies, [50, 99])
+        cosines = (vectors * reference).sum(axis=1)
+        print(f"{name:>10} {p50:>9.2f} {p99:>9.2f} {throughput:>9.1f} {cosines.mean():>9.4f} {cosines.min():>9.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Offline benchmark of serving the system prompt from Gemini's context cache.
+
+Runs the chat graph and follow-up suggestions against the stand-in Gemini
+model twice: once sending the full ``SYSTEM_PROMPT`` with every request and
+once with ``PROMPT_CACHE_ENABLED``, where a stand-in cache service creates the
+cache and the background task refreshes it while requests run. Reports input
+tokens per request, tokens avoided and the simulated time to first token,
+where only uncached input tokens pay prefill.
+
+Usage (from the backend directory):
+    python -m app.scripts.benchmark_prompt_cache --requests 50 --prefill-ms-per-1k 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from app.scripts import standins
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=20.0,
+                        help="Simulated prefill latency per 1k uncached input tokens")
+    parser.add_argument("--interval", type=float, default=0.05,
+                        help="Seconds between requests, so the run spans cache refreshes")
+    return parser.parse_args()
+
+async def run_phase(requests: int, interval: float) -> dict:
+    from app.routers import chat
+    from app.services.metrics import metrics_service
+
+    start_usage = (standins.usage.requests, standins.usage.input_tokens, standins.usage.cached_tokens)
+    ttfts = []
+    for i in range(requests):
+        history = [{"role": "user", "content": f"Tell me about project number {i}"}]
+        start = time.perf_counter()
+        async for _ in chat.graph.astream({"history": history, "bypass_cache": True}, stream_mode="custom"):
+            ttfts.append((time.perf_counter() - start) * 1000)
+            break
+        await chat.generate_followups(history + [{"role": "assistant", "content": "An answer."}])
+        await asyncio.sleep(interval)
+    calls = standins.usage.requests - start_usage[0]
+    return {
+        "calls": calls,
+        "input_tokens_per_call": (standins.usage.input_tokens - start_usage[1]) / calls,
+        "cached_tokens_per_call": (standins.usage.cached_tokens - start_usage[2]) / calls,
+        "ttft_p50": float(np.percentile(ttfts, 50)),
+        "counters": metrics_service.snapshot()["counters"]
+    }
+
+async def main():
+    args = parse_args()
+    # Short-lived caches so the run exercises the background refresh
+    os.environ["PROMPT_CACHE_TTL"] = "60"
+    os.environ["PROMPT_CACHE_REFRESH_MARGIN"] = "59"
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+    os.environ["WARM_ANSWERS_ENABLED"] = "false"
+    standins.install(embed_ms=1, query_ms=1, first_token_ms=50, token_ms=0, tokens=5,
+                     prefill_ms_per_1k_tokens=args.prefill_ms_per_1k)
+
+    from app.config import settings
+    from app.services.prompt_cache import prompt_cache
+    from app.services.tokenizer import tokenizer_service
+
+    # Counts on the event loop are estimates until the tokenizer is loaded
+    await asyncio.to_thread(tokenizer_service.load)
+
+    settings.PROMPT_CACHE_ENABLED = False
+    full = await run_phase(args.requests, args.interval)
+
+    settings.PROMPT_CACHE_ENABLED = True
+    prompt_cache.start()
+    while prompt_cache.current() is None:
+        await asyncio.sleep(0.01)
+    cached = await run_phase(args.requests, args.interval)
+    await prompt_cache.stop()
+
+    counters = cached["counters"]
+    print(f"system prompt: ~{prompt_cache.prompt_tokens:,} tokens")
+    print(f"{'mode':<14}{'calls':>7}{'input tok/call':>16}{'cached tok/call':>17}{'TTFT p50 ms':>13}")
+    for name, phase in (("full prompt", full), ("prompt cache", cached)):
+        print(
+            f"{name:<14}{phase['calls']:>7}{phase['input_tokens_per_call']:>16,.0f}"
+            f"{phase['cached_tokens_per_call']:>17,.0f}{phase['ttft_p50']:>13.1f}"
+        )
+    print(
+        f"tokens avoided: {counters.get('gemini.prompt_tokens_avoided', 0):,.0f} "
+        f"(cache creates: {counters.get('prompt_cache.creates', 0):.0f}, "
+        f"refreshes: {counters.get('prompt_cache.refreshes', 0):.0f}, "
+        f"errors: {counters.get('prompt_cache.errors', 0):.0f})"
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Latency and recall comparison of the local vector index against Pinecone.
+
+Both backends are queried with the same vectors: embeddings of a set of
+sample questions plus rows sampled from the local snapshot. Pinecone's result
+is used as the reference for recall@k.
+
+Requires Pinecone credentials and a snapshot written by
+``python -m app.ingestion.export_snapshot``.
+
+Usage (from the backend directory):
+    python -m app.scripts.benchmark_vector_backends --sample 200 --top-k 4
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.services.embeddings import embeddings_service
+from app.services.local_index import InMemoryVectorStore
+from app.services.pinecone import pinecone_service
+
+QUESTIONS = [
+    "Where does Kostadin work?",
+    "What is GONEXT?",
+    "Explain Recursive QA",
+    "What is emf-ellipse?",
+    "Which machine learning courses did he take?",
+    "What is Deep Gestures?",
+    "How was this chatbot built?",
+    "What programming languages does he know?",
+]
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", type=int, default=200, help="Number of snapshot rows to use as extra queries")
+    parser.add_argument("--top-k", type=int, default=settings.TOP_K)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    args = parse_args()
+    local_index = InMemoryVectorStore(settings.LOCAL_INDEX_PATH)
+
+    queries = [embeddings_service.embed_query(question) for question in QUESTIONS]
+    snapshot = np.load(f"{settings.LOCAL_INDEX_PATH}.npy", mmap_mode="r")
+    rng = np.random.default_rng(args.seed)
+    rows = rng.choice(len(snapshot), size=min(args.sample, len(snapshot)), replace=False)
+    # Perturb sampled rows so they are near, not identical to, stored vectors
+    for row in rows:
+        noisy = snapshot[row] + rng.normal(scale=0.05, size=snapshot.shape[1]).astype(np.float32)
+        queries.append(noisy.tolist())
+
+    pinecone_ms, local_ms, recalls = [], [], []
+    for vector in queries:
+        remote, remote_latency = timed(pinecone_service.query, vector=vector, top_k=args.top_k)
+        local, local_latency = timed(local_index.query, vector=vector, top_k=args.top_k)
+        pinecone_ms.append(remote_latency)
+        local_ms.append(local_latency)
+        remote_ids = {match["id"] for match in remote.get("matches", [])}
+        local_ids = {match["id"] for match in local["matches"]}
+        if remote_ids:
+            recalls.append(len(remote_ids & local_ids) / len(remote_ids))
+
+    print(f"{len(queries)} queries, top_k={args.top_k}, {len(snapshot)} vectors")
+    print(f"{'backend':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for name, latencies in (("pinecone", pinecone_ms), ("local", local_ms)):
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"{name:>10} {p50:>9.2f} {p99:>9.2f}")
+    print(f"recall@{args.top_k} of local vs pinecone: {np.mean(recalls):.3f}")
+
+if __name__ == "__main__":
+    main()
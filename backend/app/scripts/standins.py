@@ -0,0 +1,377 @@
+"""
+Local stand-ins for the external backends used by the chat pipeline.
+
+The HF Inference API, Pinecone, Gemini (including its context cache) and
+cross-encoder clients are replaced with in-process fakes that sleep for a
+configurable latency. Benchmarks call ``install()`` before importing anything
+from ``app`` so the real services, router and graph run unchanged against the
+fakes.
+"""
+import asyncio
+import datetime
+import hashlib
+import itertools
+import os
+import sys
+import time
+import types
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+DIMENSION = 384
+ANSWER = (
+    "Kostadin is a software engineer working on natural language processing, "
+    "user interfaces and generative AI tools such as GONEXT. "
+)
+
+@dataclass
+class Latency:
+    """Simulated backend latencies, in milliseconds."""
+    embed_ms: float = 40.0
+    query_ms: float = 60.0
+    first_token_ms: float = 300.0
+    token_ms: float = 15.0
+    tokens: int = 40
+    rerank_ms_per_pair: float = 2.0
+    # Prefill cost of input tokens that are not served from a context cache
+    prefill_ms_per_1k_tokens: float = 0.0
+    # Concurrent async Gemini calls beyond which the stand-in answers 429 (0: unlimited)
+    rate_limit_concurrency: int = 0
+
+@dataclass
+class Usage:
+    """Input tokens seen by the stand-in Gemini model."""
+    requests: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    rate_limited: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+latency = Latency()
+usage = Usage()
+
+def fake_embedding(text: str, dimension: int = DIMENSION) -> np.ndarray:
+    """Deterministic unit-length embedding derived from a hash of the text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+def _embed(texts: Any) -> np.ndarray:
+    if isinstance(texts, str):
+        return fake_embedding(texts)
+    return np.stack([fake_embedding(text) for text in texts])
+
+def _answer_tokens(messages: Optional[list] = None) -> List[str]:
+    words = (ANSWER * (latency.tokens // len(ANSWER.split()) + 1)).split()
+    tokens = [word + " " for word in words[:latency.tokens]]
+    from app.services.suggestions import SUGGESTIONS_MARKER
+    if messages and SUGGESTIONS_MARKER in str(messages[-1].content):
+        # Follow the combined-suggestions instruction, splitting the marker across chunks
+        half = len(SUGGESTIONS_MARKER) // 2
+        tokens += ["\n" + SUGGESTIONS_MARKER[:half], SUGGESTIONS_MARKER[half:] + "\n1. Tech", " stack?\n2. What is GONEXT?"]
+    return tokens
+
+def _matches(top_k: int) -> dict:
+    return {
+        "matches": [
+            {
+                "id": f"doc-{i}",
+                "score": 1.0 - i * 0.05,
+                "metadata": {"text": f"Stand-in context chunk {i}.", "source": "standin"}
+            }
+            for i in range(top_k)
+        ]
+    }
+
+# --- huggingface_hub ---------------------------------------------------------
+
+class FakeInferenceClient:
+    """Stand-in for ``huggingface_hub.InferenceClient``."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def feature_extraction(self, text: Any, model: Optional[str] = None, **kwargs) -> np.ndarray:
+        time.sleep(latency.embed_ms / 1000)
+        return _embed(text)
+
+class FakeAsyncInferenceClient:
+    """Stand-in for ``huggingface_hub.AsyncInferenceClient``."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def feature_extraction(self, text: Any, model: Optional[str] = None, **kwargs) -> np.ndarray:
+        await asyncio.sleep(latency.embed_ms / 1000)
+        return _embed(text)
+
+class FakeHuggingFaceEmbeddings:
+    """Stand-in for ``langchain_huggingface.HuggingFaceEmbeddings``."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(latency.embed_ms / 1000)
+        return fake_embedding(text).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [fake_embedding(text).tolist() for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(latency.embed_ms / 1000)
+        return fake_embedding(text).tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+# --- pinecone ----------------------------------------------------------------
+
+class FakeIndex:
+    """Stand-in for a synchronous Pinecone index."""
+
+    def __init__(self):
+        self.namespaces: dict = {}
+
+    def query(self, vector: List[float], top_k: int, **kwargs) -> dict:
+        time.sleep(latency.query_ms / 1000)
+        return _matches(top_k)
+
+    def upsert(self, vectors: List[dict], namespace: str = "", **kwargs) -> None:
+        self.namespaces.setdefault(namespace, set()).update(v["id"] for v in vectors)
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, namespace: str = "", **kwargs) -> None:
+        if delete_all:
+            self.namespaces.pop(namespace, None)
+        else:
+            self.namespaces.get(namespace, set()).difference_update(ids or [])
+
+    def describe_index_stats(self) -> types.SimpleNamespace:
+        return types.SimpleNamespace(namespaces={
+            name: types.SimpleNamespace(vector_count=len(ids)) for name, ids in self.namespaces.items()
+        })
+
+class FakeAsyncIndex:
+    """Stand-in for ``pinecone.IndexAsyncio``."""
+
+    async def query(self, vector: List[float], top_k: int, **kwargs) -> dict:
+        await asyncio.sleep(latency.query_ms / 1000)
+        return _matches(top_k)
+
+    async def close(self) -> None:
+        pass
+
+class FakePinecone:
+    """Stand-in for the ``pinecone.Pinecone`` control-plane client."""
+
+    def __init__(self, *args, **kwargs):
+        self._index = FakeIndex()
+
+    def list_indexes(self) -> types.SimpleNamespace:
+        return types.SimpleNamespace(names=lambda: [os.environ.get("PINECONE_API_INDEX", "document-index")])
+
+    def create_index(self, *args, **kwargs) -> None:
+        pass
+
+    def describe_index(self, name: str) -> types.SimpleNamespace:
+        return types.SimpleNamespace(host="standin-index.svc.local", status={"ready": True})
+
+    def Index(self, name: str = "", host: str = "", **kwargs) -> FakeIndex:
+        return self._index
+
+    def IndexAsyncio(self, host: str, **kwargs) -> FakeAsyncIndex:
+        return FakeAsyncIndex()
+
+# --- langchain_google_genai --------------------------------------------------
+
+class FakeChatModel(BaseChatModel):
+    """Stand-in for ``ChatGoogleGenerativeAI`` that streams a canned answer."""
+
+    model: str = "standin-gemini"
+    temperature: float = 0.7
+    api_key: Optional[str] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "standin-gemini"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep((self._prefill_ms(messages, **kwargs) + latency.first_token_ms + latency.token_ms * latency.tokens) / 1000)
+        message = AIMessage(content="".join(_answer_tokens(messages)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._admit()
+        try:
+            await asyncio.sleep((self._prefill_ms(messages, **kwargs) + latency.first_token_ms + latency.token_ms * latency.tokens) / 1000)
+        finally:
+            usage.in_flight -= 1
+        message = AIMessage(content="".join(_answer_tokens(messages)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep((self._prefill_ms(messages, **kwargs) + latency.first_token_ms) / 1000)
+        for token in _answer_tokens(messages):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+            time.sleep(latency.token_ms / 1000)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        self._admit()
+        try:
+            await asyncio.sleep((self._prefill_ms(messages, **kwargs) + latency.first_token_ms) / 1000)
+            for token in _answer_tokens(messages):
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    await run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+                await asyncio.sleep(latency.token_ms / 1000)
+        finally:
+            usage.in_flight -= 1
+
+    @staticmethod
+    def _admit() -> None:
+        """Count an async call in flight, answering 429 above the simulated rate limit."""
+        if latency.rate_limit_concurrency and usage.in_flight >= latency.rate_limit_concurrency:
+            from google.api_core.exceptions import ResourceExhausted
+            usage.rate_limited += 1
+            raise ResourceExhausted("Resource has been exhausted (e.g. check quota).")
+        usage.in_flight += 1
+        usage.peak_in_flight = max(usage.peak_in_flight, usage.in_flight)
+
+    @staticmethod
+    def _prefill_ms(messages, cached_content: Optional[str] = None, **kwargs) -> float:
+        """Record the request's input tokens and return its simulated prefill latency."""
+        input_tokens = sum(len(str(message.content)) // 4 for message in messages)
+        cached_tokens = 0
+        if cached_content is not None:
+            # Mirror the API: the cache must be live and excludes a system instruction
+            cached = FakeCacheServiceAsyncClient.caches.get(cached_content)
+            if cached is None or cached.expire_time < datetime.datetime.now(datetime.timezone.utc):
+                raise ValueError(f"Cached content {cached_content} not found or expired")
+            if any(isinstance(message, SystemMessage) for message in messages):
+                raise ValueError("CachedContent can not be used with a system instruction")
+            cached_tokens = cached.tokens
+        usage.requests += 1
+        usage.input_tokens += input_tokens
+        usage.cached_tokens += cached_tokens
+        return latency.prefill_ms_per_1k_tokens * input_tokens / 1000
+
+# --- google.ai.generativelanguage ----------------------------------------------
+
+class FakeCacheServiceAsyncClient:
+    """Stand-in for the Gemini API's ``CacheServiceAsyncClient``."""
+
+    caches: Dict[str, types.SimpleNamespace] = {}
+    _ids = itertools.count()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def list_cached_contents(self, request: dict) -> AsyncIterator[types.SimpleNamespace]:
+        async def pager():
+            for cached in list(self.caches.values()):
+                yield cached
+        return pager()
+
+    async def create_cached_content(self, request: dict) -> types.SimpleNamespace:
+        spec = request["cached_content"]
+        text = "".join(part["text"] for part in spec["system_instruction"]["parts"])
+        cached = types.SimpleNamespace(
+            name=f"cachedContents/standin-{next(self._ids)}",
+            model=spec["model"],
+            display_name=spec["display_name"],
+            tokens=len(text) // 4,
+            expire_time=self._expiry(spec["ttl"])
+        )
+        self.caches[cached.name] = cached
+        return cached
+
+    async def update_cached_content(self, request: dict) -> types.SimpleNamespace:
+        spec = request["cached_content"]
+        cached = self.caches.get(spec["name"])
+        if cached is None:
+            raise ValueError(f"Cached content {spec['name']} not found")
+        cached.expire_time = self._expiry(spec["ttl"])
+        return cached
+
+    @staticmethod
+    def _expiry(ttl: dict) -> datetime.datetime:
+        return datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=ttl["seconds"])
+
+# --- sentence_transformers ---------------------------------------------------
+
+class FakeCrossEncoder:
+    """Stand-in for ``sentence_transformers.CrossEncoder``."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def predict(self, pairs: List[Any], **kwargs) -> np.ndarray:
+        time.sleep(latency.rerank_ms_per_pair * len(pairs) / 1000)
+        return np.array([float(fake_embedding(question) @ fake_embedding(text)) for question, text in pairs])
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+def install(**overrides) -> Latency:
+    """
+    Replace the backend client libraries with the local stand-ins.
+
+    Must be called before anything under ``app`` is imported.
+
+    Args:
+        overrides: Latency fields to override (see ``Latency``).
+
+    Returns:
+        The shared ``Latency`` settings used by the stand-ins.
+    """
+    for key, value in overrides.items():
+        setattr(latency, key, value)
+
+    os.environ.setdefault("ENV", "production")
+    for key in ("GOOGLE_API_KEY", "HF_API_TOKEN", "PINECONE_API_KEY"):
+        os.environ.setdefault(key, "standin")
+
+    sys.modules["huggingface_hub"] = _module(
+        "huggingface_hub",
+        InferenceClient=FakeInferenceClient,
+        AsyncInferenceClient=FakeAsyncInferenceClient
+    )
+    sys.modules["langchain_huggingface"] = _module(
+        "langchain_huggingface",
+        HuggingFaceEmbeddings=FakeHuggingFaceEmbeddings
+    )
+    sys.modules["pinecone"] = _module(
+        "pinecone",
+        Pinecone=FakePinecone,
+        ServerlessSpec=lambda **kwargs: kwargs,
+        NotFoundException=type("NotFoundException", (Exception,), {})
+    )
+    sys.modules["sentence_transformers"] = _module(
+        "sentence_transformers",
+        CrossEncoder=FakeCrossEncoder
+    )
+    sys.modules["google.ai.generativelanguage_v1beta"] = _module(
+        "google.ai.generativelanguage_v1beta",
+        CacheServiceAsyncClient=FakeCacheServiceAsyncClient
+    )
+    sys.modules["google.ai"] = _module(
+        "google.ai",
+        generativelanguage_v1beta=sys.modules["google.ai.generativelanguage_v1beta"]
+    )
+    sys.modules["langchain_google_genai"] = _module(
+        "langchain_google_genai",
+        ChatGoogleGenerativeAI=FakeChatModel
+    )
+    return latency
@@ -0,0 +1,271 @@
+"""
+Admission control for calls to a rate-limited upstream API.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, List, Optional
+
+from app.config import settings
+from app.services.metrics import metrics_service
+
+class Priority(IntEnum):
+    """Priority classes, most urgent first."""
+    CHAT = 0
+    FOLLOWUP = 1
+    BACKGROUND = 2
+
+class AdmissionRejected(Exception):
+    """Raised when a call is not admitted: the queue is full or its wait timed out."""
+
+class RetryBudget:
+    """
+    Limits retries to a fraction of calls, so retries cannot multiply load.
+    
+    Every call deposits ``ratio`` retries into the budget, up to ``capacity``;
+    every retry withdraws one.
+    """
+    
+    def __init__(self, ratio: float, capacity: float):
+        """
+        Initialize a full retry budget.
+        
+        Args:
+            ratio: Retries earned per call.
+            capacity: Maximum number of retries that can be saved up.
+        """
+        self._ratio = ratio
+        self._capacity = capacity
+        self._balance = capacity
+    
+    def deposit(self) -> None:
+        """Record a call."""
+        self._balance = min(self._capacity, self._balance + self._ratio)
+    
+    def withdraw(self) -> bool:
+        """
+        Spend a retry.
+        
+        Returns:
+            True if the budget allowed the retry.
+        """
+        if self._balance < 1.0:
+            return False
+        self._balance -= 1.0
+        return True
+
+class Reservation:
+    """
+    A call slot acquired ahead of the call that will use it.
+    
+    Lets a request be admitted or rejected before its response starts. The
+    call that runs later claims the slot and releases it when done; if no
+    call claims it, the request cancels the reservation to free the slot.
+    """
+    
+    def __init__(self, controller: "AdmissionController"):
+        """
+        Initialize a reservation of a slot already acquired from a controller.
+        
+        Args:
+            controller: The controller the slot belongs to.
+        """
+        self._controller = controller
+        self._claimed = False
+        self._cancelled = False
+    
+    def claim(self) -> bool:
+        """
+        Take over the slot for a call.
+        
+        Returns:
+            True if the caller now holds the slot and must release it, False
+            if the reservation was already claimed or cancelled.
+        """
+        if self._claimed or self._cancelled:
+            return False
+        self._claimed = True
+        return True
+    
+    def cancel(self) -> None:
+        """Free the slot, unless a call has claimed it."""
+        if self._claimed or self._cancelled:
+            return
+        self._cancelled = True
+        self._controller.release()
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter, in seconds, before retry ``attempt`` (from 0)."""
+    return random.uniform(0.0, min(cap, base * 2 ** attempt))
+
+class AdmissionController:
+    """
+    Caps concurrent calls and queues the excess by priority.
+    
+    Calls beyond ``max_concurrency`` wait in a queue of at most ``max_queue``
+    entries, served in priority order and first come, first served within a
+    priority. When the queue is full, a call evicts the newest waiter of a
+    lower priority, or is rejected if there is none. A call that waits longer
+    than its timeout is rejected, so a spike degrades into fast failures
+    instead of a pile-up of requests upstream.
+    """
+    
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        """
+        Initialize the admission controller.
+        
+        Args:
+            name: Prefix of the exported metrics.
+            max_concurrency: Maximum number of calls in progress.
+            max_queue: Maximum number of waiting calls.
+            queue_timeout: Default number of seconds a call may wait.
+        """
+        self._name = name
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._active = 0
+        # Heap of [priority, sequence, future]
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+    
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls waiting for a slot."""
+        return len(self._waiters)
+    
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Priority,
+        timeout: Optional[float] = None,
+        reservation: Optional[Reservation] = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold a call slot for the duration of the block.
+        
+        Args:
+            priority: Priority class of the call.
+            timeout: Seconds the call may wait for a slot, defaulting to the
+                controller's queue timeout.
+            reservation: Slot reserved for the call; used instead of waiting
+                for one unless it was already claimed or cancelled.
+                
+        Raises:
+            AdmissionRejected: If the call was not admitted.
+        """
+        if reservation is None or not reservation.claim():
+            await self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    async def acquire(self, priority: Priority, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a call slot.
+        
+        Args:
+            priority: Priority class of the call.
+            timeout: Seconds the call may wait for a slot, defaulting to the
+                controller's queue timeout.
+                
+        Raises:
+            AdmissionRejected: If the call was not admitted.
+        """
+        start = time.perf_counter()
+        if self._active < self._max_concurrency and not self._waiters:
+            self._active += 1
+            self._record_admission(priority, start)
+            return
+        if len(self._waiters) >= self._max_queue:
+            if not self._waiters:
+                # No queue at all (max_queue=0): nobody to evict
+                self._reject(priority, "queue_full")
+            newest_lowest = max(self._waiters)
+            if newest_lowest[0] <= priority:
+                self._reject(priority, "queue_full")
+            self._remove(newest_lowest)
+            newest_lowest[2].set_exception(AdmissionRejected(f"{self._name} admission queue is full"))
+            metrics_service.increment(f"{self._name}.admission.rejected.evicted")
+        
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._sequence), future]
+        heapq.heappush(self._waiters, entry)
+        self._record_depth()
+        try:
+            await asyncio.wait_for(future, self._queue_timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self._remove(entry)
+            self._reject(priority, "timed_out")
+        except asyncio.CancelledError:
+            self._remove(entry)
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # The slot was handed over just as the caller went away
+                self.release()
+            raise
+        self._record_admission(priority, start)
+    
+    async def reserve(self, priority: Priority, timeout: Optional[float] = None) -> Reservation:
+        """
+        Wait for a call slot to be used by a later call.
+        
+        Args:
+            priority: Priority class of the call.
+            timeout: Seconds to wait for a slot, defaulting to the
+                controller's queue timeout.
+                
+        Returns:
+            The reservation, to be passed to ``slot`` or cancelled.
+            
+        Raises:
+            AdmissionRejected: If the call was not admitted.
+        """
+        await self.acquire(priority, timeout)
+        return Reservation(self)
+    
+    def release(self) -> None:
+        """Hand the slot to the most urgent waiter, or free it."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                self._record_depth()
+                return
+        self._active -= 1
+        metrics_service.set_gauge(f"{self._name}.admission.active", self._active)
+    
+    def _remove(self, entry: list) -> None:
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._record_depth()
+    
+    def _reject(self, priority: Priority, reason: str) -> None:
+        metrics_service.increment(f"{self._name}.admission.rejected.{reason}")
+        raise AdmissionRejected(f"{self._name} call with priority {priority.name.lower()} {reason.replace('_', ' ')}")
+    
+    def _record_admission(self, priority: Priority, start: float) -> None:
+        wait_ms = (time.perf_counter() - start) * 1000
+        metrics_service.observe(f"{self._name}.admission.wait_ms", wait_ms)
+        metrics_service.observe(f"{self._name}.admission.wait_ms.{priority.name.lower()}", wait_ms)
+        metrics_service.set_gauge(f"{self._name}.admission.active", self._active)
+    
+    def _record_depth(self) -> None:
+        metrics_service.set_gauge(f"{self._name}.admission.queue_depth", len(self._waiters))
+
+# Create the global admission controller and retry budget for Gemini calls
+gemini_admission = AdmissionController(
+    name="gemini",
+    max_concurrency=settings.GEMINI_MAX_CONCURRENCY,
+    max_queue=settings.GEMINI_MAX_QUEUE,
+    queue_timeout=settings.GEMINI_QUEUE_TIMEOUT
+)
+gemini_retry_budget = RetryBudget(
+    ratio=settings.GEMINI_RETRY_BUDGET_RATIO,
+    capacity=settings.GEMINI_RETRY_BUDGET_CAPACITY
+)
@@ -0,0 +1,202 @@
+"""
+Approximate nearest-neighbour index for the local vector backend.
+"""
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+class IVFFlatIndex:
+    """
+    Inverted-file index over unit-length vectors with exact scoring inside
+    the probed lists (IVF-flat).
+    
+    Vectors are partitioned by spherical k-means into ``n_lists`` cells. A
+    query scores the centroids, then scores only the vectors in the
+    ``nprobe`` closest cells, so ``nprobe`` trades recall for latency.
+    Each cell stores its vectors together with the caller's row ids, and
+    vectors can be added or removed incrementally without retraining.
+    """
+    
+    def __init__(self, centroids: np.ndarray, nprobe: int = 8):
+        """
+        Initialize an empty index with trained centroids.
+        
+        Args:
+            centroids: Unit-length centroid matrix of shape (n_lists, dimension).
+            nprobe: Default number of cells scanned per query.
+        """
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.nprobe = nprobe
+        dimension = self.centroids.shape[1]
+        self._vectors = [np.empty((0, dimension), dtype=np.float32) for _ in range(len(self.centroids))]
+        self._ids = [np.empty(0, dtype=np.int64) for _ in range(len(self.centroids))]
+    
+    @property
+    def n_lists(self) -> int:
+        """Number of inverted lists (cells)."""
+        return len(self.centroids)
+    
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._ids)
+    
+    @staticmethod
+    def default_n_lists(n_vectors: int) -> int:
+        """Rule-of-thumb number of cells for a corpus size (about sqrt(n))."""
+        return max(1, int(math.sqrt(n_vectors)))
+    
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        n_lists: Optional[int] = None,
+        nprobe: int = 8,
+        iterations: int = 10,
+        max_training_points: int = 256,
+        seed: int = 0
+    ) -> "IVFFlatIndex":
+        """
+        Train centroids with spherical k-means on a sample of the vectors.
+        
+        Args:
+            vectors: Unit-length vectors of shape (n, dimension).
+            n_lists: Number of cells; defaults to ``default_n_lists(n)``.
+            nprobe: Default number of cells scanned per query.
+            iterations: Number of k-means iterations.
+            max_training_points: Training sample size per cell.
+            seed: Random seed for sampling and initialization.
+            
+        Returns:
+            An empty index with trained centroids (call ``add`` to fill it).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n_lists = min(n_lists or cls.default_n_lists(len(vectors)), len(vectors))
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), n_lists * max_training_points)
+        sample = vectors[np.sort(rng.choice(len(vectors), size=sample_size, replace=False))]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = cls._assign(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            cells, starts = np.unique(assignments[order], return_index=True)
+            sums = np.zeros_like(centroids)
+            sums[cells] = np.add.reduceat(sample[order], starts)
+            counts = np.bincount(assignments, minlength=n_lists)
+            # Re-seed empty cells from random sample points
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1.0, norms)
+        return cls(centroids, nprobe=nprobe)
+    
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """
+        Add vectors to the index.
+        
+        Args:
+            vectors: Unit-length vectors of shape (n, dimension).
+            ids: Row ids returned by ``search`` for these vectors.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        ids = np.asarray(ids, dtype=np.int64)
+        assignments = self._assign(vectors, self.centroids)
+        order = np.argsort(assignments, kind="stable")
+        cells, starts = np.unique(assignments[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for cell, start, end in zip(cells, starts, ends):
+            rows = order[start:end]
+            self._vectors[cell] = np.concatenate([self._vectors[cell], vectors[rows]])
+            self._ids[cell] = np.concatenate([self._ids[cell], ids[rows]])
+    
+    def remove(self, ids: np.ndarray) -> None:
+        """
+        Remove vectors from the index.
+        
+        Args:
+            ids: Row ids of the vectors to remove.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        for cell in range(self.n_lists):
+            keep = ~np.isin(self._ids[cell], ids)
+            if not keep.all():
+                self._vectors[cell] = self._vectors[cell][keep]
+                self._ids[cell] = self._ids[cell][keep]
+    
+    def renumber(self, new_ids: np.ndarray) -> None:
+        """
+        Replace the row ids of the indexed vectors.
+        
+        Args:
+            new_ids: Array mapping each old row id to its new one.
+        """
+        self._ids = [np.asarray(new_ids, dtype=np.int64)[ids] for ids in self._ids]
+    
+    def search(self, query: np.ndarray, top_k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximate nearest neighbours by cosine similarity.
+        
+        Args:
+            query: Unit-length query vector.
+            top_k: Number of results to return.
+            nprobe: Number of cells to scan; defaults to the index setting.
+            
+        Returns:
+            Tuple of (row ids, scores), best first.
+        """
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        scores = np.concatenate([self._vectors[cell] @ query for cell in probe])
+        ids = np.concatenate([self._ids[cell] for cell in probe])
+        if len(scores) == 0:
+            return ids, scores
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return ids[top], scores[top]
+    
+    def save(self, path: str) -> None:
+        """
+        Persist the index to an ``.npz`` file.
+        
+        Args:
+            path: Destination file path.
+        """
+        sizes = np.array([len(ids) for ids in self._ids], dtype=np.int64)
+        np.savez(
+            path,
+            centroids=self.centroids,
+            nprobe=np.array(self.nprobe),
+            sizes=sizes,
+            vectors=np.concatenate(self._vectors),
+            ids=np.concatenate(self._ids)
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "IVFFlatIndex":
+        """
+        Load an index written by ``save``.
+        
+        Args:
+            path: The ``.npz`` file path.
+            
+        Returns:
+            The loaded index.
+        """
+        data = np.load(path)
+        index = cls(data["centroids"], nprobe=int(data["nprobe"]))
+        offsets = np.concatenate([[0], np.cumsum(data["sizes"])])
+        vectors, ids = data["vectors"], data["ids"]
+        for cell in range(index.n_lists):
+            index._vectors[cell] = vectors[offsets[cell]:offsets[cell + 1]]
+            index._ids[cell] = ids[offsets[cell]:offsets[cell + 1]]
+        return index
+    
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+        # Chunked so that the (batch, n_lists) score matrix stays small
+        return np.concatenate([
+            np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), batch_size)
+        ]) if len(vectors) else np.empty(0, dtype=np.int64)
@@ -0,0 +1,145 @@
+"""
+Bio section service for sending only the relevant parts of the bio with each request.
+"""
+import asyncio
+import re
+import textwrap
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from app.config import settings
+from app.services.embeddings import embeddings_service
+from app.services.metrics import metrics_service
+from app.services.tokenizer import tokenizer_service
+
+HEADING_PATTERN = re.compile(r"^(#{1,2})\s+(.+?)\s*$")
+FENCE_PATTERN = re.compile(r"^\s*```\s*(\S*)")
+# Quoted documents are fenced as markdown; their headings still start sections
+MARKDOWN_FENCES = {"markdown", "md"}
+
+@dataclass
+class BioSection:
+    """A top-level section of the bio, titled with its heading path."""
+    title: str
+    text: str
+
+def split_sections(bio: str) -> List[BioSection]:
+    """
+    Split the markdown bio at its level 1 and 2 headings.
+    
+    Headings inside fenced code blocks (such as shell comments) do not start
+    a section, but those of documents quoted in ``markdown`` fences do.
+    Level 2 sections are titled with their level 1 parent, so "Features" of
+    a project README stays distinguishable.
+    
+    Args:
+        bio: The markdown bio.
+        
+    Returns:
+        The sections in document order, including the text before the first
+        heading, if any.
+    """
+    sections: List[BioSection] = []
+    parent, title, lines = "", "", []
+    in_fence = False
+    
+    def flush():
+        text = "\n".join(lines).strip()
+        if text:
+            sections.append(BioSection(title=title, text=text))
+    
+    for line in textwrap.dedent(bio).splitlines():
+        fence = FENCE_PATTERN.match(line)
+        if fence and fence.group(1).lower() not in MARKDOWN_FENCES:
+            # Any fence opens a code block, only a bare one closes it
+            in_fence = not in_fence or bool(fence.group(1))
+        match = None if in_fence else HEADING_PATTERN.match(line)
+        if match:
+            flush()
+            level, heading = len(match.group(1)), match.group(2)
+            if level == 1:
+                parent, title = heading, heading
+            else:
+                title = f"{parent} > {heading}" if parent else heading
+            lines = []
+        lines.append(line)
+    flush()
+    return sections
+
+class BioSectionService:
+    """
+    Builds a system prompt with the core bio plus the sections closest to the question.
+    
+    The bio is split into sections at startup; ``load`` embeds them once.
+    The first ``BIO_CORE_SECTIONS`` sections (name, contact details and
+    summary) are always included. Until the embeddings are loaded, callers
+    fall back to the full bio.
+    """
+    
+    def __init__(self):
+        """Split the bio into sections."""
+        self._sections = split_sections(settings.BIO_SYSTEM_PROMPT)
+        self._candidates = self._sections[settings.BIO_CORE_SECTIONS:]
+        self._vectors: Optional[np.ndarray] = None
+        self._tokens: List[int] = []
+        self._basic_tokens = 0
+        self._full_tokens = 0
+    
+    @property
+    def sections(self) -> List[BioSection]:
+        """All sections of the bio, in document order."""
+        return list(self._sections)
+    
+    @property
+    def ready(self) -> bool:
+        """Whether the section embeddings are loaded."""
+        return self._vectors is not None
+    
+    async def load(self) -> None:
+        """Embed the non-core sections and measure all sections once."""
+        if self._vectors is not None:
+            return
+        try:
+            self._tokens = await asyncio.to_thread(
+                lambda: [tokenizer_service.count(section.text) for section in self._sections]
+            )
+            self._basic_tokens = await asyncio.to_thread(tokenizer_service.count, settings.BASIC_SYSTEM_PROMPT.strip())
+            self._full_tokens = await asyncio.to_thread(tokenizer_service.count, settings.SYSTEM_PROMPT)
+            vectors = []
+            for section in self._candidates:
+                vectors.append(await embeddings_service.aembed_query(f"{section.title}\n{section.text}"))
+            matrix = np.asarray(vectors, dtype=np.float32).reshape(len(self._candidates), -1)
+            self._vectors = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        except Exception as e:
+            print(f"Bio section embedding failed, sending the full bio: {e}")
+    
+    def build_prompt(self, query_embedding: List[float]) -> Optional[str]:
+        """
+        Build the system prompt for a question.
+        
+        Args:
+            query_embedding: Embedding of the current question.
+            
+        Returns:
+            The basic prompt, the core bio and the ``BIO_SECTION_TOP_K``
+            sections most similar to the question in document order, or None
+            if the sections are not loaded yet.
+        """
+        if not self.ready:
+            return None
+        core = settings.BIO_CORE_SECTIONS
+        selected = list(range(core))
+        if self._candidates:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            scores = self._vectors @ (query / max(np.linalg.norm(query), 1e-12))
+            top = np.argsort(-scores)[:settings.BIO_SECTION_TOP_K]
+            selected += [core + int(i) for i in sorted(top)]
+        prompt = "\n\n".join([settings.BASIC_SYSTEM_PROMPT.strip()] + [self._sections[i].text for i in selected])
+        prompt_tokens = self._basic_tokens + sum(self._tokens[i] for i in selected)
+        metrics_service.observe("bio.prompt_tokens", prompt_tokens)
+        metrics_service.increment("bio.prompt_tokens_saved", max(self._full_tokens - prompt_tokens, 0))
+        return prompt
+
+# Create a global bio section service instance
+bio_sections = BioSectionService()
@@ -0,0 +1,192 @@
+"""
+Context packer for turning retrieved chunks into a compact prompt context.
+"""
+import re
+from dataclasses import dataclass, replace
+from typing import Any, FrozenSet, List, Optional
+
+import numpy as np
+from app.config import settings
+from app.services.metrics import metrics_service
+from app.services.tokenizer import tokenizer_service
+
+# Shortest shared run of characters treated as splitter overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+# Words per shingle for near-duplicate detection
+SHINGLE_SIZE = 3
+
+@dataclass
+class Passage:
+    """A candidate chunk with its match, its shingles and, if returned, its vector."""
+    text: str
+    shingles: FrozenSet[str]
+    values: Optional[np.ndarray]
+    match: Any
+
+def _shingles(text: str) -> FrozenSet[str]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return frozenset(words)
+    return frozenset(" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def _overlap(head: str, tail: str) -> int:
+    """Length of the longest suffix of ``head`` that is a prefix of ``tail``."""
+    longest = min(len(head), len(tail), 2 * settings.CHUNK_OVERLAP)
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if head.endswith(tail[:size]):
+            return size
+    return 0
+
+class ContextPacker:
+    """
+    Packs retrieved chunks into the context for generation.
+    
+    Exact and near-duplicate chunks (such as the same README in several
+    repositories) are dropped, the rest are ordered by maximal marginal
+    relevance to the query, text shared with an already packed neighbouring
+    chunk (splitter overlap) is trimmed, and chunks are packed while they
+    fit in a token budget.
+    """
+    
+    def __init__(
+        self,
+        token_budget: int = settings.CONTEXT_TOKEN_BUDGET,
+        mmr_lambda: float = settings.CONTEXT_MMR_LAMBDA,
+        duplicate_threshold: float = settings.CONTEXT_DUPLICATE_THRESHOLD
+    ):
+        """
+        Initialize the context packer.
+        
+        Args:
+            token_budget: Maximum number of context tokens.
+            mmr_lambda: Trade-off between relevance (1.0) and diversity (0.0).
+            duplicate_threshold: Shingle Jaccard similarity above which a
+                chunk is a near-duplicate of a higher-ranked one.
+        """
+        self._token_budget = token_budget
+        self._mmr_lambda = mmr_lambda
+        self._duplicate_threshold = duplicate_threshold
+    
+    def pack(self, matches: List[Any], query_embedding: Optional[List[float]] = None) -> str:
+        """
+        Build the context from retrieval matches.
+        
+        Args:
+            matches: Matches, best first, with the chunk text in ``metadata``
+                and optionally their ``values``.
+            query_embedding: Embedding of the question, for MMR relevance.
+            
+        Returns:
+            The packed context string.
+        """
+        return "\n\n".join(passage.text for passage in self.select(matches, query_embedding))
+    
+    def select(self, matches: List[Any], query_embedding: Optional[List[float]] = None) -> List[Passage]:
+        """
+        Choose and trim the passages that make up the context.
+        
+        A passage that does not fit in what is left of the budget is skipped,
+        so smaller passages after it can still fill the budget.
+        
+        Args:
+            matches: Matches, best first, with the chunk text in ``metadata``
+                and optionally their ``values``.
+            query_embedding: Embedding of the question, for MMR relevance.
+            
+        Returns:
+            The packed passages in context order, with their trimmed text.
+        """
+        passages = self._deduplicate(matches)
+        packed: List[Passage] = []
+        used_tokens = 0
+        for index in self._mmr_order(passages, query_embedding):
+            text = passages[index].text
+            for previous in packed:
+                text = text[_overlap(previous.text, text):]
+                text = text[:len(text) - _overlap(text, previous.text)]
+            text = text.strip()
+            if not text:
+                continue
+            tokens = tokenizer_service.count(text)
+            if used_tokens + tokens > self._token_budget:
+                metrics_service.increment("context.budget_truncations")
+                continue
+            packed.append(replace(passages[index], text=text))
+            used_tokens += tokens
+        metrics_service.observe("context.tokens", used_tokens)
+        metrics_service.observe("context.passages", len(packed))
+        return packed
+    
+    def _deduplicate(self, matches: List[Any]) -> List[Passage]:
+        passages: List[Passage] = []
+        for match in matches:
+            text = (match.get("metadata") or {}).get("text", "").strip()
+            if not text:
+                continue
+            shingles = _shingles(text)
+            if any(
+                text == passage.text or _jaccard(shingles, passage.shingles) >= self._duplicate_threshold
+                for passage in passages
+            ):
+                metrics_service.increment("context.duplicates_dropped")
+                continue
+            values = match.get("values")
+            passages.append(Passage(
+                text=text,
+                shingles=shingles,
+                values=np.asarray(values, dtype=np.float32) if values else None,
+                match=match
+            ))
+        return passages
+    
+    def _mmr_order(self, passages: List[Passage], query_embedding: Optional[List[float]] = None) -> List[int]:
+        """
+        Order passages by maximal marginal relevance.
+        
+        Relevance is the cosine similarity of a passage's vector to the
+        query. Passages without a vector (such as lexical-only matches) take
+        the relevance of the passage ranked just above them, keeping their
+        place in the incoming order, which reflects fusion and reranking;
+        without a query embedding, relevance decreases with that order.
+        Redundancy is the cosine similarity of the returned vectors, or
+        shingle similarity for passages without one.
+        """
+        n = len(passages)
+        if n <= 1:
+            return list(range(n))
+        relevance = 1.0 - np.arange(n) / n
+        similarity = np.array([
+            [_jaccard(a.shingles, b.shingles) for b in passages]
+            for a in passages
+        ])
+        with_vectors = [i for i, passage in enumerate(passages) if passage.values is not None]
+        if with_vectors:
+            vectors = np.stack([passages[i].values for i in with_vectors])
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            similarity[np.ix_(with_vectors, with_vectors)] = vectors @ vectors.T
+            if query_embedding is not None:
+                query = np.asarray(query_embedding, dtype=np.float32)
+                query_relevance = dict(zip(with_vectors, vectors @ (query / max(np.linalg.norm(query), 1e-12))))
+                previous = max(query_relevance.values())
+                for i in range(n):
+                    previous = query_relevance.get(i, previous)
+                    relevance[i] = previous
+        
+        order = [int(np.argmax(relevance))]
+        remaining = set(range(n)) - set(order)
+        while remaining:
+            candidates = list(remaining)
+            redundancy = similarity[np.ix_(candidates, order)].max(axis=1)
+            scores = self._mmr_lambda * relevance[candidates] - (1 - self._mmr_lambda) * redundancy
+            best = candidates[int(np.argmax(scores))]
+            order.append(best)
+            remaining.remove(best)
+        return order
+
+# Create a global context packer instance
+context_packer = ContextPacker()
@@ -0,0 +1,107 @@
+"""
+Disconnect monitor for stopping the work behind abandoned response streams.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from app.services.metrics import metrics_service
+from app.services.tokenizer import tokenizer_service
+
+# Receives the next ASGI message of a request
+Receive = Callable[[], Awaitable[dict]]
+# Weight of the newest sample in the answer length estimate
+LENGTH_SMOOTHING = 0.1
+
+class ClientDisconnected(Exception):
+    """Raised in a response stream whose client has gone away."""
+
+async def wait_for_disconnect(receive: Receive) -> None:
+    """Return once the ASGI server reports that the client disconnected."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+class DisconnectMonitor:
+    """
+    Stops response streams as soon as their client disconnects.
+    
+    ``guard`` races every step of a stream against the client going away,
+    so a disconnect is noticed while the pipeline is still embedding,
+    retrieving or waiting for Gemini, not only at the next write. The
+    pending step is then cancelled, which cancels the LangGraph run and the
+    embedding, Pinecone and Gemini calls it is awaiting.
+    
+    A run shared by coalesced requests is only cancelled once all of them
+    have disconnected. The output tokens a cancelled run saved are estimated
+    from a moving average of the length of completed answers.
+    """
+    
+    def __init__(self):
+        """Initialize without an answer length estimate."""
+        self._answer_tokens: Optional[float] = None
+    
+    async def guard(self, items: AsyncIterator[Any], receive: Receive) -> AsyncIterator[Any]:
+        """
+        Pass a stream on until it ends or the client disconnects.
+        
+        Args:
+            items: The response stream.
+            receive: ASGI receive callable of the request.
+            
+        Yields:
+            The items of the stream.
+            
+        Raises:
+            ClientDisconnected: If the client disconnected first; the step of
+                the stream in progress has been cancelled.
+        """
+        iterator = items.__aiter__()
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        pending: Optional[asyncio.Future] = None
+        try:
+            while True:
+                pending = asyncio.ensure_future(iterator.__anext__())
+                await asyncio.wait({pending, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not pending.done():
+                    raise ClientDisconnected()
+                next_item, pending = pending, None
+                try:
+                    item = next_item.result()
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            # Not awaited: the request task may itself be cancelled already
+            if pending is not None:
+                pending.cancel()
+            disconnected.cancel()
+    
+    def record_completed(self, answer: str) -> None:
+        """
+        Update the answer length estimate with a fully streamed answer.
+        
+        Args:
+            answer: The streamed answer text.
+        """
+        tokens = tokenizer_service.count(answer)
+        self._answer_tokens = tokens if self._answer_tokens is None else (
+            (1 - LENGTH_SMOOTHING) * self._answer_tokens + LENGTH_SMOOTHING * tokens
+        )
+    
+    def record_cancelled(self, answer: str) -> None:
+        """
+        Count a pipeline run cancelled by a disconnect and the tokens it saved.
+        
+        Args:
+            answer: The answer text produced before the run was cancelled.
+        """
+        metrics_service.increment("disconnects.cancelled_runs")
+        if self._answer_tokens is None:
+            return
+        saved = max(self._answer_tokens - tokenizer_service.count(answer), 0.0)
+        metrics_service.observe("disconnects.tokens_saved", saved)
+        metrics_service.increment("disconnects.tokens_saved_total", saved)
+
+# Create a global disconnect monitor instance
+disconnect_monitor = DisconnectMonitor()
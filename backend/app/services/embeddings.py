@@ -1,23 +1,85 @@
 """
 Embeddings service for handling text embeddings using HuggingFace.
 """
-from typing import List, Union
-from huggingface_hub import InferenceClient
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+from cachetools import TTLCache
+from huggingface_hub import AsyncInferenceClient, InferenceClient
 from langchain_huggingface import HuggingFaceEmbeddings
 from app.config import settings
+from app.services.metrics import metrics_service
+from app.services.microbatch import MicroBatcher
+from app.services.onnx_embeddings import OnnxEmbeddings
+
+EMBEDDING_BACKENDS = ("hf_api", "local", "onnx")
 
 class EmbeddingsService:
-    """Service for handling text embeddings."""
+    """
+    Service for handling text embeddings.
+    
+    The ``EMBEDDING_BACKEND`` setting selects how queries are embedded:
+    through the Hugging Face Inference API (``hf_api``), with the
+    sentence-transformers model in process (``local``), or with a quantized
+    ONNX export of the model in process (``onnx``). ``auto`` uses the API in
+    production and the local model otherwise.
+    
+    With ``EMBEDDING_BATCHING_ENABLED``, concurrent async queries that miss
+    the cache are collected for up to ``EMBEDDING_BATCH_WINDOW_MS`` (or
+    ``EMBEDDING_BATCH_MAX_SIZE`` queries) and embedded together, in one API
+    request or one forward pass.
+    """
     
     def __init__(self):
-        """Initialize the embeddings service based on environment."""
-        if settings.ENV == "production":
+        """Initialize the embeddings service based on the configured backend."""
+        backend = settings.EMBEDDING_BACKEND
+        if backend == "auto":
+            backend = "hf_api" if settings.ENV == "production" else "local"
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {settings.EMBEDDING_BACKEND}")
+        self._backend = backend
+        if backend == "hf_api":
             self._client = InferenceClient(token=settings.HF_API_TOKEN)
+            self._async_client = AsyncInferenceClient(token=settings.HF_API_TOKEN)
             self._model = settings.EMBEDDING_MODEL
+        elif backend == "onnx":
+            self._embeddings = OnnxEmbeddings()
         else:
             self._embeddings = HuggingFaceEmbeddings(
                 model_name=settings.EMBEDDING_MODEL
             )
+        # LRU + TTL cache of query embeddings, stored as compact float32 arrays
+        self._cache: Optional[TTLCache] = None
+        if settings.EMBEDDING_CACHE_SIZE > 0:
+            self._cache = TTLCache(maxsize=settings.EMBEDDING_CACHE_SIZE, ttl=settings.EMBEDDING_CACHE_TTL)
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._batcher: Optional[MicroBatcher] = None
+        if settings.EMBEDDING_BATCHING_ENABLED:
+            self._batcher = MicroBatcher(
+                "embeddings",
+                self._aembed_batch,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait=settings.EMBEDDING_BATCH_WINDOW_MS / 1000
+            )
+    
+    @property
+    def backend(self) -> str:
+        """The backend in use: "hf_api", "local" or "onnx"."""
+        return self._backend
+    
+    def warmup(self) -> None:
+        """
+        Load the ONNX engine and run one query, so no request is charged for it.
+        
+        The other backends need no warmup.
+        """
+        if self._backend == "onnx":
+            try:
+                self._embeddings.embed_query("warmup")
+            except Exception as e:
+                print(f"ONNX embedding engine failed to load: {e}")
     
     def embed_query(self, text: str) -> List[float]:
         """
@@ -29,11 +91,88 @@ class EmbeddingsService:
         Returns:
             List of float values representing the embedding.
         """
-        if settings.ENV == "production":
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+        if self._backend == "hf_api":
             embedding = self._client.feature_extraction(text, model=self._model)
-            return embedding.tolist() if hasattr(embedding, "tolist") else embedding
+            embedding = embedding.tolist() if hasattr(embedding, "tolist") else embedding
+        else:
+            embedding = self._embeddings.embed_query(text)
+        self._cache_put(text, embedding)
+        return embedding
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Asynchronously generate embeddings for the given text.
+        
+        Args:
+            text: The text to generate embeddings for.
+            
+        Returns:
+            List of float values representing the embedding.
+        """
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+        if self._batcher is not None:
+            embedding = await self._batcher.submit(text)
+        elif self._backend == "hf_api":
+            embedding = await self._async_client.feature_extraction(text, model=self._model)
+            embedding = embedding.tolist() if hasattr(embedding, "tolist") else embedding
         else:
-            return self._embeddings.embed_query(text)
+            embedding = await self._embeddings.aembed_query(text)
+        self._cache_put(text, embedding)
+        return embedding
+    
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a micro-batch of queries in one API request or forward pass."""
+        if self._backend == "hf_api":
+            embeddings = await self._async_client.feature_extraction(texts, model=self._model)
+            return np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1).tolist()
+        return await self._embeddings.aembed_documents(texts)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get query-embedding cache statistics.
+        
+        Returns:
+            Dictionary with hits, misses, hit rate and current size.
+        """
+        with self._cache_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": self._cache_hits / lookups if lookups else 0.0,
+                "size": len(self._cache) if self._cache is not None else 0
+            }
+    
+    @staticmethod
+    def _cache_key(text: str) -> Tuple[str, str]:
+        # all-MiniLM-L6-v2 is uncased and ignores whitespace runs, so case and
+        # whitespace normalization never changes the embedding.
+        return settings.EMBEDDING_MODEL, " ".join(text.lower().split())
+    
+    def _cache_get(self, text: str) -> Optional[List[float]]:
+        if self._cache is None:
+            return None
+        with self._cache_lock:
+            embedding = self._cache.get(self._cache_key(text))
+            if embedding is None:
+                self._cache_misses += 1
+            else:
+                self._cache_hits += 1
+            hit_rate = self._cache_hits / (self._cache_hits + self._cache_misses)
+        metrics_service.increment("embeddings.cache_hits" if embedding is not None else "embeddings.cache_misses")
+        metrics_service.set_gauge("embeddings.cache_hit_rate", hit_rate)
+        return embedding.tolist() if embedding is not None else None
+    
+    def _cache_put(self, text: str, embedding: Union[List[float], np.ndarray]) -> None:
+        if self._cache is None:
+            return
+        with self._cache_lock:
+            self._cache[self._cache_key(text)] = np.asarray(embedding, dtype=np.float32)
 
 # Create a global embeddings service instance
-embeddings_service = EmbeddingsService() 
\ No newline at end of file
+embeddings_service = EmbeddingsService()
\ No newline at end of file
@@ -1,13 +1,30 @@
 """
 Gemini service for handling LLM operations.
 """
-from typing import List
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
 from app.config import settings
+from app.services.admission import Priority, Reservation, backoff_delay, gemini_admission, gemini_retry_budget
+from app.services.bio_sections import bio_sections
+from app.services.history import history_manager
+from app.services.metrics import metrics_service
+from app.services.prompt_cache import prompt_cache
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an error from the Gemini client is a rate limit (HTTP 429)."""
+    return getattr(error, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(error).upper().replace(" ", "_")
 
 class GeminiService:
-    """Service for handling Gemini LLM operations."""
+    """
+    Service for handling Gemini LLM operations.
+    
+    Asynchronous calls go through an admission controller that caps
+    concurrency and queues the excess by priority, and rate-limited calls are
+    retried with jittered backoff within a retry budget.
+    """
     
     def __init__(self):
         """Initialize the Gemini service."""
@@ -22,18 +39,36 @@ class GeminiService:
         """Get the system message for the chat."""
         return self._system_message
     
-    def create_messages(self, history: List[dict], context: str = "") -> List[SystemMessage | HumanMessage | AIMessage]:
+    def create_messages(
+        self,
+        history: List[dict],
+        context: str = "",
+        query_embedding: Optional[List[float]] = None
+    ) -> List[SystemMessage | HumanMessage | AIMessage]:
         """
         Create a list of messages for the LLM from chat history and context.
         
+        Long conversations are windowed: older turns are replaced by a cached
+        rolling summary once the history exceeds ``HISTORY_TOKEN_BUDGET``.
+        
         Args:
             history: List of chat messages.
             context: Optional context to include in the messages.
-            
+            query_embedding: Optional embedding of the current question. With
+                ``BIO_SECTIONING_ENABLED``, the system prompt then carries only
+                the bio sections relevant to it.
+                
         Returns:
             List of formatted messages for the LLM.
         """
         messages = [self._system_message]
+        if settings.BIO_SECTIONING_ENABLED and query_embedding is not None:
+            prompt = bio_sections.build_prompt(query_embedding)
+            if prompt is not None:
+                messages = [SystemMessage(content=prompt)]
+        summary, history = history_manager.window(history, self.summarize_history)
+        if summary:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
         
         for msg in history:
             role = msg.get("role")
@@ -60,8 +95,173 @@ class GeminiService:
         Returns:
             The generated response text.
         """
-        response = self._model.invoke(messages)
+        messages, kwargs = self._use_prompt_cache(messages)
+        response = self._model.invoke(messages, **kwargs)
+        return response.content
+    
+    async def agenerate_response(
+        self,
+        messages: List[SystemMessage | HumanMessage | AIMessage],
+        priority: Priority = Priority.CHAT,
+        queue_timeout: Optional[float] = None
+    ) -> str:
+        """
+        Asynchronously generate a response from the LLM.
+        
+        Args:
+            messages: List of messages to send to the LLM.
+            priority: Priority class of the call.
+            queue_timeout: Seconds the call may wait for a slot, defaulting
+                to ``GEMINI_QUEUE_TIMEOUT``.
+                
+        Returns:
+            The generated response text.
+            
+        Raises:
+            AdmissionRejected: If the call was not admitted.
+        """
+        messages, kwargs = self._use_prompt_cache(messages)
+        async with gemini_admission.slot(priority, queue_timeout):
+            response = await self._with_retries(lambda: self._model.ainvoke(messages, **kwargs))
+        return response.content
+    
+    async def summarize_history(self, summary: str, history: List[dict]) -> str:
+        """
+        Extend a rolling conversation summary with the next messages.
+        
+        Args:
+            summary: Summary of the conversation so far, or empty.
+            history: The messages that follow the summarized part.
+            
+        Returns:
+            The updated summary.
+        """
+        transcript = "\n".join(f"{msg.get('role')}: {msg.get('content')}" for msg in history)
+        messages = [
+            SystemMessage(content=(
+                "You maintain a running summary of a conversation between a user and an assistant "
+                "on a personal website. Update the summary with the new messages. Keep names, "
+                "projects, technical terms and open questions; drop pleasantries. "
+                "Answer with the summary only, in at most 150 words."
+            )),
+            HumanMessage(content=f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}")
+        ]
+        async with gemini_admission.slot(Priority.BACKGROUND):
+            response = await self._with_retries(lambda: self._model.ainvoke(messages))
         return response.content
+    
+    async def stream_response(
+        self,
+        messages: List[SystemMessage | HumanMessage | AIMessage],
+        priority: Priority = Priority.CHAT,
+        reservation: Optional[Reservation] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM as tokens are produced.
+        
+        Records time-to-first-token and inter-token latency for every request.
+        Gemini streams in chunks of a few tokens, so each yielded string is
+        one streamed chunk. A rate-limited stream is only retried before its
+        first chunk.
+        
+        Args:
+            messages: List of messages to send to the LLM.
+            priority: Priority class of the call.
+            reservation: Admission slot reserved for the call by the request.
+            
+        Yields:
+            Text chunks of the generated response.
+            
+        Raises:
+            AdmissionRejected: If the call was not admitted.
+        """
+        messages, kwargs = self._use_prompt_cache(messages)
+        start = time.perf_counter()
+        last_token_at = None
+        chunks = 0
+        async with gemini_admission.slot(priority, reservation=reservation):
+            gemini_retry_budget.deposit()
+            attempt = 0
+            while True:
+                try:
+                    async for chunk in self._model.astream(messages, **kwargs):
+                        if not chunk.content:
+                            continue
+                        now = time.perf_counter()
+                        if last_token_at is None:
+                            metrics_service.observe("gemini.time_to_first_token_ms", (now - start) * 1000)
+                        else:
+                            metrics_service.observe("gemini.inter_token_latency_ms", (now - last_token_at) * 1000)
+                        last_token_at = now
+                        chunks += 1
+                        yield chunk.content
+                    break
+                except Exception as e:
+                    if last_token_at is not None or not await self._retry_after(e, attempt):
+                        raise
+                    attempt += 1
+        metrics_service.observe("gemini.stream_duration_ms", (time.perf_counter() - start) * 1000)
+        metrics_service.increment("gemini.streamed_chunks", chunks)
+    
+    async def _with_retries(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a model call, retrying it while it is rate limited and the budget allows."""
+        gemini_retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                if not await self._retry_after(e, attempt):
+                    raise
+                attempt += 1
+    
+    async def _retry_after(self, error: Exception, attempt: int) -> bool:
+        """
+        Back off before retrying a failed call, if it should be retried.
+        
+        Args:
+            error: The error the call failed with.
+            attempt: Number of retries already made.
+            
+        Returns:
+            True after backing off if the call should be retried.
+        """
+        if not is_rate_limited(error):
+            return False
+        metrics_service.increment("gemini.rate_limited")
+        if attempt >= settings.GEMINI_MAX_RETRIES or not gemini_retry_budget.withdraw():
+            metrics_service.increment("gemini.retries_exhausted")
+            return False
+        metrics_service.increment("gemini.retries")
+        await asyncio.sleep(backoff_delay(attempt, settings.GEMINI_RETRY_BASE_DELAY, settings.GEMINI_RETRY_MAX_DELAY))
+        return True
+    
+    def _use_prompt_cache(
+        self,
+        messages: List[SystemMessage | HumanMessage | AIMessage]
+    ) -> Tuple[List[SystemMessage | HumanMessage | AIMessage], Dict[str, Any]]:
+        """
+        Reference the cached system prompt instead of sending it, when available.
+        
+        Gemini rejects a system instruction alongside cached content, so any
+        other system messages (such as a history summary) are sent as user
+        turns.
+        
+        Args:
+            messages: Messages starting with the system prompt.
+            
+        Returns:
+            The messages to send and extra keyword arguments for the model call.
+        """
+        cached_content = prompt_cache.current()
+        if cached_content is None or not messages or messages[0] is not self._system_message:
+            return messages, {}
+        metrics_service.increment("gemini.prompt_cache_hits")
+        metrics_service.increment("gemini.prompt_tokens_avoided", prompt_cache.prompt_tokens)
+        return [
+            HumanMessage(content=message.content) if isinstance(message, SystemMessage) else message
+            for message in messages[1:]
+        ], {"cached_content": cached_content}
 
 # Create a global Gemini service instance
 gemini_service = GeminiService() 
\ No newline at end of file
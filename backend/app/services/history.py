@@ -0,0 +1,136 @@
+"""
+History manager for keeping the conversation in the prompt within a token budget.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from cachetools import TTLCache
+from app.config import settings
+from app.services.metrics import metrics_service
+from app.services.tokenizer import tokenizer_service
+
+# Produces a new rolling summary from the previous one and the next block of messages
+Summarizer = Callable[[str, List[dict]], Awaitable[str]]
+
+class HistoryManager:
+    """
+    Replaces older turns of long conversations with a rolling summary.
+    
+    The last ``HISTORY_WINDOW_MESSAGES`` messages are always kept verbatim.
+    Older messages are summarized in blocks of ``HISTORY_SUMMARY_BLOCK``
+    messages: the summary of a prefix extends the summary of the prefix one
+    block shorter, and is cached by a hash of the prefix. Because the frontend
+    resends the whole conversation, every later turn finds the same prefixes
+    and reuses their summaries.
+    
+    Summaries are produced in the background, never on the request path: a
+    request uses the longest prefix already summarized and keeps the rest of
+    the conversation verbatim.
+    """
+    
+    def __init__(self):
+        """Initialize the history manager with an empty summary cache."""
+        self._summaries = TTLCache(
+            maxsize=settings.HISTORY_SUMMARY_CACHE_SIZE,
+            ttl=settings.HISTORY_SUMMARY_TTL
+        )
+        self._lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def window(self, history: List[dict], summarize: Summarizer) -> Tuple[Optional[str], List[dict]]:
+        """
+        Fit a conversation into the history token budget.
+        
+        Args:
+            history: The full conversation, oldest message first.
+            summarize: Coroutine function used to extend a summary by a block
+                of messages, run in the background when a summary is missing.
+                
+        Returns:
+            The summary of the dropped prefix (None if nothing was dropped)
+            and the messages to send verbatim.
+        """
+        if not settings.HISTORY_WINDOW_ENABLED or len(history) <= settings.HISTORY_WINDOW_MESSAGES:
+            return None, history
+        tokens = [tokenizer_service.count(msg.get("content") or "") for msg in history]
+        total_tokens = sum(tokens)
+        if total_tokens <= settings.HISTORY_TOKEN_BUDGET:
+            return None, history
+        
+        block = settings.HISTORY_SUMMARY_BLOCK
+        older = len(history) - settings.HISTORY_WINDOW_MESSAGES
+        target = older - older % block
+        if target == 0:
+            return None, history
+        keys = self._prefix_keys(history, target)
+        boundary, summary = self._longest_summary(keys, target)
+        if boundary < target:
+            metrics_service.increment("history.summary_cache_misses")
+            self._schedule(history, keys, target, summarize)
+        else:
+            metrics_service.increment("history.summary_cache_hits")
+        if boundary == 0:
+            return None, history
+        
+        kept_tokens = tokenizer_service.count(summary) + sum(tokens[boundary:])
+        saved = max(total_tokens - kept_tokens, 0)
+        metrics_service.observe("history.prompt_tokens_saved", saved)
+        metrics_service.increment("history.prompt_tokens_saved_total", saved)
+        return summary, history[boundary:]
+    
+    def _longest_summary(self, keys: List[str], target: int) -> Tuple[int, str]:
+        """Find the longest cached summary of a prefix of at most ``target`` messages."""
+        block = settings.HISTORY_SUMMARY_BLOCK
+        with self._lock:
+            for boundary in range(target, 0, -block):
+                summary = self._summaries.get(keys[boundary])
+                if summary is not None:
+                    return boundary, summary
+        return 0, ""
+    
+    def _schedule(self, history: List[dict], keys: List[str], target: int, summarize: Summarizer) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        with self._lock:
+            if keys[target] in self._pending:
+                return
+            self._pending.add(keys[target])
+        task = loop.create_task(self._summarize_to(list(history[:target]), keys, target, summarize))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _summarize_to(self, history: List[dict], keys: List[str], target: int, summarize: Summarizer) -> None:
+        """Extend the longest cached summary block by block up to ``target`` messages."""
+        block = settings.HISTORY_SUMMARY_BLOCK
+        try:
+            boundary, summary = self._longest_summary(keys, target)
+            while boundary < target:
+                summary = await summarize(summary, history[boundary:boundary + block])
+                boundary += block
+                with self._lock:
+                    self._summaries[keys[boundary]] = summary
+                metrics_service.increment("history.summaries_generated")
+        except Exception as e:
+            print(f"History summarization failed: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(keys[target])
+    
+    @staticmethod
+    def _prefix_keys(history: List[dict], length: int) -> List[str]:
+        """Chained hashes, where ``keys[i]`` identifies the first ``i`` messages."""
+        digest = hashlib.sha256(settings.SYSTEM_PROMPT.encode())
+        keys = [digest.hexdigest()]
+        for msg in history[:length]:
+            digest.update(json.dumps([msg.get("role"), msg.get("content")]).encode())
+            keys.append(digest.copy().hexdigest())
+        return keys
+
+# Create a global history manager instance
+history_manager = HistoryManager()
@@ -0,0 +1,241 @@
+"""
+BM25 inverted index over chunk text, built at ingestion time.
+"""
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+from app.config import settings
+
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Identifiers such as "emf-ellipse", "Recursive-QA" or "gemini-2.0" are kept
+# whole as well as split into their parts.
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+TOKEN_SEPARATORS = re.compile(r"[-_.]")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or that the this "
+    "to was were what when where which who why with you your".split()
+)
+
+def tokenize(text: str) -> Iterator[str]:
+    """
+    Split text into lowercase BM25 terms.
+    
+    Compound identifiers yield the whole token, its parts and the parts
+    joined together, so "Recursive-QA" matches "recursive qa" as well as
+    "RecursiveQA".
+    
+    Args:
+        text: The text to tokenize.
+        
+    Returns:
+        Iterator over the terms of the text.
+    """
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        parts = TOKEN_SEPARATORS.split(token)
+        if len(parts) > 1:
+            yield token
+            yield "".join(parts)
+        for part in parts:
+            if part not in STOPWORDS:
+                yield part
+
+class LexicalIndex:
+    """
+    BM25 index over the ``text`` metadata of the ingested chunks.
+    
+    Documents share ids with the vector store, so lexical and dense matches
+    of the same chunk fuse into one result. On disk, documents are stored
+    once and postings refer to them by position.
+    """
+    
+    def __init__(self, path: Optional[str] = settings.LEXICAL_INDEX_PATH):
+        """
+        Initialize the index, loading it from disk if it exists.
+        
+        Args:
+            path: Path of the JSON index file, or None/empty for a
+                non-persistent index.
+        """
+        self._path = path
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        # BM25 length normalization per document, recomputed after writes
+        self._norms: Optional[Dict[str, float]] = None
+        if path and os.path.exists(path):
+            self._load(path)
+    
+    def __len__(self) -> int:
+        return len(self._metadata)
+    
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        """
+        Index or re-index documents.
+        
+        Args:
+            vectors: Vectors as written to the vector store; only their id and
+                metadata (``text`` in particular) are used.
+                
+        Returns:
+            The number of documents indexed.
+        """
+        for vector in vectors:
+            vector_id = vector["id"]
+            metadata = vector.get("metadata", {})
+            self._remove(vector_id)
+            terms = Counter(tokenize(metadata.get("text", "")))
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[vector_id] = tf
+            self._metadata[vector_id] = metadata
+            self._lengths[vector_id] = sum(terms.values())
+            self._total_length += self._lengths[vector_id]
+        self._norms = None
+        return len(vectors)
+    
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False) -> None:
+        """
+        Remove documents by id, or every document.
+        
+        Args:
+            ids: Ids of the documents to remove.
+            delete_all: Remove every document instead of specific ids.
+        """
+        if delete_all:
+            self._metadata, self._lengths, self._postings = {}, {}, {}
+            self._total_length = 0
+            self._norms = None
+            return
+        for vector_id in ids or []:
+            self._remove(vector_id)
+        self._norms = None
+    
+    def search(self, text: str, top_k: int = settings.TOP_K) -> Dict[str, Any]:
+        """
+        Rank documents against a query with BM25.
+        
+        Args:
+            text: The query text.
+            top_k: Number of results to return.
+            
+        Returns:
+            Dictionary containing the query results, shaped like a Pinecone response.
+        """
+        if not self._metadata or top_k <= 0:
+            return {"matches": []}
+        n_docs = len(self._metadata)
+        if self._norms is None:
+            average_length = self._total_length / n_docs or 1.0
+            self._norms = {
+                vector_id: BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                for vector_id, length in self._lengths.items()
+            }
+        norms = self._norms
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(text)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for vector_id, tf in postings.items():
+                scores[vector_id] = scores.get(vector_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norms[vector_id])
+        ranked = heapq.nlargest(top_k, scores, key=scores.get)
+        return {
+            "matches": [
+                {"id": vector_id, "score": scores[vector_id], "metadata": self._metadata[vector_id]}
+                for vector_id in ranked
+            ]
+        }
+    
+    def save(self) -> None:
+        """Write the index to disk, replacing the previous file atomically."""
+        if not self._path:
+            return
+        ids = list(self._metadata)
+        positions = {vector_id: position for position, vector_id in enumerate(ids)}
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self._path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": ids,
+                    "metadata": [self._metadata[vector_id] for vector_id in ids],
+                    "lengths": [self._lengths[vector_id] for vector_id in ids],
+                    # Flattened [position, tf, position, tf, ...] per term
+                    "postings": {
+                        term: [value for vector_id, tf in postings.items() for value in (positions[vector_id], tf)]
+                        for term, postings in self._postings.items()
+                    }
+                },
+                f
+            )
+        os.replace(f"{self._path}.tmp", self._path)
+    
+    def _load(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        ids = data["ids"]
+        self._metadata = dict(zip(ids, data["metadata"]))
+        self._lengths = dict(zip(ids, data["lengths"]))
+        self._total_length = sum(self._lengths.values())
+        self._norms = None
+        self._postings = {
+            term: {ids[flat[i]]: flat[i + 1] for i in range(0, len(flat), 2)}
+            for term, flat in data["postings"].items()
+        }
+    
+    def _remove(self, vector_id: str) -> None:
+        metadata = self._metadata.pop(vector_id, None)
+        if metadata is None:
+            return
+        self._total_length -= self._lengths.pop(vector_id)
+        for term in set(tokenize(metadata.get("text", ""))):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(vector_id, None)
+                if not postings:
+                    del self._postings[term]
+
+def reciprocal_rank_fusion(
+    results: List[Dict[str, Any]],
+    top_k: int = settings.TOP_K,
+    k: int = settings.RRF_K
+) -> Dict[str, Any]:
+    """
+    Merge ranked result lists with reciprocal rank fusion.
+    
+    Each match scores ``1 / (k + rank)`` in every list it appears in, so the
+    fusion needs no calibration between BM25 and cosine scores. Vector
+    values are kept from whichever list returned them.
+    
+    Args:
+        results: Query results shaped like Pinecone responses.
+        top_k: Number of fused results to return.
+        k: Rank offset; higher values flatten the contribution of top ranks.
+        
+    Returns:
+        Dictionary containing the fused results, shaped like a Pinecone response.
+    """
+    scores: Dict[str, float] = {}
+    fused: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        for rank, match in enumerate(result.get("matches", []), start=1):
+            match_id = match.get("id")
+            scores[match_id] = scores.get(match_id, 0.0) + 1.0 / (k + rank)
+            entry = fused.setdefault(match_id, {"id": match_id, "metadata": match.get("metadata", {})})
+            if "values" not in entry and match.get("values"):
+                entry["values"] = match.get("values")
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return {"matches": [{**fused[match_id], "score": scores[match_id]} for match_id in ranked]}
+
+# Create a global lexical index instance
+lexical_index = LexicalIndex()
@@ -0,0 +1,318 @@
+"""
+In-memory vector store for serving retrieval from an in-process index.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from app.config import settings
+from app.services.ann import IVFFlatIndex
+from app.services.vector_store import VectorStore
+
+class _Namespace:
+    """Rows of one namespace: vectors, ids, metadata and an optional ANN index."""
+    
+    def __init__(self, vectors: np.ndarray, ids: List[str], metadata: List[Dict[str, Any]]):
+        # ``vectors`` may be a read-only memory-mapped slice and may have
+        # spare capacity beyond ``size`` rows.
+        self.vectors = vectors
+        self.size = len(ids)
+        self.ids: List[Optional[str]] = list(ids)
+        self.metadata: List[Optional[Dict[str, Any]]] = list(metadata)
+        self.rows = {vector_id: row for row, vector_id in enumerate(ids)}
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.ann: Optional[IVFFlatIndex] = None
+    
+    def writable(self, capacity: int) -> None:
+        """Copy the rows into a writable in-memory array with room for ``capacity`` rows."""
+        if self.vectors.flags.writeable and len(self.vectors) >= capacity:
+            return
+        new_capacity = max(capacity, 2 * len(self.vectors), 64)
+        vectors = np.empty((new_capacity, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self.size] = self.alive[:self.size]
+        self.vectors, self.alive = vectors, alive
+
+class InMemoryVectorStore(VectorStore):
+    """
+    Vector store that keeps every namespace in process memory.
+    
+    A snapshot is a pre-normalized float32 matrix (``<path>.npy``) that is
+    memory-mapped, plus ids, metadata and namespace row ranges
+    (``<path>.json``). Rows are grouped by namespace so a query scores one
+    contiguous slice of the matrix without copying it. Writes copy the
+    affected namespace into memory; deleted rows are tombstoned until
+    ``flush`` compacts them and rewrites the snapshot.
+    
+    With ``LOCAL_INDEX_TYPE=ivf`` each namespace is searched through an
+    IVF-flat approximate index instead, persisted next to the snapshot as
+    ``<path>.<namespace>.ivf.npz`` and rebuilt when it no longer matches.
+    Upserts are inserted into it incrementally, and ``flush`` saves it with
+    the snapshot instead of retraining it.
+    """
+    
+    def __init__(self, snapshot_path: Optional[str] = settings.LOCAL_INDEX_PATH):
+        """
+        Initialize the store, loading the snapshot if one exists.
+        
+        Args:
+            snapshot_path: Snapshot path without the .npy/.json extension, or
+                None for a non-persistent store.
+        """
+        if settings.LOCAL_INDEX_TYPE not in ("exact", "ivf"):
+            raise ValueError(f"Unknown LOCAL_INDEX_TYPE: {settings.LOCAL_INDEX_TYPE}")
+        self._snapshot_path = snapshot_path
+        self._namespaces: Dict[str, _Namespace] = {}
+        if snapshot_path and os.path.exists(f"{snapshot_path}.npy"):
+            self._load(snapshot_path)
+    
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "docs") -> int:
+        """
+        Insert or overwrite vectors.
+        
+        Args:
+            vectors: Vectors with id, values and metadata.
+            namespace: The namespace to write to.
+            
+        Returns:
+            The number of vectors upserted.
+        """
+        if not vectors:
+            return 0
+        matrix = self._normalize(np.asarray([v["values"] for v in vectors], dtype=np.float32))
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            ns = self._namespaces[namespace] = _Namespace(
+                np.empty((0, matrix.shape[1]), dtype=np.float32), [], []
+            )
+        ns.writable(ns.size + len(vectors))
+        
+        changed_rows = []
+        for vector, values in zip(vectors, matrix):
+            row = ns.rows.get(vector["id"])
+            if row is None:
+                row = ns.size
+                ns.size += 1
+                ns.ids.append(vector["id"])
+                ns.metadata.append(None)
+                ns.rows[vector["id"]] = row
+            ns.vectors[row] = values
+            ns.metadata[row] = vector.get("metadata", {})
+            ns.alive[row] = True
+            changed_rows.append(row)
+        
+        if ns.ann is not None:
+            rows = np.unique(changed_rows)
+            ns.ann.remove(rows)
+            ns.ann.add(ns.vectors[rows], rows)
+        return len(vectors)
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = settings.TOP_K,
+        namespace: str = "docs",
+        include_values: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Find the most similar vectors by cosine similarity.
+        
+        Args:
+            vector: The query vector to search for.
+            top_k: Number of results to return.
+            namespace: The namespace to search in.
+            include_values: Include the matched (normalized) vectors in the results.
+            
+        Returns:
+            Dictionary containing the query results, shaped like a Pinecone response.
+        """
+        ns = self._namespaces.get(namespace)
+        if ns is None or ns.size == 0 or top_k <= 0:
+            return {"matches": []}
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        if ns.ann is not None:
+            top, top_scores = ns.ann.search(query, top_k)
+        else:
+            scores = ns.vectors[:ns.size] @ query
+            if not ns.alive[:ns.size].all():
+                scores[~ns.alive[:ns.size]] = -np.inf
+            k = min(top_k, ns.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            top_scores = scores[top]
+        matches = []
+        for row, score in zip(top, top_scores):
+            if not np.isfinite(score):
+                continue
+            match = {"id": ns.ids[row], "score": float(score), "metadata": ns.metadata[row]}
+            if include_values:
+                match["values"] = ns.vectors[row].tolist()
+            matches.append(match)
+        return {"matches": matches}
+    
+    async def aquery(
+        self,
+        vector: List[float],
+        top_k: int = settings.TOP_K,
+        namespace: str = "docs",
+        include_values: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Query the store from async code.
+        
+        The search is a single in-memory matrix-vector product, so it runs
+        inline rather than in a thread.
+        
+        Args:
+            vector: The query vector to search for.
+            top_k: Number of results to return.
+            namespace: The namespace to search in.
+            include_values: Include the matched vectors in the results.
+            
+        Returns:
+            Dictionary containing the query results.
+        """
+        return self.query(vector, top_k=top_k, namespace=namespace, include_values=include_values)
+    
+    def delete(self, ids: Optional[List[str]] = None, namespace: str = "docs", delete_all: bool = False) -> None:
+        """
+        Delete vectors by id, or every vector in a namespace.
+        
+        Args:
+            ids: Ids of the vectors to delete.
+            namespace: The namespace to delete from.
+            delete_all: Delete the whole namespace instead of specific ids.
+        """
+        if delete_all:
+            self._namespaces.pop(namespace, None)
+            return
+        ns = self._namespaces.get(namespace)
+        if ns is None or not ids:
+            return
+        rows = [ns.rows.pop(vector_id) for vector_id in ids if vector_id in ns.rows]
+        if not rows:
+            return
+        ns.writable(ns.size)
+        ns.alive[rows] = False
+        for row in rows:
+            ns.ids[row] = None
+            ns.metadata[row] = None
+        if ns.ann is not None:
+            ns.ann.remove(np.asarray(rows))
+    
+    def namespace_stats(self) -> Dict[str, int]:
+        """
+        Count the vectors in each namespace.
+        
+        Returns:
+            Dictionary mapping namespace names to vector counts.
+        """
+        return {name: len(ns.rows) for name, ns in self._namespaces.items()}
+    
+    def flush(self) -> None:
+        """Compact deleted rows and rewrite the snapshot (and IVF indexes)."""
+        if not self._snapshot_path:
+            return
+        ids, vectors, metadata, namespaces = [], [], [], []
+        indexes: Dict[str, IVFFlatIndex] = {}
+        for name, ns in self._namespaces.items():
+            live = np.flatnonzero(ns.alive[:ns.size])
+            ids.extend(ns.ids[row] for row in live)
+            vectors.append(ns.vectors[live])
+            metadata.extend(ns.metadata[row] for row in live)
+            namespaces.extend([name] * len(live))
+            if ns.ann is not None:
+                # Keep the incrementally updated index, renumbered to the compacted rows
+                new_rows = np.full(ns.size, -1, dtype=np.int64)
+                new_rows[live] = np.arange(len(live))
+                ns.ann.renumber(new_rows)
+                indexes[name] = ns.ann
+        matrix = np.concatenate(vectors) if vectors else np.empty((0, settings.EMBEDDING_DIMENSION), dtype=np.float32)
+        self.save_snapshot(self._snapshot_path, ids, matrix, metadata, namespaces)
+        # Written after the snapshot, so loading finds them up to date
+        for name, index in indexes.items():
+            index.save(f"{self._snapshot_path}.{name}.ivf.npz")
+        self._load(self._snapshot_path)
+    
+    def _load(self, snapshot_path: str) -> None:
+        """Memory-map a snapshot and load or build its IVF indexes."""
+        vectors = np.load(f"{snapshot_path}.npy", mmap_mode="r")
+        with open(f"{snapshot_path}.json", "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        self._namespaces = {}
+        for name, (start, end) in snapshot["namespaces"].items():
+            self._namespaces[name] = _Namespace(
+                vectors[start:end], snapshot["ids"][start:end], snapshot["metadata"][start:end]
+            )
+            if settings.LOCAL_INDEX_TYPE == "ivf":
+                self._namespaces[name].ann = self._load_ann(snapshot_path, name)
+    
+    def _load_ann(self, snapshot_path: str, namespace: str) -> IVFFlatIndex:
+        """Load the namespace's IVF index, or build and persist it if missing or stale."""
+        ns = self._namespaces[namespace]
+        path = f"{snapshot_path}.{namespace}.ivf.npz"
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(f"{snapshot_path}.npy"):
+            index = IVFFlatIndex.load(path)
+            if len(index) == ns.size:
+                index.nprobe = settings.LOCAL_INDEX_NPROBE
+                return index
+        vectors = ns.vectors[:ns.size]
+        index = IVFFlatIndex.train(
+            vectors,
+            n_lists=settings.LOCAL_INDEX_NLIST or None,
+            nprobe=settings.LOCAL_INDEX_NPROBE
+        )
+        index.add(vectors, np.arange(ns.size))
+        index.save(path)
+        return index
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+    
+    @staticmethod
+    def save_snapshot(
+        snapshot_path: str,
+        ids: List[str],
+        vectors: List[List[float]],
+        metadata: List[Dict[str, Any]],
+        namespaces: List[str]
+    ) -> None:
+        """
+        Write an index snapshot, normalizing vectors and grouping rows by namespace.
+        
+        Args:
+            snapshot_path: Snapshot path without the .npy/.json extension.
+            ids: Vector ids.
+            vectors: Vector values, one row per id.
+            metadata: Metadata for each vector.
+            namespaces: Namespace of each vector.
+        """
+        order = sorted(range(len(ids)), key=lambda i: namespaces[i])
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1 if ids else settings.EMBEDDING_DIMENSION)[order]
+        matrix = InMemoryVectorStore._normalize(matrix)
+        
+        bounds: Dict[str, List[int]] = {}
+        for row, i in enumerate(order):
+            bounds.setdefault(namespaces[i], [row, row])[1] = row + 1
+        
+        directory = os.path.dirname(snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to temporary files and rename, so a live memory map of the
+        # previous snapshot is never truncated underneath a reader.
+        np.save(f"{snapshot_path}.tmp.npy", matrix)
+        with open(f"{snapshot_path}.tmp.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": [ids[i] for i in order],
+                    "metadata": [metadata[i] for i in order],
+                    "namespaces": bounds
+                },
+                f
+            )
+        os.replace(f"{snapshot_path}.tmp.npy", f"{snapshot_path}.npy")
+        os.replace(f"{snapshot_path}.tmp.json", f"{snapshot_path}.json")
\ No newline at end of file
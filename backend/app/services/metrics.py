@@ -0,0 +1,90 @@
+"""
+Metrics service for in-process counters, gauges and latency distributions.
+"""
+import threading
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict
+
+import numpy as np
+from app.config import settings
+
+class MetricsService:
+    """Service for recording and summarizing application metrics."""
+    
+    def __init__(self, window: int = settings.METRICS_WINDOW):
+        """
+        Initialize the metrics service.
+        
+        Args:
+            window: Number of most recent observations kept per distribution.
+        """
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._observations: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._observation_counts: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+    
+    def increment(self, name: str, value: float = 1.0) -> None:
+        """
+        Increment a counter.
+        
+        Args:
+            name: The counter name.
+            value: Amount to add to the counter.
+        """
+        with self._lock:
+            self._counters[name] += value
+    
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Set a gauge to its current value.
+        
+        Args:
+            name: The gauge name.
+            value: The current value.
+        """
+        with self._lock:
+            self._gauges[name] = value
+    
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record an observation in a distribution, such as a latency.
+        
+        Args:
+            name: The distribution name.
+            value: The observed value.
+        """
+        with self._lock:
+            self._observations[name].append(value)
+            self._observation_counts[name] += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize all recorded metrics.
+        
+        Returns:
+            Dictionary with counters, gauges and per-distribution summaries
+            (count, mean and p50/p90/p99 over the recent window).
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            observations = {name: list(values) for name, values in self._observations.items()}
+            counts = dict(self._observation_counts)
+        
+        distributions = {}
+        for name, values in observations.items():
+            if not values:
+                continue
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            distributions[name] = {
+                "count": counts[name],
+                "mean": float(np.mean(values)),
+                "p50": float(p50),
+                "p90": float(p90),
+                "p99": float(p99)
+            }
+        return {"counters": counters, "gauges": gauges, "distributions": distributions}
+
+# Create a global metrics service instance
+metrics_service = MetricsService()
@@ -0,0 +1,99 @@
+"""
+Micro-batching of concurrent requests into single batched calls.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from app.services.metrics import metrics_service
+
+# Runs one batch, returning one result per item in order
+BatchFunction = Callable[[List[Any]], Awaitable[List[Any]]]
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into batches and runs each batch in one call.
+    
+    The first request of a batch opens a window of ``max_wait`` seconds;
+    the batch is dispatched when the window closes or as soon as it holds
+    ``max_batch_size`` requests. Each caller awaits a future resolved with
+    its own result, or with the batch's exception. A caller that is
+    cancelled while queued is left out of its batch, and one cancelled while
+    the batch runs just does not receive its result.
+    
+    Batches run concurrently with each other; the window only bounds how
+    long a request waits for company.
+    """
+    
+    def __init__(self, name: str, run_batch: BatchFunction, max_batch_size: int, max_wait: float):
+        """
+        Initialize an idle batcher.
+        
+        Args:
+            name: Prefix of the batcher's metrics.
+            run_batch: Coroutine function running a batch.
+            max_batch_size: Largest number of requests per batch.
+            max_wait: Longest time the first request of a batch waits, in seconds.
+        """
+        self._name = name
+        self._run_batch = run_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._queue: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+    
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue a request and wait for its result.
+        
+        Args:
+            item: The request, passed to the batch function.
+            
+        Returns:
+            The batch function's result for the request.
+            
+        Raises:
+            Exception: Whatever the batch function raised.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((item, future, time.perf_counter()))
+        if len(self._queue) >= self._max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._max_wait, self._dispatch)
+        return await future
+    
+    def _dispatch(self) -> None:
+        """Start a batch with the queued requests still waiting for a result."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = [entry for entry in self._queue[:self._max_batch_size] if not entry[1].done()]
+        self._queue = self._queue[self._max_batch_size:]
+        if self._queue:
+            # Requests beyond a full batch start the next window
+            self._timer = asyncio.get_running_loop().call_later(self._max_wait, self._dispatch)
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        metrics_service.increment(f"{self._name}.batches")
+        metrics_service.observe(f"{self._name}.batch_size", len(batch))
+        for _, _, queued_at in batch:
+            metrics_service.observe(f"{self._name}.batch_queue_delay_ms", (started - queued_at) * 1000)
+        try:
+            results = await self._run_batch([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,140 @@
+"""
+Local CPU embedding engine running a quantized ONNX export of the embedding model.
+"""
+import asyncio
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+from app.config import settings
+
+class OnnxEmbeddings:
+    """
+    Sentence embeddings from an exported int8 ONNX graph, computed in process.
+    
+    Reproduces the sentence-transformers pipeline of ``EMBEDDING_MODEL``:
+    the model's own tokenizer, the transformer, mean pooling over the
+    attention mask and L2 normalization. The graph is a file of the model's
+    Hugging Face repo (which ships int8 exports of all-MiniLM-L6-v2) or a
+    local path, such as one written by
+    ``python -m app.scripts.benchmark_onnx_embeddings --export``.
+    
+    The tokenizer and the ONNX session are loaded once, lazily or through
+    ``load`` at startup. Calls are CPU-bound and release the GIL inside
+    onnxruntime, so the async methods run them in a worker thread.
+    """
+    
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        model_file: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        threads: Optional[int] = None
+    ):
+        """
+        Initialize the engine without loading the model.
+        
+        Args:
+            model_name: Hugging Face repo of the model, defaults to ``EMBEDDING_MODEL``.
+            model_file: ONNX graph in the repo or on disk, defaults to ``ONNX_EMBEDDING_FILE``.
+            max_tokens: Longer inputs are truncated, defaults to ``ONNX_EMBEDDING_MAX_TOKENS``.
+            threads: Intra-op threads per call, defaults to ``ONNX_EMBEDDING_THREADS``.
+        """
+        self._model_name = model_name or settings.EMBEDDING_MODEL
+        self._model_file = model_file or settings.ONNX_EMBEDDING_FILE
+        self._max_tokens = max_tokens or settings.ONNX_EMBEDDING_MAX_TOKENS
+        self._threads = settings.ONNX_EMBEDDING_THREADS if threads is None else threads
+        self._tokenizer = None
+        self._session = None
+        self._input_names: List[str] = []
+        self._lock = threading.Lock()
+    
+    def load(self) -> None:
+        """Load the tokenizer and create the ONNX session, if not done yet."""
+        if self._session is not None:
+            return
+        with self._lock:
+            if self._session is not None:
+                return
+            # Optional dependencies, only needed for the onnx backend
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+            
+            if os.path.isfile(self._model_file):
+                model_path = self._model_file
+                tokenizer_path = os.path.join(os.path.dirname(model_path), "tokenizer.json")
+            else:
+                from huggingface_hub import hf_hub_download
+                model_path = hf_hub_download(self._model_name, self._model_file)
+                tokenizer_path = None
+            if tokenizer_path and os.path.isfile(tokenizer_path):
+                tokenizer = Tokenizer.from_file(tokenizer_path)
+            else:
+                tokenizer = Tokenizer.from_pretrained(self._model_name)
+            tokenizer.enable_truncation(max_length=self._max_tokens)
+            pad_id = tokenizer.token_to_id("[PAD]") or 0
+            tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+            
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self._threads
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+            self._input_names = [graph_input.name for graph_input in session.get_inputs()]
+            self._tokenizer = tokenizer
+            self._session = session
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts in one forward pass.
+        
+        Args:
+            texts: The texts to embed.
+            
+        Returns:
+            Array of shape (len(texts), dimension) with unit-length rows.
+        """
+        self.load()
+        encodings = self._tokenizer.encode_batch(texts)
+        features = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+        }
+        token_states = self._session.run(None, {name: features[name] for name in self._input_names})[0]
+        mask = features["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_states * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single text.
+        
+        Args:
+            text: The text to embed.
+            
+        Returns:
+            List of float values representing the embedding.
+        """
+        return self.embed([text])[0].tolist()
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts.
+        
+        Args:
+            texts: The texts to embed.
+            
+        Returns:
+            One embedding per text.
+        """
+        return self.embed(texts).tolist() if texts else []
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a single text in a worker thread."""
+        return await asyncio.to_thread(self.embed_query, text)
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts in a worker thread."""
+        return await asyncio.to_thread(self.embed_documents, texts)
@@ -1,19 +1,60 @@
 """
 Pinecone service for handling vector database operations.
 """
-from typing import List, Dict, Any
-from pinecone import Pinecone
+from typing import List, Dict, Any, Optional
+from pinecone import NotFoundException, Pinecone
 from app.config import settings
+from app.services.vector_store import VectorStore
 
-class PineconeService:
+# Pinecone's recommended maximum number of vectors per upsert request
+UPSERT_BATCH_SIZE = 100
+
+class PineconeService(VectorStore):
     """Service for handling Pinecone vector database operations."""
     
     def __init__(self):
-        """Initialize the Pinecone service."""
+        """
+        Initialize the Pinecone service.
+        
+        Raises:
+            RuntimeError: If the index does not exist. It is created by
+                ``python -m app.ingestion.build_vector_db``, never by serving.
+        """
         self._pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-        self._index = self._pc.Index(settings.PINECONE_API_INDEX)
+        try:
+            self._host = self._pc.describe_index(settings.PINECONE_API_INDEX).host
+        except NotFoundException:
+            raise RuntimeError(
+                f"Pinecone index {settings.PINECONE_API_INDEX!r} does not exist; "
+                "create it with python -m app.ingestion.build_vector_db"
+            )
+        self._index = self._pc.Index(host=self._host)
+        # The asyncio index owns an aiohttp session, so it is created lazily
+        # inside the running event loop on first use.
+        self._async_index = None
+    
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "docs") -> int:
+        """
+        Upsert vectors into the Pinecone index in batches.
+        
+        Args:
+            vectors: Vectors with id, values and metadata.
+            namespace: The namespace to write to.
+            
+        Returns:
+            The number of vectors upserted.
+        """
+        for start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+            self._index.upsert(vectors=vectors[start:start + UPSERT_BATCH_SIZE], namespace=namespace)
+        return len(vectors)
     
-    def query(self, vector: List[float], top_k: int = settings.TOP_K, namespace: str = "docs") -> Dict[str, Any]:
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = settings.TOP_K,
+        namespace: str = "docs",
+        include_values: bool = False
+    ) -> Dict[str, Any]:
         """
         Query the Pinecone index for similar vectors.
         
@@ -21,6 +62,7 @@ class PineconeService:
             vector: The query vector to search for.
             top_k: Number of results to return.
             namespace: The namespace to search in.
+            include_values: Include the matched vectors in the results.
             
         Returns:
             Dictionary containing the query results.
@@ -29,26 +71,72 @@ class PineconeService:
             vector=vector,
             top_k=top_k,
             namespace=namespace,
-            include_metadata=True
+            include_metadata=True,
+            include_values=include_values
         )
     
-    def get_context(self, query_result: Dict[str, Any]) -> str:
+    async def aquery(
+        self,
+        vector: List[float],
+        top_k: int = settings.TOP_K,
+        namespace: str = "docs",
+        include_values: bool = False
+    ) -> Dict[str, Any]:
         """
-        Extract context from Pinecone query results.
+        Asynchronously query the Pinecone index for similar vectors.
         
         Args:
-            query_result: The result from a Pinecone query.
+            vector: The query vector to search for.
+            top_k: Number of results to return.
+            namespace: The namespace to search in.
+            include_values: Include the matched vectors in the results.
             
         Returns:
-            Concatenated context string from the results.
-        """
-        context = ""
-        for match in query_result.get("matches", []):
-            metadata = match.get("metadata", {})
-            text = metadata.get("text", "")
-            if text:
-                context += text + "\n\n"
-        return context.strip()
+            Dictionary containing the query results.
+        """
+        if self._async_index is None:
+            self._async_index = self._pc.IndexAsyncio(host=self._host)
+        return await self._async_index.query(
+            vector=vector,
+            top_k=top_k,
+            namespace=namespace,
+            include_metadata=True,
+            include_values=include_values
+        )
+    
+    def delete(self, ids: Optional[List[str]] = None, namespace: str = "docs", delete_all: bool = False) -> None:
+        """
+        Delete vectors by id, or every vector in a namespace.
+        
+        Args:
+            ids: Ids of the vectors to delete.
+            namespace: The namespace to delete from.
+            delete_all: Delete the whole namespace instead of specific ids.
+        """
+        try:
+            if delete_all:
+                self._index.delete(delete_all=True, namespace=namespace)
+            elif ids:
+                self._index.delete(ids=ids, namespace=namespace)
+        except NotFoundException:
+            # Deleting from a namespace that does not exist yet is a no-op
+            pass
+    
+    def namespace_stats(self) -> Dict[str, int]:
+        """
+        Count the vectors in each namespace of the Pinecone index.
+        
+        Returns:
+            Dictionary mapping namespace names to vector counts.
+        """
+        stats = self._index.describe_index_stats()
+        return {name: summary.vector_count for name, summary in stats.namespaces.items()}
+    
+    async def aclose(self) -> None:
+        """Close the asyncio index session, if one was opened."""
+        if self._async_index is not None:
+            await self._async_index.close()
+            self._async_index = None
 
 # Create a global Pinecone service instance
 pinecone_service = PineconeService() 
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Speculative prefetch of retrieval results for suggested follow-up questions.
+"""
+import asyncio
+import threading
+from typing import Awaitable, Callable, List, Optional, Set
+
+from cachetools import TTLCache
+from app.config import settings
+from app.services.admission import gemini_admission
+from app.services.metrics import metrics_service
+from app.services.warm_answers import WarmAnswerStore
+
+# Retrieves the candidate matches for a question
+Retriever = Callable[[str], Awaitable[List[dict]]]
+
+class RetrievalPrefetcher:
+    """
+    Retrieves context for suggested follow-ups before the user clicks them.
+    
+    Suggestions are prefetched in background tasks and the matches are kept
+    for ``PREFETCH_TTL`` seconds, keyed by the normalized suggestion text.
+    Embedding the suggestion also warms the embedding cache, so a clicked
+    suggestion skips both the embedding call and the vector store query.
+    Speculative work is capped at ``PREFETCH_MAX_IN_FLIGHT`` tasks and is
+    dropped entirely while Gemini calls are queueing.
+    """
+    
+    def __init__(self):
+        """Initialize the prefetcher with an empty cache."""
+        self._cache = TTLCache(maxsize=settings.PREFETCH_CACHE_SIZE, ttl=settings.PREFETCH_TTL)
+        self._lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def get(self, question: str) -> Optional[List[dict]]:
+        """
+        Take the prefetched matches for a question.
+        
+        Args:
+            question: The current question.
+            
+        Returns:
+            The prefetched matches, or None if the question was not prefetched.
+        """
+        if not settings.PREFETCH_ENABLED:
+            return None
+        with self._lock:
+            matches = self._cache.get(WarmAnswerStore.normalize(question))
+        metrics_service.increment("prefetch.hits" if matches is not None else "prefetch.misses")
+        return matches
+    
+    def schedule(self, questions: List[str], retriever: Retriever) -> None:
+        """
+        Prefetch the matches for questions the user is likely to ask next.
+        
+        Args:
+            questions: The suggested follow-up questions.
+            retriever: Coroutine function retrieving the matches for a question.
+        """
+        if not settings.PREFETCH_ENABLED:
+            return
+        for question in questions:
+            key = WarmAnswerStore.normalize(question)
+            with self._lock:
+                if not key or key in self._cache or key in self._pending:
+                    continue
+                if len(self._pending) >= settings.PREFETCH_MAX_IN_FLIGHT or gemini_admission.queue_depth:
+                    metrics_service.increment("prefetch.dropped")
+                    continue
+                self._pending.add(key)
+            task = asyncio.create_task(self._prefetch(key, question, retriever))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            metrics_service.increment("prefetch.scheduled")
+    
+    async def _prefetch(self, key: str, question: str, retriever: Retriever) -> None:
+        try:
+            matches = await retriever(question)
+            with self._lock:
+                self._cache[key] = matches
+        except Exception as e:
+            print(f"Prefetch failed for {question!r}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+# Create a global retrieval prefetcher instance
+retrieval_prefetcher = RetrievalPrefetcher()
@@ -0,0 +1,142 @@
+"""
+Prompt cache service for serving the static system prompt from Gemini's context cache.
+"""
+import asyncio
+import hashlib
+import time
+from typing import Optional
+from app.config import settings
+from app.services.metrics import metrics_service
+from app.services.tokenizer import tokenizer_service
+
+# A cache this close to expiry is not handed out, so requests never race its deletion
+MIN_REMAINING_SECONDS = 30.0
+# Delay before retrying after the cache could not be created or refreshed
+RETRY_SECONDS = 60.0
+
+class PromptCacheService:
+    """
+    Keeps ``SYSTEM_PROMPT`` in a Gemini cached content resource.
+    
+    The cache is identified by a display name derived from a hash of the
+    model and the prompt, so a restarted process (or another worker) adopts
+    the existing cache instead of creating a new one, and a changed prompt
+    gets a new cache. A background task creates the cache at startup and
+    extends its TTL before it expires. Until a cache is available, or if
+    caching fails, requests fall back to sending the full prompt.
+    """
+    
+    def __init__(self):
+        """Initialize the prompt cache service without contacting the API."""
+        prompt_hash = hashlib.sha256(f"{settings.GEMINI_MODEL}\n{settings.SYSTEM_PROMPT}".encode()).hexdigest()
+        self._display_name = f"system-prompt-{prompt_hash[:16]}"
+        self._model = f"models/{settings.GEMINI_MODEL}"
+        self._client = None
+        self._name: Optional[str] = None
+        self._expires_at = 0.0
+        self._prompt_tokens: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def prompt_tokens(self) -> int:
+        """Approximate number of tokens in the cached system prompt."""
+        if self._prompt_tokens is not None:
+            return self._prompt_tokens
+        prompt_tokens = tokenizer_service.count(settings.SYSTEM_PROMPT)
+        # Counts before the tokenizer is loaded are estimates, not kept
+        if tokenizer_service.loaded:
+            self._prompt_tokens = prompt_tokens
+        return prompt_tokens
+    
+    def current(self) -> Optional[str]:
+        """
+        Get the cache to reference in a request.
+        
+        Returns:
+            The cached content name, or None if the full prompt must be sent.
+        """
+        if not settings.PROMPT_CACHE_ENABLED or self._name is None:
+            return None
+        if time.time() > self._expires_at - MIN_REMAINING_SECONDS:
+            return None
+        return self._name
+    
+    async def ensure(self) -> bool:
+        """
+        Adopt the existing cache for this prompt, or create it, and extend its TTL.
+        
+        Returns:
+            True if a cache is available.
+        """
+        try:
+            client = self._get_client()
+            if self._name is None:
+                async for cached in await client.list_cached_contents(request={}):
+                    if cached.display_name == self._display_name and cached.model == self._model:
+                        self._name = cached.name
+                        break
+            if self._name is not None:
+                cached = await client.update_cached_content(request={
+                    "cached_content": {"name": self._name, "ttl": {"seconds": int(settings.PROMPT_CACHE_TTL)}},
+                    "update_mask": {"paths": ["ttl"]}
+                })
+                metrics_service.increment("prompt_cache.refreshes")
+            else:
+                cached = await client.create_cached_content(request={
+                    "cached_content": {
+                        "model": self._model,
+                        "display_name": self._display_name,
+                        "system_instruction": {"parts": [{"text": settings.SYSTEM_PROMPT}]},
+                        "ttl": {"seconds": int(settings.PROMPT_CACHE_TTL)}
+                    }
+                })
+                self._name = cached.name
+                metrics_service.increment("prompt_cache.creates")
+            self._expires_at = cached.expire_time.timestamp()
+            return True
+        except Exception as e:
+            # Also covers a cache that expired or was deleted: forget it and
+            # create a new one on the next attempt.
+            print(f"Prompt cache unavailable, sending the full system prompt: {e}")
+            metrics_service.increment("prompt_cache.errors")
+            self._name = None
+            self._expires_at = 0.0
+            return False
+    
+    def start(self) -> None:
+        """Start creating and refreshing the cache in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+    
+    async def stop(self) -> None:
+        """
+        Stop refreshing the cache.
+        
+        The cache itself is left to expire, since other workers may share it.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            if await self.ensure():
+                delay = self._expires_at - time.time() - settings.PROMPT_CACHE_REFRESH_MARGIN
+            else:
+                delay = RETRY_SECONDS
+            await asyncio.sleep(max(delay, 1.0))
+    
+    def _get_client(self):
+        if self._client is None:
+            # Ships with langchain-google-genai; imported lazily since the
+            # cache is optional
+            from google.ai import generativelanguage_v1beta as glm
+            self._client = glm.CacheServiceAsyncClient(client_options={"api_key": settings.GOOGLE_API_KEY})
+        return self._client
+
+# Create a global prompt cache service instance
+prompt_cache = PromptCacheService()
@@ -0,0 +1,130 @@
+"""
+Reranker service for scoring retrieved chunks with a CPU cross-encoder.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, List, Optional
+from app.config import settings
+from app.services.metrics import metrics_service
+
+# Weight of the newest observation in the per-pair cost estimate
+COST_SMOOTHING = 0.2
+
+class RerankerService:
+    """
+    Service for reranking retrieval candidates with a cross-encoder.
+    
+    Every (question, chunk) pair is scored in one batched forward pass. The
+    model is loaded lazily (or by ``warmup`` at startup), and a running
+    estimate of the cost per pair lets ``arerank`` skip the stage when it
+    would not finish before the request's deadline.
+    """
+    
+    def __init__(self):
+        """Initialize the reranker service without loading the model."""
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._ms_per_pair: Optional[float] = None
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether retrieval should over-fetch candidates for reranking."""
+        return settings.RERANK_ENABLED
+    
+    def warmup(self) -> None:
+        """
+        Load the model and run one forward pass, so no request is charged for it.
+        
+        Reranking stays skipped if the model cannot be loaded.
+        """
+        try:
+            # Not recorded in the cost estimate: the first pass includes one-off setup
+            self._load_model().predict([("warmup", "warmup")], show_progress_bar=False)
+        except Exception as e:
+            print(f"Reranker warmup failed: {e}")
+    
+    def rerank(self, question: str, matches: List[Any], top_n: int = settings.RERANK_TOP_N) -> List[Any]:
+        """
+        Score candidates against the question and keep the best ones.
+        
+        Args:
+            question: The user's question.
+            matches: Retrieval matches with the chunk text in ``metadata``.
+            top_n: Number of matches to keep.
+            
+        Returns:
+            The ``top_n`` highest-scoring matches, best first.
+        """
+        if not matches:
+            return []
+        model = self._load_model()
+        pairs = [(question, match.get("metadata", {}).get("text", "")) for match in matches]
+        start = time.perf_counter()
+        scores = model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._record_cost(elapsed_ms / len(pairs))
+        metrics_service.observe("rerank.duration_ms", elapsed_ms)
+        ranked = sorted(zip(scores, range(len(matches))), reverse=True)[:top_n]
+        return [matches[i] for _, i in ranked]
+    
+    async def arerank(
+        self,
+        question: str,
+        matches: List[Any],
+        deadline: float,
+        top_n: int = settings.RERANK_TOP_N
+    ) -> List[Any]:
+        """
+        Rerank candidates off the event loop, within the request's latency budget.
+        
+        The stage is skipped, keeping the first ``top_n`` (at least ``TOP_K``)
+        matches in retrieval order, when the model is not loaded yet, the
+        estimated cost exceeds the time left before the deadline or the
+        forward pass does not finish in time.
+        
+        Args:
+            question: The user's question.
+            matches: Retrieval matches with the chunk text in ``metadata``.
+            deadline: ``time.monotonic()`` value by which reranking must finish.
+            top_n: Number of matches to keep.
+            
+        Returns:
+            The best matches, reranked or in retrieval order.
+        """
+        remaining = deadline - time.monotonic()
+        estimate = (self._ms_per_pair or 0.0) * len(matches) / 1000
+        if self._model is None or remaining <= estimate:
+            # An unloaded model would make this request pay for loading it
+            return self._skip(matches, "model_not_loaded" if self._model is None else "over_budget", top_n)
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(self.rerank, question, matches, top_n),
+                timeout=remaining
+            )
+        except asyncio.TimeoutError:
+            # The forward pass still completes in its thread and updates the
+            # cost estimate, so later requests skip up front.
+            return self._skip(matches, "timed_out", top_n)
+    
+    def _skip(self, matches: List[Any], reason: str, top_n: int) -> List[Any]:
+        metrics_service.increment(f"rerank.skipped.{reason}")
+        return matches[:max(top_n, settings.TOP_K)]
+    
+    def _load_model(self):
+        with self._model_lock:
+            if self._model is None:
+                # Imported lazily: torch is only needed when reranking is enabled
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(settings.RERANK_MODEL, device="cpu")
+        return self._model
+    
+    def _record_cost(self, ms_per_pair: float) -> None:
+        if self._ms_per_pair is None:
+            self._ms_per_pair = ms_per_pair
+        else:
+            self._ms_per_pair += COST_SMOOTHING * (ms_per_pair - self._ms_per_pair)
+        metrics_service.set_gauge("rerank.ms_per_pair", self._ms_per_pair)
+
+# Create a global reranker service instance
+reranker_service = RerankerService()
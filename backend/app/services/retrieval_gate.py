@@ -0,0 +1,132 @@
+"""
+Retrieval gate for skipping retrieval on turns that do not need it.
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from app.config import settings
+from app.services.embeddings import embeddings_service
+from app.services.metrics import metrics_service
+
+# Greetings, thanks, acknowledgements and farewells, alone or combined ("ok thanks, bye")
+CHIT_CHAT_PHRASE = (
+    r"(?:hi|hello|hey|hiya|yo|greetings|good (?:morning|afternoon|evening)"
+    r"|thanks|thank you|thx|ty|cheers|much appreciated|appreciate it"
+    r"|ok|okay|k|cool|great|nice|awesome|perfect|wow|lol|got it|sounds good|makes sense|i see"
+    r"|bye|goodbye|see you|see ya|cya|have a (?:nice|good|great) (?:day|one)"
+    r")(?: (?:there|kostadin|a lot|so much|very much|again))?"
+)
+CHIT_CHAT_PATTERN = re.compile(rf"^{CHIT_CHAT_PHRASE}(?: {CHIT_CHAT_PHRASE})*$")
+# Weight of the newest sample in the stage latency estimates
+LATENCY_SMOOTHING = 0.1
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z]+", text.lower()))
+
+class RetrievalGate:
+    """
+    Decides per turn whether retrieval is needed.
+    
+    Chit-chat is recognized by rules before anything else runs, so those
+    turns skip embedding as well. Other turns are embedded (the semantic
+    cache and bio sectioning need the embedding anyway) and compared with
+    two small labeled sets of questions: retrieval is skipped when the
+    question is closest to one the bio in the system prompt answers
+    completely, with at least ``RETRIEVAL_GATE_THRESHOLD`` cosine similarity.
+    
+    The latency saved by a skip is estimated from moving averages of the
+    stages it avoids.
+    """
+    
+    def __init__(
+        self,
+        skip_examples: List[str] = settings.RETRIEVAL_GATE_SKIP_EXAMPLES,
+        retrieve_examples: List[str] = settings.RETRIEVAL_GATE_RETRIEVE_EXAMPLES
+    ):
+        """
+        Initialize the gate without embedding the examples.
+        
+        Args:
+            skip_examples: Questions the bio answers completely.
+            retrieve_examples: Questions that need the indexed documents.
+        """
+        self._examples = list(skip_examples) + list(retrieve_examples)
+        self._skip = np.array([True] * len(skip_examples) + [False] * len(retrieve_examples))
+        self._vectors: Optional[np.ndarray] = None
+        self._stage_ms: Dict[str, float] = {}
+    
+    async def load(self) -> None:
+        """Embed the labeled examples once."""
+        if self._vectors is not None or not self._examples:
+            return
+        try:
+            vectors = [await embeddings_service.aembed_query(example) for example in self._examples]
+            matrix = np.asarray(vectors, dtype=np.float32)
+            self._vectors = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        except Exception as e:
+            print(f"Retrieval gate examples could not be embedded, retrieving for every question: {e}")
+    
+    def is_chit_chat(self, question: str) -> bool:
+        """
+        Check whether a turn is chit-chat that needs neither embedding nor retrieval.
+        
+        Args:
+            question: The current user message.
+            
+        Returns:
+            True if the gate is enabled and the message is only greetings,
+            thanks, acknowledgements or farewells.
+        """
+        if not settings.RETRIEVAL_GATE_ENABLED:
+            return False
+        normalized = _normalize(question)
+        if not normalized or not CHIT_CHAT_PATTERN.match(normalized):
+            return False
+        self._record_skip("chit_chat", ["embed", "retrieve", "rerank"])
+        return True
+    
+    def needs_retrieval(self, query_embedding: List[float]) -> bool:
+        """
+        Check whether an embedded question needs retrieval.
+        
+        Args:
+            query_embedding: Embedding of the current question.
+            
+        Returns:
+            False if the question is closest to one the bio answers and
+            similar enough to it; True otherwise, or until the examples are
+            embedded.
+        """
+        if not settings.RETRIEVAL_GATE_ENABLED or self._vectors is None:
+            return True
+        query = np.asarray(query_embedding, dtype=np.float32)
+        similarities = self._vectors @ (query / max(np.linalg.norm(query), 1e-12))
+        best = int(np.argmax(similarities))
+        if self._skip[best] and similarities[best] >= settings.RETRIEVAL_GATE_THRESHOLD:
+            self._record_skip("bio", ["retrieve", "rerank"])
+            return False
+        metrics_service.increment("retrieval_gate.retrieved")
+        return True
+    
+    def record_stage(self, stage: str, duration_ms: float) -> None:
+        """
+        Update the latency estimate of a stage the gate can skip.
+        
+        Args:
+            stage: Stage name ("embed", "retrieve" or "rerank").
+            duration_ms: Measured duration of the stage.
+        """
+        previous = self._stage_ms.get(stage)
+        self._stage_ms[stage] = duration_ms if previous is None else (
+            (1 - LATENCY_SMOOTHING) * previous + LATENCY_SMOOTHING * duration_ms
+        )
+    
+    def _record_skip(self, reason: str, stages: Iterable[str]) -> None:
+        saved = sum(self._stage_ms.get(stage, 0.0) for stage in stages)
+        metrics_service.increment(f"retrieval_gate.skipped.{reason}")
+        metrics_service.observe("retrieval_gate.latency_saved_ms", saved)
+        metrics_service.increment("retrieval_gate.latency_saved_ms_total", saved)
+
+# Create a global retrieval gate instance
+retrieval_gate = RetrievalGate()
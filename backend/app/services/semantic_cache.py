@@ -0,0 +1,152 @@
+"""
+Semantic answer cache keyed on query embeddings.
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from app.config import settings
+from app.services.metrics import metrics_service
+
+@dataclass
+class CacheEntry:
+    """
+    A cached answer with its sources and follow-up suggestions, and the
+    normalized embedding of the question it answers.
+    """
+    namespace: str
+    embedding: np.ndarray
+    answer: str
+    expires_at: float
+    # None when the answer was generated without retrieval or suggestions
+    sources: Optional[List[str]] = None
+    suggestions: Optional[List[str]] = None
+
+class SemanticCache:
+    """
+    LRU + TTL cache that returns a previous answer when a new question's
+    embedding is close enough (cosine similarity) to a cached one.
+    
+    Entries are partitioned by namespace so answers produced against a
+    different index version, system prompt or earlier conversation are never
+    served.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl: float = settings.SEMANTIC_CACHE_TTL,
+        threshold: float = settings.SEMANTIC_CACHE_THRESHOLD
+    ):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            max_entries: Maximum number of cached answers before LRU eviction.
+            ttl: Seconds a cached answer stays valid.
+            threshold: Minimum cosine similarity for a cache hit.
+        """
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._threshold = threshold
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._prompt_hash = hashlib.sha256(settings.SYSTEM_PROMPT.encode()).hexdigest()
+    
+    def namespace(self, history: List[dict]) -> str:
+        """
+        Build the cache namespace for a conversation.
+        
+        Args:
+            history: The conversation history before the current question.
+            
+        Returns:
+            Hash of the index version, system prompt and prior turns.
+        """
+        key = json.dumps(
+            [settings.INDEX_VERSION, self._prompt_hash, [[m.get("role"), m.get("content")] for m in history]]
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+    
+    def lookup(self, namespace: str, embedding: List[float]) -> Optional[CacheEntry]:
+        """
+        Find a cached answer for a semantically similar question.
+        
+        Args:
+            namespace: The cache namespace of the conversation.
+            embedding: The query embedding of the current question.
+            
+        Returns:
+            The cached entry, or None on a miss.
+        """
+        self._evict_expired()
+        candidates = [(entry_id, entry) for entry_id, entry in self._entries.items() if entry.namespace == namespace]
+        if candidates:
+            query = self._normalize(embedding)
+            similarities = np.stack([entry.embedding for _, entry in candidates]) @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self._threshold:
+                entry_id, entry = candidates[best]
+                self._entries.move_to_end(entry_id)
+                metrics_service.increment("semantic_cache.hits")
+                return entry
+        metrics_service.increment("semantic_cache.misses")
+        return None
+    
+    def store(
+        self,
+        namespace: str,
+        embedding: List[float],
+        answer: str,
+        sources: Optional[List[str]] = None,
+        suggestions: Optional[List[str]] = None
+    ) -> None:
+        """
+        Cache an answer for a question embedding.
+        
+        Args:
+            namespace: The cache namespace of the conversation.
+            embedding: The query embedding of the answered question.
+            answer: The generated answer.
+            sources: Sources of the context the answer was generated from.
+            suggestions: Follow-up suggestions generated with the answer.
+        """
+        if not answer:
+            return
+        self._entries[self._next_id] = CacheEntry(
+            namespace=namespace,
+            embedding=self._normalize(embedding),
+            answer=answer,
+            expires_at=time.monotonic() + self._ttl,
+            sources=sources,
+            suggestions=suggestions
+        )
+        self._next_id += 1
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        metrics_service.set_gauge("semantic_cache.entries", len(self._entries))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of live entries and the configured limits."""
+        return {"entries": len(self._entries), "max_entries": self._max_entries, "ttl": self._ttl, "threshold": self._threshold}
+    
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry.expires_at <= now]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        if expired:
+            metrics_service.set_gauge("semantic_cache.entries", len(self._entries))
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+# Create a global semantic cache instance
+semantic_cache = SemanticCache()
@@ -0,0 +1,118 @@
+"""
+Conversation session stores, so clients can send only the new message.
+"""
+import secrets
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Optional
+
+from cachetools import TTLCache
+from app.config import settings
+
+class SessionStore(ABC):
+    """
+    Interface for a conversation session backend.
+    
+    A session is the list of messages (``{"role", "content"}`` dictionaries)
+    of one conversation, oldest first, identified by an opaque ID.
+    """
+    
+    @abstractmethod
+    def create(self, messages: List[dict]) -> str:
+        """
+        Start a session.
+        
+        Args:
+            messages: The conversation so far.
+            
+        Returns:
+            The new session ID.
+        """
+    
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[List[dict]]:
+        """
+        Get a session's conversation.
+        
+        Args:
+            session_id: The session ID.
+            
+        Returns:
+            A copy of the messages, or None if the session does not exist or
+            has expired.
+        """
+    
+    @abstractmethod
+    def append(self, session_id: str, messages: List[dict]) -> bool:
+        """
+        Add messages to a session.
+        
+        Args:
+            session_id: The session ID.
+            messages: The messages to add.
+            
+        Returns:
+            False if the session does not exist or has expired.
+        """
+    
+    @staticmethod
+    def new_id() -> str:
+        """Generate an unguessable session ID."""
+        return secrets.token_urlsafe(16)
+
+class InMemorySessionStore(SessionStore):
+    """
+    Sessions held in process memory.
+    
+    Sessions expire ``SESSION_TTL`` seconds after they were last written, and
+    the least recently used are evicted beyond ``SESSION_MAX_SESSIONS``. Only
+    the last ``SESSION_MAX_MESSAGES`` messages of a session are kept.
+    """
+    
+    def __init__(self):
+        """Initialize an empty session store."""
+        self._sessions = TTLCache(maxsize=settings.SESSION_MAX_SESSIONS, ttl=settings.SESSION_TTL)
+        self._lock = threading.Lock()
+    
+    def create(self, messages: List[dict]) -> str:
+        session_id = self.new_id()
+        with self._lock:
+            self._sessions[session_id] = list(messages)[-settings.SESSION_MAX_MESSAGES:]
+        return session_id
+    
+    def get(self, session_id: str) -> Optional[List[dict]]:
+        with self._lock:
+            messages = self._sessions.get(session_id)
+            return list(messages) if messages is not None else None
+    
+    def append(self, session_id: str, messages: List[dict]) -> bool:
+        with self._lock:
+            stored = self._sessions.get(session_id)
+            if stored is None:
+                return False
+            stored.extend(messages)
+            del stored[:-settings.SESSION_MAX_MESSAGES]
+            # Reassigning restarts the TTL
+            self._sessions[session_id] = stored
+        return True
+    
+    def __len__(self) -> int:
+        """Number of live sessions."""
+        with self._lock:
+            return len(self._sessions)
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionStore:
+    """
+    Get the session store selected by ``SESSION_BACKEND``.
+    
+    Returns:
+        The in-memory session store ("memory").
+    """
+    if settings.SESSION_BACKEND == "memory":
+        return InMemorySessionStore()
+    raise ValueError(f"Unknown SESSION_BACKEND: {settings.SESSION_BACKEND}")
+
+# Create a global session store instance
+session_store = get_session_store()
@@ -0,0 +1,114 @@
+"""
+Single-flight coalescing of identical concurrent streams.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.services.metrics import metrics_service
+
+# Starts the upstream stream for a key
+StreamFactory = Callable[[], AsyncIterator[Any]]
+
+@dataclass
+class Flight:
+    """An upstream stream in progress and the chunks it has produced so far."""
+    chunks: List[Any] = field(default_factory=list)
+    done: bool = False
+    error: Optional[BaseException] = None
+    subscribers: int = 0
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+    task: Optional[asyncio.Task] = None
+
+class SingleFlight:
+    """
+    Shares one upstream stream between concurrent requests with the same key.
+    
+    The first request for a key starts the upstream stream in a background
+    task; requests arriving while it runs subscribe to it instead of starting
+    their own. Every subscriber receives the whole stream from the first
+    chunk, so late joiners replay what was already produced. A subscriber
+    that disconnects only stops its own delivery while others remain; with
+    ``CANCEL_ON_DISCONNECT``, the upstream stream is cancelled when the last
+    subscriber leaves, otherwise it runs to completion (for caches filled on
+    completion).
+    """
+    
+    def __init__(self):
+        """Initialize with no flights in progress."""
+        self._flights: Dict[str, Flight] = {}
+    
+    def in_flight(self, key: str) -> bool:
+        """Whether a stream for the key is in progress, so a request would join it."""
+        return key in self._flights
+    
+    async def stream(self, key: str, factory: StreamFactory) -> AsyncIterator[Any]:
+        """
+        Stream the chunks for a key, joining the flight in progress if any.
+        
+        Args:
+            key: Identifies requests whose streams are interchangeable.
+            factory: Starts the upstream stream, called only if no flight for
+                the key is in progress.
+                
+        Yields:
+            The upstream chunks, from the first one.
+            
+        Raises:
+            Exception: Whatever the upstream stream raised.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, factory))
+            metrics_service.increment("singleflight.leaders")
+        else:
+            metrics_service.increment("singleflight.coalesced")
+        metrics_service.set_gauge("singleflight.in_flight", len(self._flights))
+        
+        flight.subscribers += 1
+        try:
+            index = 0
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: len(flight.chunks) > index or flight.done)
+                    chunks = flight.chunks[index:]
+                    done = flight.done
+                for chunk in chunks:
+                    yield chunk
+                index += len(chunks)
+                if done:
+                    break
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done and settings.CANCEL_ON_DISCONNECT:
+                # Retired at once, so a new request starts a fresh flight
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+                metrics_service.increment("singleflight.cancelled")
+    
+    async def _run(self, key: str, flight: Flight, factory: StreamFactory) -> None:
+        """Produce the upstream stream into the flight and retire it when done."""
+        try:
+            async for chunk in factory():
+                async with flight.changed:
+                    flight.chunks.append(chunk)
+                    flight.changed.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            # New requests start a fresh flight; subscribers keep the finished one
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            metrics_service.set_gauge("singleflight.in_flight", len(self._flights))
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+# Create a global single-flight instance
+single_flight = SingleFlight()
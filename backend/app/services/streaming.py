@@ -0,0 +1,144 @@
+"""
+Framing and coalescing of /chat response streams.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+from app.services.metrics import metrics_service
+from app.services.suggestions import suggestions_event
+
+# Media type of each stream format
+STREAM_MEDIA_TYPES = {
+    "text": "text/plain",
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson"
+}
+
+# A stream item is either answer text or an event created by ``stream_event``
+StreamItem = Union[str, Dict[str, Any]]
+
+def stream_event(name: str, **data: Any) -> Dict[str, Any]:
+    """
+    Create a metadata event for a /chat stream.
+    
+    Args:
+        name: Event type, such as ``sources`` or ``suggestions``.
+        **data: JSON-serializable payload of the event.
+        
+    Returns:
+        The event, to be written to the graph's custom stream.
+    """
+    return {"event": name, **data}
+
+def encode(item: StreamItem, stream_format: str) -> str:
+    """
+    Frame a stream item for the wire.
+    
+    In ``sse`` and ``ndjson`` formats every item becomes a typed event, text
+    being a ``token`` event. The ``text`` format carries the answer text as
+    is; only the suggestions event has a plain-text framing (a record
+    separator followed by JSON), so other events are dropped.
+    
+    Args:
+        item: Answer text or an event.
+        stream_format: One of ``STREAM_MEDIA_TYPES``.
+        
+    Returns:
+        The framed item, or an empty string if the format cannot carry it.
+    """
+    if stream_format == "text":
+        if isinstance(item, str):
+            return item
+        if item.get("event") == "suggestions":
+            return suggestions_event(item["suggestions"])
+        return ""
+    event = stream_event("token", text=item) if isinstance(item, str) else item
+    if stream_format == "sse":
+        data = {key: value for key, value in event.items() if key != "event"}
+        return f"event: {event['event']}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps(event) + "\n"
+
+async def coalesce(items: AsyncIterator[StreamItem], interval: float, max_bytes: int) -> AsyncIterator[StreamItem]:
+    """
+    Merge consecutive text chunks into fewer, larger writes.
+    
+    The first chunk is passed on at once so coalescing never delays the time
+    to first token. After that, text is buffered until ``interval`` seconds
+    have passed since the oldest buffered chunk or ``max_bytes`` are
+    buffered, whichever comes first. Events flush the buffer and are passed
+    on in order.
+    
+    Args:
+        items: The stream to coalesce.
+        interval: Longest time to hold back buffered text, in seconds. Zero
+            or less disables coalescing.
+        max_bytes: Buffered UTF-8 bytes that trigger a flush.
+        
+    Yields:
+        The stream items, with adjacent text chunks merged.
+        
+    Raises:
+        Exception: Whatever the stream raised, after flushing the buffer.
+    """
+    if interval <= 0:
+        async for item in items:
+            metrics_service.increment("stream.chunks")
+            metrics_service.increment("stream.writes")
+            yield item
+        return
+    loop = asyncio.get_running_loop()
+    iterator = items.__aiter__()
+    buffer = []
+    size = 0
+    deadline: Optional[float] = None
+    first = True
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None if deadline is None else max(deadline - loop.time(), 0.0)
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                # Nothing new within the interval: send what is buffered
+                metrics_service.increment("stream.writes")
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+                continue
+            next_item, pending = pending, None
+            try:
+                item = next_item.result()
+            except StopAsyncIteration:
+                break
+            except Exception:
+                if buffer:
+                    metrics_service.increment("stream.writes")
+                    yield "".join(buffer)
+                raise
+            if isinstance(item, str):
+                metrics_service.increment("stream.chunks")
+                if first:
+                    first = False
+                    metrics_service.increment("stream.writes")
+                    yield item
+                    continue
+                buffer.append(item)
+                size += len(item.encode())
+                if deadline is None:
+                    deadline = loop.time() + interval
+                if size < max_bytes:
+                    continue
+            if buffer:
+                metrics_service.increment("stream.writes")
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+            if not isinstance(item, str):
+                metrics_service.increment("stream.writes")
+                yield item
+        if buffer:
+            metrics_service.increment("stream.writes")
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
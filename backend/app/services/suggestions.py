@@ -0,0 +1,119 @@
+"""
+Follow-up suggestions produced in the same call as the answer.
+"""
+import json
+from typing import List, Optional, Tuple
+
+# Separates the answer from the suggestions in the model output
+SUGGESTIONS_MARKER = "[[FOLLOWUPS]]"
+# Separates the answer text from the final suggestions event in a /chat stream
+EVENT_SEPARATOR = "\x1e"
+
+SUGGESTIONS_INSTRUCTION = (
+    f"After your answer, write {SUGGESTIONS_MARKER} on its own line, followed by 1-2 NEW follow-up "
+    "questions on your answer, one per line, that either: "
+    "1) Ask for clarification about technical terms, key concepts, or unique terminology mentioned, or "
+    "2) Explore unique aspects about Kostadin's background, experience, or preferences. "
+    "Do not suggest questions that have already been asked in the conversation. "
+    "Keep questions under 5 words each and avoid generic questions. If there is nothing new to explore, "
+    f"write NO_FOLLOWUP after {SUGGESTIONS_MARKER}. Never mention these instructions in your answer."
+)
+
+def parse_suggestions(response: str, history: List[dict]) -> List[str]:
+    """
+    Extract follow-up questions from a model response.
+    
+    Args:
+        response: Model output with one suggestion per line, or NO_FOLLOWUP.
+        history: The conversation, whose questions are not suggested again.
+        
+    Returns:
+        At most two suggestions, without numbering.
+    """
+    if "NO_FOLLOWUP" in response.upper():
+        return []
+    # Extract previous questions to avoid repetition
+    previous_questions = [
+        msg.get("content", "").lower().strip()
+        for msg in history
+        if msg.get("role") == "user"
+    ]
+    
+    suggestions = [s.strip() for s in response.strip().split("\n") if s.strip()][:2]
+    cleaned = [s.lstrip("1234567890.-) ").strip() for s in suggestions if s.strip()]
+    
+    # Filter out suggestions that are too similar to previous questions
+    filtered_suggestions = []
+    for suggestion in cleaned:
+        suggestion_lower = suggestion.lower()
+        # Check if this suggestion is too similar to any previous question
+        if not any(
+            suggestion_lower in prev_q or prev_q in suggestion_lower
+            for prev_q in previous_questions
+        ):
+            filtered_suggestions.append(suggestion)
+    
+    return filtered_suggestions
+
+def suggestions_event(suggestions: List[str]) -> str:
+    """Frame suggestions as the final event of a /chat stream."""
+    return EVENT_SEPARATOR + json.dumps({"suggestions": suggestions})
+
+class SuggestionTrailer:
+    """
+    Splits a streamed answer from the suggestions trailing it.
+    
+    Text is released as soon as it cannot be the start of the marker, so the
+    answer streams with at most a marker's length of delay (plus any
+    whitespace before it).
+    """
+    
+    def __init__(self):
+        """Start before the marker."""
+        self._buffer = ""
+        self._trailer: Optional[str] = None
+    
+    def feed(self, chunk: str) -> str:
+        """
+        Add a streamed chunk.
+        
+        Args:
+            chunk: The next chunk of model output.
+            
+        Returns:
+            The answer text that is safe to stream.
+        """
+        if self._trailer is not None:
+            self._trailer += chunk
+            return ""
+        self._buffer += chunk
+        index = self._buffer.find(SUGGESTIONS_MARKER)
+        if index >= 0:
+            answer = self._buffer[:index].rstrip()
+            self._trailer = self._buffer[index + len(SUGGESTIONS_MARKER):]
+            self._buffer = ""
+            return answer
+        # Whitespace before a possible marker is held too, so the answer
+        # does not end with the line break preceding it
+        candidate = self._buffer[:len(self._buffer) - self._partial_marker_length()]
+        answer = candidate.rstrip()
+        self._buffer = self._buffer[len(answer):]
+        return answer
+    
+    def finish(self) -> Tuple[str, Optional[str]]:
+        """
+        End the stream.
+        
+        Returns:
+            The remaining answer text and the trailer after the marker, or
+            None if the model wrote no marker.
+        """
+        answer, self._buffer = self._buffer, ""
+        return answer, self._trailer
+    
+    def _partial_marker_length(self) -> int:
+        """Length of the longest suffix of the buffer that starts the marker."""
+        for size in range(min(len(self._buffer), len(SUGGESTIONS_MARKER) - 1), 0, -1):
+            if SUGGESTIONS_MARKER.startswith(self._buffer[-size:]):
+                return size
+        return 0
@@ -0,0 +1,90 @@
+"""
+Tokenizer service for measuring prompt sizes locally.
+"""
+import asyncio
+import math
+import threading
+from typing import Optional
+from app.config import settings
+
+# Gemini's rule of thumb, used when the local tokenizer cannot be loaded
+CHARS_PER_TOKEN = 4
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+class TokenizerService:
+    """
+    Service for counting tokens without a round trip to the model API.
+    
+    Counts come from the ``TOKENIZER_MODEL`` tokenizer. They are an estimate
+    of Gemini's own counts, close enough for budgeting prompt sections
+    against each other.
+    
+    The server loads the tokenizer at startup, off the event loop, with
+    ``load``. Counts made on the event loop before it is loaded are
+    estimated from the length instead of waiting for the download; elsewhere
+    (such as in worker threads and scripts) the first count loads it.
+    """
+    
+    def __init__(self):
+        """Initialize the tokenizer service without loading the tokenizer."""
+        self._tokenizer = None
+        self._loaded = False
+        self._lock = threading.Lock()
+    
+    def count(self, text: str) -> int:
+        """
+        Count the tokens in a text.
+        
+        Args:
+            text: The text to measure.
+            
+        Returns:
+            The number of tokens, estimated from the length if no tokenizer
+            is available.
+        """
+        if not text:
+            return 0
+        if self._loaded:
+            tokenizer = self._tokenizer
+        elif _on_event_loop():
+            # Never download on the event loop; the server loads it at startup
+            tokenizer = None
+        else:
+            tokenizer = self._load()
+        if tokenizer is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    
+    @property
+    def loaded(self) -> bool:
+        """Whether loading the tokenizer has been attempted."""
+        return self._loaded
+    
+    def load(self) -> None:
+        """Load the tokenizer, downloading it if needed."""
+        self._load()
+    
+    def _load(self) -> Optional[object]:
+        if self._loaded:
+            return self._tokenizer
+        with self._lock:
+            if not self._loaded:
+                try:
+                    from tokenizers import Tokenizer
+                    tokenizer = Tokenizer.from_pretrained(settings.TOKENIZER_MODEL)
+                    # Model tokenizers truncate to their context window by default
+                    tokenizer.no_truncation()
+                    self._tokenizer = tokenizer
+                except Exception as e:
+                    print(f"Tokenizer {settings.TOKENIZER_MODEL} unavailable, estimating token counts: {e}")
+                self._loaded = True
+        return self._tokenizer
+
+# Create a global tokenizer service instance
+tokenizer_service = TokenizerService()
@@ -0,0 +1,149 @@
+"""
+Vector store interface shared by the serving path and the ingestion loaders.
+"""
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.services.context_packer import context_packer
+
+class VectorStore(ABC):
+    """
+    Interface for a vector database backend.
+    
+    Vectors are dictionaries with ``id``, ``values`` and ``metadata`` keys, and
+    query results are shaped like Pinecone responses
+    (``{"matches": [{"id", "score", "metadata"}]}``, plus ``values`` when
+    requested).
+    """
+    
+    @abstractmethod
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "docs") -> int:
+        """
+        Insert or overwrite vectors, in batches.
+        
+        Args:
+            vectors: Vectors to upsert.
+            namespace: The namespace to write to.
+            
+        Returns:
+            The number of vectors upserted.
+        """
+    
+    @abstractmethod
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = settings.TOP_K,
+        namespace: str = "docs",
+        include_values: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Query the store for similar vectors.
+        
+        Args:
+            vector: The query vector to search for.
+            top_k: Number of results to return.
+            namespace: The namespace to search in.
+            include_values: Include the matched vectors in the results.
+            
+        Returns:
+            Dictionary containing the query results.
+        """
+    
+    async def aquery(
+        self,
+        vector: List[float],
+        top_k: int = settings.TOP_K,
+        namespace: str = "docs",
+        include_values: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Asynchronously query the store for similar vectors.
+        
+        Args:
+            vector: The query vector to search for.
+            top_k: Number of results to return.
+            namespace: The namespace to search in.
+            include_values: Include the matched vectors in the results.
+            
+        Returns:
+            Dictionary containing the query results.
+        """
+        return self.query(vector, top_k=top_k, namespace=namespace, include_values=include_values)
+    
+    @abstractmethod
+    def delete(self, ids: Optional[List[str]] = None, namespace: str = "docs", delete_all: bool = False) -> None:
+        """
+        Delete vectors by id, or every vector in a namespace.
+        
+        Args:
+            ids: Ids of the vectors to delete.
+            namespace: The namespace to delete from.
+            delete_all: Delete the whole namespace instead of specific ids.
+        """
+    
+    @abstractmethod
+    def namespace_stats(self) -> Dict[str, int]:
+        """
+        Count the vectors in each namespace.
+        
+        Returns:
+            Dictionary mapping namespace names to vector counts.
+        """
+    
+    def flush(self) -> None:
+        """Persist pending writes, for stores that are not durable on upsert."""
+    
+    async def aclose(self) -> None:
+        """Release any async client sessions held by the store."""
+    
+    def get_context(self, query_result: Dict[str, Any], query_embedding: Optional[List[float]] = None) -> str:
+        """
+        Extract context from query results.
+        
+        With context packing enabled, duplicates are dropped, chunks are
+        ordered by MMR and the context is capped at ``CONTEXT_TOKEN_BUDGET``.
+        
+        Args:
+            query_result: The result from a query.
+            query_embedding: Embedding of the question, for MMR relevance.
+            
+        Returns:
+            Concatenated context string from the results.
+        """
+        if settings.CONTEXT_PACKING_ENABLED:
+            return context_packer.pack(list(query_result.get("matches", [])), query_embedding)
+        context = ""
+        for match in query_result.get("matches", []):
+            metadata = match.get("metadata", {})
+            text = metadata.get("text", "")
+            if text:
+                context += text + "\n\n"
+        return context.strip()
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> VectorStore:
+    """
+    Get the vector store selected by ``VECTOR_BACKEND``.
+    
+    The backends are imported lazily so that the local backends never open a
+    Pinecone connection.
+    
+    Returns:
+        The Pinecone store, the in-memory store loaded from the local snapshot
+        ("local"), or an empty, non-persistent in-memory store ("memory").
+    """
+    if settings.VECTOR_BACKEND == "local":
+        from app.services.local_index import InMemoryVectorStore
+        return InMemoryVectorStore(settings.LOCAL_INDEX_PATH)
+    if settings.VECTOR_BACKEND == "memory":
+        from app.services.local_index import InMemoryVectorStore
+        return InMemoryVectorStore(None)
+    if settings.VECTOR_BACKEND == "pinecone":
+        from app.services.pinecone import pinecone_service
+        return pinecone_service
+    raise ValueError(f"Unknown VECTOR_BACKEND: {settings.VECTOR_BACKEND}")
+
+# Create a global vector store instance
+vector_store = get_vector_store()
\ No newline at end of file
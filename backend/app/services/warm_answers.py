@@ -0,0 +1,170 @@
+"""
+Warm-answer store for precomputed responses to the canonical default prompts.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.services.metrics import metrics_service
+from app.services.vector_store import vector_store
+
+@dataclass
+class WarmAnswer:
+    """A precomputed answer for a canonical prompt."""
+    prompt: str
+    answer: str
+    context: List[str] = field(default_factory=list)
+    suggestions: List[str] = field(default_factory=list)
+    fingerprint: str = ""
+    generated_at: float = 0.0
+
+WarmAnswerProducer = Callable[[str], Awaitable[WarmAnswer]]
+
+class WarmAnswerStore:
+    """
+    Store of precomputed answers, retrieved context and follow-up suggestions
+    for a configured list of canonical prompts.
+    
+    Entries are tagged with a fingerprint of the index state and the system
+    prompt, and a background task regenerates any entry whose fingerprint no
+    longer matches or that has outlived its maximum age. The index state is
+    ``INDEX_VERSION`` with the vector counts of the namespaces, read again on
+    every refresh, so re-ingestion invalidates the entries without a restart.
+    """
+    
+    def __init__(self, prompts: List[str] = settings.WARM_PROMPTS):
+        """
+        Initialize the warm-answer store.
+        
+        Args:
+            prompts: The canonical prompts to precompute answers for.
+        """
+        self._prompts = list(prompts)
+        self._entries: Dict[str, WarmAnswer] = {}
+        self._producer: Optional[WarmAnswerProducer] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock = asyncio.Lock()
+        self._prompt_hash = hashlib.sha256(settings.SYSTEM_PROMPT.encode()).hexdigest()
+        self._index_state = settings.INDEX_VERSION
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize a prompt for matching (case and whitespace insensitive)."""
+        return " ".join(text.lower().split()).rstrip("?!. ")
+    
+    def fingerprint(self, prompt: str) -> str:
+        """
+        Fingerprint the inputs an answer depends on.
+        
+        Args:
+            prompt: The canonical prompt.
+            
+        Returns:
+            Hash of the index state, the system prompt and the prompt itself.
+        """
+        key = "\x00".join([self._index_state, self._prompt_hash, prompt])
+        return hashlib.sha256(key.encode()).hexdigest()
+    
+    def get(self, history: List[dict]) -> Optional[WarmAnswer]:
+        """
+        Look up a precomputed answer for a single-turn conversation.
+        
+        Args:
+            history: The conversation history.
+            
+        Returns:
+            The warm answer, or None if the history is not a single canonical
+            prompt or its entry is stale.
+        """
+        if len(history) != 1 or history[0].get("role") != "user":
+            return None
+        entry = self._entries.get(self.normalize(history[0].get("content", "")))
+        if entry is None or self._is_stale(entry):
+            return None
+        metrics_service.increment("warm_answers.hits")
+        return entry
+    
+    async def refresh(self, force: bool = False) -> int:
+        """
+        Regenerate missing or stale entries.
+        
+        Args:
+            force: Regenerate every entry regardless of staleness.
+            
+        Returns:
+            The number of entries regenerated.
+        """
+        if self._producer is None:
+            return 0
+        refreshed = 0
+        async with self._refresh_lock:
+            await self._update_index_state()
+            for prompt in self._prompts:
+                entry = self._entries.get(self.normalize(prompt))
+                if not force and entry is not None and not self._is_stale(entry):
+                    continue
+                try:
+                    entry = await self._producer(prompt)
+                except Exception as e:
+                    print(f"Failed to precompute warm answer for {prompt!r}: {e}")
+                    metrics_service.increment("warm_answers.refresh_errors")
+                    continue
+                entry.fingerprint = self.fingerprint(prompt)
+                entry.generated_at = time.time()
+                self._entries[self.normalize(prompt)] = entry
+                refreshed += 1
+        metrics_service.increment("warm_answers.refreshed", refreshed)
+        metrics_service.set_gauge("warm_answers.entries", len(self._entries))
+        return refreshed
+    
+    def trigger_refresh(self, force: bool = True) -> None:
+        """Schedule a refresh in the background without waiting for it."""
+        asyncio.get_running_loop().create_task(self.refresh(force=force))
+    
+    def start(self, producer: WarmAnswerProducer) -> None:
+        """
+        Start precomputing entries and keeping them fresh in the background.
+        
+        Args:
+            producer: Coroutine function that runs the pipeline for a prompt.
+        """
+        self._producer = producer
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+    
+    async def stop(self) -> None:
+        """Stop the background refresh task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(settings.WARM_ANSWERS_REFRESH_INTERVAL)
+    
+    async def _update_index_state(self) -> None:
+        try:
+            stats = await asyncio.to_thread(vector_store.namespace_stats)
+        except Exception as e:
+            # Keep the last known state rather than discarding every entry
+            print(f"Index stats unavailable for warm answers: {e}")
+            return
+        self._index_state = json.dumps([settings.INDEX_VERSION, sorted(stats.items())])
+    
+    def _is_stale(self, entry: WarmAnswer) -> bool:
+        return (
+            entry.fingerprint != self.fingerprint(entry.prompt)
+            or time.time() - entry.generated_at > settings.WARM_ANSWERS_MAX_AGE
+        )
+
+# Create a global warm-answer store instance
+warm_answer_store = WarmAnswerStore()
@@ -1,6 +1,6 @@
 import { useState, useCallback, useRef, useEffect } from 'react';
-import { Message } from '../types/chat';
-import { chatService } from '../services/chatService';
+import { Message, SuggestionResponse } from '../types/chat';
+import { chatService, EVENT_SEPARATOR } from '../services/chatService';
 
 const CHAT_HISTORY_KEY = "chat_history";
 
@@ -11,8 +11,11 @@ export const useChat = () => {
   const [isTyping, setIsTyping] = useState(false);
   const [suggestions, setSuggestions] = useState<string[]>([]);
   const abortControllerRef = useRef<AbortController | null>(null);
+  // Once the server holds the conversation, only new messages are sent
+  const sessionIdRef = useRef<string | null>(null);
 
   const handleMessagesLoad = useCallback((loadedMessages: Message[]) => {
+    sessionIdRef.current = null;
     setMessages(loadedMessages);
   }, []);
 
@@ -21,6 +24,7 @@ export const useChat = () => {
       abortControllerRef.current.abort();
       abortControllerRef.current = null;
     }
+    sessionIdRef.current = null;
     setMessages([]);
     setSuggestions([]);
     setIsSending(false);
@@ -45,7 +49,12 @@ export const useChat = () => {
     abortControllerRef.current = controller;
 
     try {
-      const stream = await chatService.sendMessage(newMessages, controller.signal);
+      const { stream, sessionId } = await chatService.sendMessage(
+        newMessages,
+        controller.signal,
+        sessionIdRef.current
+      );
+      sessionIdRef.current = sessionId;
       if (!stream) return;
 
       setMessages((prev) => [...prev, { content: "", role: "assistant" }]);
@@ -53,12 +62,24 @@ export const useChat = () => {
 
       const reader = stream.getReader();
       const decoder = new TextDecoder();
+      // Suggestions generated with the answer arrive after EVENT_SEPARATOR
+      let suggestionsEvent: string | null = null;
 
       while (true) {
         const { done, value } = await reader.read();
         if (done) break;
 
-        const chunkValue = decoder.decode(value, { stream: true });
+        let chunkValue = decoder.decode(value, { stream: true });
+        if (suggestionsEvent !== null) {
+          suggestionsEvent += chunkValue;
+          continue;
+        }
+        const separatorIndex = chunkValue.indexOf(EVENT_SEPARATOR);
+        if (separatorIndex !== -1) {
+          suggestionsEvent = chunkValue.slice(separatorIndex + 1);
+          chunkValue = chunkValue.slice(0, separatorIndex);
+          if (!chunkValue) continue;
+        }
         setIsTyping(false);
         setMessages((prev) => {
           const updated = [...prev];
@@ -71,13 +92,19 @@ export const useChat = () => {
         });
       }
 
+      if (suggestionsEvent !== null) {
+        const event: SuggestionResponse = JSON.parse(suggestionsEvent);
+        setSuggestions(event.suggestions || []);
+        return;
+      }
+
       const suggestions = await chatService.getSuggestions([
         ...newMessages,
         {
           content: messages[messages.length - 1]?.content || "Let me know how else I can help.",
           role: "assistant",
         },
-      ]);
+      ], sessionIdRef.current);
       setSuggestions(suggestions);
     } catch (error) {
       if (error instanceof Error && error.name === "AbortError") {
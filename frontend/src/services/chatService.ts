@@ -1,28 +1,39 @@
-import { Message, SuggestionResponse } from '../types/chat';
+import { ChatStream, Message, SuggestionResponse } from '../types/chat';
 
 const API_URL = import.meta.env.VITE_API_URL || "http://localhost:8000";
 
+// Separates the answer text from the trailing suggestions event in a /chat stream
+export const EVENT_SEPARATOR = "\x1e";
+
 export const chatService = {
-  async sendMessage(history: Message[], signal?: AbortSignal): Promise<ReadableStream<Uint8Array> | null> {
-    const response = await fetch(`${API_URL}/chat`, {
+  async sendMessage(history: Message[], signal?: AbortSignal, sessionId?: string | null): Promise<ChatStream> {
+    const message = history[history.length - 1].content;
+    const post = (body: object) => fetch(`${API_URL}/chat`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ history }),
+      body: JSON.stringify({ ...body, message, include_suggestions: true }),
       signal,
     });
 
+    // Within a session only the new message is sent
+    let response = await post(sessionId ? { session_id: sessionId } : { history: history.slice(0, -1) });
+    if (response.status === 404 && sessionId) {
+      // The session expired, so start a new one from the full history
+      response = await post({ history: history.slice(0, -1) });
+    }
+
     if (!response.ok) {
       throw new Error(`Network error: ${response.statusText}`);
     }
 
-    return response.body;
+    return { stream: response.body, sessionId: response.headers.get("X-Session-Id") };
   },
 
-  async getSuggestions(history: Message[]): Promise<string[]> {
+  async getSuggestions(history: Message[], sessionId?: string | null): Promise<string[]> {
     const response = await fetch(`${API_URL}/suggest-followups`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ history }),
+      body: JSON.stringify(sessionId ? { session_id: sessionId } : { history }),
     });
 
     if (!response.ok) {
@@ -12,6 +12,12 @@ export interface ChatResponse {
   history: Message[];
 }
 
+export interface ChatStream {
+  stream: ReadableStream<Uint8Array> | null;
+  /** Server-side session holding the conversation, if the server keeps one */
+  sessionId: string | null;
+}
+
 export interface SuggestionResponse {
   suggestions: string[];
 } 
\ No newline at end of file